@@ -1,9 +1,26 @@
+import argparse
+import codecs
+import csv
+import io
+import numpy as np
 import pandas as pd
 import json
 import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+from atomic_io import atomic_write, atomic_write_json
+from columnar_cache import DEFAULT_MAX_BYTES, ColumnarCache, content_hash
+from instrumentation import PROFILE_MODES, start_trace, stop_trace, traced
+from report_renderer import (DEFAULT_DATA_SOURCE, DEFAULT_REPORT_DATE, render_report, report_sections,
+                             write_json_array)
+
 WORKSPACE = Path(__file__).parent
+CACHE_DIR = WORKSPACE / ".readiness_cache"
+INCREMENTAL_STATE_PATH = CACHE_DIR / "incremental_state.json"
+SCHEMA_MANIFEST_PATH = CACHE_DIR / "schema_manifest.json"
+DIALECT_CACHE_PATH = CACHE_DIR / "dialects.json"
 
 FORTZA_LAYERS = {
     "Permanent Memory User Details": {
@@ -243,368 +260,1104 @@ FIELD_MAPPINGS = {
     }
 }
 
-def load_csv(filepath):
+DIALECT_SAMPLE_BYTES = 4 * 2**20
+SNIFF_TEXT_CHARS = 64 * 2**10
+DELIMITER_CANDIDATES = ",;\t|"
+_dialects = {}
+
+def file_fingerprint(filepath):
+    stat = os.stat(filepath)
+    return f"{Path(filepath).resolve()}:{stat.st_size}:{stat.st_mtime_ns}"
+
+def sniff_encoding(filepath, sample_bytes=DIALECT_SAMPLE_BYTES):
+    # The encoding and the decoded sample it was read from.
+    with open(filepath, "rb") as f:
+        sample = f.read(sample_bytes)
+    encoding = "utf-8-sig" if sample.startswith(codecs.BOM_UTF8) else "utf-8"
+    try:
+        text = sample.decode(encoding)
+    except UnicodeDecodeError as exc:
+        # The sample may cut a multi-byte character in half at its end.
+        if len(sample) == sample_bytes and exc.reason == "unexpected end of data":
+            text = sample[:exc.start].decode(encoding)
+        else:
+            encoding = "latin-1"
+            text = sample.decode(encoding)
+    return encoding, text
+
+def sniff_dialect(filepath, sample_bytes=DIALECT_SAMPLE_BYTES):
+    encoding, text = sniff_encoding(filepath, sample_bytes)
+    head = text[:SNIFF_TEXT_CHARS]
+    if len(text) > SNIFF_TEXT_CHARS and "\n" in head:
+        head = head[:head.rindex("\n")]
+    # Salesforce API names never contain a delimiter, so the header line
+    # alone settles it; the sniffer is only asked about quoting.
+    header = head.split("\n", 1)[0]
+    sep = max(DELIMITER_CANDIDATES, key=header.count) if header else ","
+    if not header.count(sep):
+        sep = ","
     try:
-        df = pd.read_csv(filepath, encoding='utf-8', low_memory=False)
+        quotechar = csv.Sniffer().sniff(head, delimiters=sep).quotechar
+    except csv.Error:
+        quotechar = '"'
+    return {"encoding": encoding, "sep": sep, "quotechar": quotechar}
+
+def _load_dialect_cache():
+    try:
+        with open(DIALECT_CACHE_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def remember_dialect(filepath, dialect, persist=True):
+    # persist=False keeps the dialect in this process only.
+    fingerprint = file_fingerprint(filepath)
+    _dialects[fingerprint] = dialect
+    if not persist:
+        return dialect
+    cache = _load_dialect_cache()
+    cache[fingerprint] = dialect
+    atomic_write_json(DIALECT_CACHE_PATH, cache)
+    return dialect
+
+def detect_dialect(filepath):
+    fingerprint = file_fingerprint(filepath)
+    if fingerprint not in _dialects:
+        cached = _load_dialect_cache().get(fingerprint)
+        if cached is None:
+            return remember_dialect(filepath, sniff_dialect(filepath))
+        _dialects[fingerprint] = cached
+    return _dialects[fingerprint]
+
+def dialect_read_kwargs(dialect):
+    return {"encoding": dialect["encoding"], "sep": dialect["sep"], "quotechar": dialect["quotechar"]}
+
+def read_with_dialect(filepath, read):
+    # A non-UTF-8 byte beyond the sniffed sample is the one case detection
+    # can miss; the file is then re-read once as latin-1 and the cache fixed.
+    dialect = detect_dialect(filepath)
+    try:
+        return read(dialect_read_kwargs(dialect))
     except UnicodeDecodeError:
-        df = pd.read_csv(filepath, encoding='latin-1', low_memory=False)
-    except:
-        df = pd.read_csv(filepath, sep=';', encoding='utf-8', low_memory=False)
+        dialect = remember_dialect(filepath, dict(dialect, encoding="latin-1"))
+        return read(dialect_read_kwargs(dialect))
+
+columnar_cache = None
+
+def enable_columnar_cache(max_bytes=DEFAULT_MAX_BYTES, cache_dir=None):
+    global columnar_cache
+    columnar_cache = ColumnarCache(cache_dir or CACHE_DIR / "columnar", max_bytes)
+    return columnar_cache
+
+# Text and boolean columns load as categoricals (int8 codes for flags and
+# most picklists) when the sampled rows hold at most this share of distinct
+# values, or at most CATEGORY_MIN_DISTINCT of them.
+COMPACT_SAMPLE_ROWS = 10_000
+CATEGORY_MAX_RATIO = 0.5
+CATEGORY_MIN_DISTINCT = 64
+# The parser's default true/false spellings; categoricals made only of these
+# become booleans, as plain inference would have made the column.
+BOOL_LITERALS = {"True": True, "TRUE": True, "true": True, "False": False, "FALSE": False, "false": False}
+
+_compact_dtypes = {}
+encoding_savings = {}
+
+def infer_compact_dtypes(filepath, dialect_kwargs, usecols=None):
+    key = (file_fingerprint(filepath), tuple(usecols) if usecols is not None else None)
+    if key not in _compact_dtypes:
+        sample = pd.read_csv(filepath, nrows=COMPACT_SAMPLE_ROWS, low_memory=False, usecols=usecols, **dialect_kwargs)
+        dtypes = {}
+        for col in sample.columns[(sample.dtypes == object).to_numpy()]:
+            values = sample[col].dropna()
+            if values.empty:
+                continue
+            if values.map(type).isin([str, bool]).all() and \
+                    values.nunique() <= max(CATEGORY_MIN_DISTINCT, len(values) * CATEGORY_MAX_RATIO):
+                dtypes[col] = "category"
+        _compact_dtypes[key] = dtypes
+    return _compact_dtypes[key]
+
+def decode_bool_categories(df):
+    for j in np.flatnonzero([isinstance(dtype, pd.CategoricalDtype) for dtype in df.dtypes]):
+        categories = df.iloc[:, j].cat.categories
+        if len(categories) and categories.isin(list(BOOL_LITERALS)).all():
+            lookup = np.array([int(BOOL_LITERALS[c]) for c in categories] + [-1], dtype=np.int8)
+            codes = lookup[df.iloc[:, j].cat.codes.to_numpy()]
+            df.isetitem(j, pd.Categorical.from_codes(codes, categories=pd.Index([False, True])))
     return df
 
-def analyze_csv(filepath):
-    df = load_csv(filepath)
-    analysis = {
-        "filename": os.path.basename(filepath),
-        "total_rows": len(df),
-        "total_columns": len(df.columns),
-        "columns": []
+def read_compact(filepath, read, dialect_kwargs, usecols=None):
+    dtypes = infer_compact_dtypes(filepath, dialect_kwargs, usecols)
+    return read(dict(dialect_kwargs, dtype=dtypes) if dtypes else dialect_kwargs)
+
+def _is_bool_category(dtype):
+    return isinstance(dtype, pd.CategoricalDtype) and len(dtype.categories) and \
+        all(isinstance(c, bool) for c in dtype.categories)
+
+def _is_flag_chunk(series):
+    # Flags with gaps: a decoded bool categorical, or, from a plain read such
+    # as a worker's byte range, an object column holding only Python bools.
+    if _is_bool_category(series.dtype):
+        return True
+    return series.dtype == object and pd.api.types.infer_dtype(series, skipna=True) == "boolean"
+
+def logical_dtype(series):
+    # The dtype plain inference would have given a dictionary-encoded column,
+    # so profiles and the outputs built from them do not depend on encoding.
+    if not isinstance(series.dtype, pd.CategoricalDtype):
+        return str(series.dtype)
+    if len(series) and series.isna().all():
+        return "float64"
+    if _is_bool_category(series.dtype) and len(series) and not series.hasnans:
+        return "bool"
+    return "object"
+
+def object_memory_usage(series):
+    # Deep memory_usage the column would have as object dtype, computed from
+    # the codes: 8-byte pointers plus each row's Python object size.
+    sizes = np.array([sys.getsizeof(value) for value in series.cat.categories], dtype=np.int64)
+    codes = series.cat.codes.to_numpy()
+    used = np.bincount(codes[codes >= 0], minlength=len(sizes))
+    return 8 * len(series) + int(used @ sizes) + int((codes < 0).sum()) * sys.getsizeof(np.nan)
+
+def record_encoding_savings(filepath, df):
+    encoded = [col for col, dtype in df.dtypes.items() if isinstance(dtype, pd.CategoricalDtype)]
+    if not encoded:
+        return
+    encoded_bytes = int(df[encoded].memory_usage(deep=True, index=False).sum())
+    object_bytes = sum(object_memory_usage(df[col]) for col in encoded)
+    encoding_savings[os.path.basename(filepath)] = {
+        "encoded_columns": len(encoded),
+        "object_bytes": object_bytes,
+        "encoded_bytes": encoded_bytes,
+        "saved_bytes": object_bytes - encoded_bytes,
     }
-    for col in df.columns:
-        col_info = {
+
+def _load_csv(filepath, **read_kwargs):
+    # Full and column-projected loads can be served from the columnar cache
+    # and are written back to it on a miss, projections (such as the parse
+    # that skips the manifest's all-null columns) as partial entries. Both
+    # are dictionary-encoded.
+    compact = set(read_kwargs) <= {"usecols"}
+    cacheable = columnar_cache is not None and columnar_cache.available and compact
+    if cacheable:
+        df = columnar_cache.get(filepath, columns=read_kwargs.get("usecols"))
+        if df is not None:
+            record_encoding_savings(filepath, df)
+            return df
+
+    def read(dialect_kwargs):
+        return pd.read_csv(filepath, low_memory=False, **dialect_kwargs, **read_kwargs)
+
+    if compact:
+        df = decode_bool_categories(read_with_dialect(filepath, lambda dialect_kwargs: read_compact(
+            filepath, read, dialect_kwargs, read_kwargs.get("usecols"))))
+        record_encoding_savings(filepath, df)
+    else:
+        df = read_with_dialect(filepath, read)
+    if cacheable:
+        columnar_cache.put(filepath, df, complete=not read_kwargs)
+    return df
+
+@traced("load_csv", rows=lambda df, *_, **__: len(df), detail=lambda filepath, *_, **__: os.path.basename(filepath))
+def load_csv(filepath, **read_kwargs):
+    return _load_csv(filepath, **read_kwargs)
+
+# Column names by file fingerprint, so each header is parsed once per
+# process however many stages probe it.
+_headers = {}
+
+def remember_header(filepath, columns):
+    _headers[file_fingerprint(filepath)] = list(columns)
+    return columns
+
+# Header probes are traced apart so load_csv counts only real loads.
+@traced("read_csv_header", detail=lambda filepath, *_, **__: os.path.basename(filepath))
+def read_csv_header(filepath):
+    fingerprint = file_fingerprint(filepath)
+    if fingerprint not in _headers:
+        _headers[fingerprint] = _load_csv(filepath, nrows=0).columns.tolist()
+    return list(_headers[fingerprint])
+
+# All-null columns per export, keyed by resolved path. Entries are refreshed
+# from each run's profiles; a file that changed since its entry has only the
+# entry's columns re-checked before they are skipped again.
+_schema_manifest = None
+_empty_columns = {}
+
+def load_schema_manifest(path=SCHEMA_MANIFEST_PATH):
+    global _schema_manifest
+    if _schema_manifest is None:
+        try:
+            with open(path, encoding="utf-8") as f:
+                _schema_manifest = json.load(f)
+        except (OSError, ValueError):
+            _schema_manifest = {}
+    return _schema_manifest
+
+def save_schema_manifest(manifest, path=SCHEMA_MANIFEST_PATH):
+    atomic_write_json(path, manifest)
+
+def scan_empty_columns(filepath, columns=None, chunksize=None):
+    # Streaming all-null check that stops once every column has shown a value.
+    columns = pd.Index(read_csv_header(filepath) if columns is None else columns)
+    if columns.empty:
+        return []
+
+    def scan(dialect_kwargs):
+        empty = columns
+        with pd.read_csv(filepath, chunksize=chunksize or DEFAULT_CHUNKSIZE, usecols=list(columns), dtype=str,
+                         **dialect_kwargs) as reader:
+            for chunk in reader:
+                empty = empty[chunk[empty].isna().all().to_numpy()]
+                if empty.empty:
+                    break
+        return empty.tolist()
+
+    return read_with_dialect(filepath, scan)
+
+def known_empty_columns(filepath):
+    fingerprint = file_fingerprint(filepath)
+    if fingerprint not in _empty_columns:
+        entry = load_schema_manifest().get(str(Path(filepath).resolve()))
+        if entry is None:
+            empty = []
+        elif entry["fingerprint"] == fingerprint:
+            empty = entry["empty_columns"]
+        else:
+            header = set(read_csv_header(filepath))
+            empty = scan_empty_columns(filepath, [col for col in entry["empty_columns"] if col in header])
+        _empty_columns[fingerprint] = empty
+    return _empty_columns[fingerprint]
+
+def prune_empty_columns(filepath, usecols=None):
+    # (header, columns to parse, skipped all-null columns). One column is
+    # always parsed so the row count still comes from the file; with nothing
+    # known to be empty the header is not read and usecols is returned as is.
+    empty = set(known_empty_columns(filepath))
+    if not empty:
+        return None, usecols, []
+    header = read_csv_header(filepath)
+    wanted = header if usecols is None else [col for col in header if col in set(usecols)]
+    parsed = [col for col in wanted if col not in empty] or wanted[:1]
+    return header, parsed, [col for col in wanted if col not in parsed]
+
+def add_empty_columns(columns, header, skipped, total_rows, cardinality_columns=()):
+    # Profiles of skipped columns as profile_columns gives an all-NaN column,
+    # put back in header order.
+    if not skipped:
+        return columns
+    profiles = {col_info["name"]: col_info for col_info in columns}
+    for col in skipped:
+        profiles[col] = {
             "name": col,
-            "dtype": str(df[col].dtype),
-            "null_count": int(df[col].isna().sum() + (df[col] == '').sum()),
-            "null_pct": round((df[col].isna().sum() + (df[col] == '').sum()) / len(df) * 100, 1) if len(df) > 0 else 0,
-            "sample_values": df[col].dropna().head(3).tolist()
+            "dtype": "float64" if total_rows else "object",
+            "null_count": total_rows,
+            "null_pct": np.float64(100.0) if total_rows else 0,
+            "sample_values": []
         }
-        analysis["columns"].append(col_info)
-    return analysis, df
+        if col in cardinality_columns:
+            profiles[col]["distinct_count"] = 0
+    return [profiles[col] for col in header if col in profiles]
 
-def build_field_coverage_matrix(csv_analyses):
-    required_fields = set()
-    for layer_info in FORTZA_LAYERS.values():
-        required_fields.update(layer_info["required_fields"])
-    
-    for field_key in CLIENT_EXPECTATIONS.keys():
-        required_fields.add(field_key)
-    
-    matrix = []
-    for field in sorted(required_fields):
-        row = {
-            "expected_field": field,
-            "layer_or_expectation": [],
-            "status": "Missing",
-            "source_file": None,
-            "source_column": None,
-            "null_pct": None,
-            "transform_needed": None,
-            "notes": ""
+def empty_columns_from(analysis):
+    rows = analysis["total_rows"]
+    return [c["name"] for c in analysis["columns"] if c["null_count"] == rows and (c["dtype"] == "float64" or not rows)]
+
+def update_schema_manifest(filepaths, csv_analyses):
+    # Targeted analyses only profile mapped columns. Their empty ones are
+    # recorded as a partial entry rather than scanning the whole file, and
+    # the next full run completes it.
+    manifest = load_schema_manifest()
+    for filepath in filepaths:
+        key = str(Path(filepath).resolve())
+        analysis = csv_analyses[os.path.basename(filepath)]
+        fingerprint = file_fingerprint(filepath)
+        partial = "unparsed_columns" in analysis
+        entry = manifest.get(key, {})
+        if partial and entry.get("fingerprint") == fingerprint and not entry.get("partial"):
+            continue
+        empty = empty_columns_from(analysis)
+        manifest[key] = {
+            "object": os.path.basename(filepath),
+            "fingerprint": fingerprint,
+            "rows": analysis["total_rows"],
+            "columns": analysis["total_columns"],
+            "empty_columns": empty,
+            "partial": partial
         }
-        
-        for layer_name, layer_info in FORTZA_LAYERS.items():
-            if field in layer_info["required_fields"]:
-                row["layer_or_expectation"].append(f"{layer_name} (Layer)")
-        
-        if field in CLIENT_EXPECTATIONS:
-            row["layer_or_expectation"].append(f"Client Expectation: {CLIENT_EXPECTATIONS[field]['description']}")
-        
-        if field in FIELD_MAPPINGS:
-            mapping = FIELD_MAPPINGS[field]
-            for csv_file, columns in mapping.items():
-                if columns and csv_file != "notes":
-                    if csv_file in csv_analyses:
-                        csv_cols = [c["name"] for c in csv_analyses[csv_file]["columns"]]
-                        for mapped_col in columns:
-                            clean_col = mapped_col.split(" (")[0] if " (" in mapped_col else mapped_col
-                            if clean_col in csv_cols:
-                                col_info = next((c for c in csv_analyses[csv_file]["columns"] if c["name"] == clean_col), None)
-                                if col_info:
-                                    row["source_file"] = csv_file
-                                    row["source_column"] = clean_col
-                                    row["null_pct"] = col_info["null_pct"]
-                                    if col_info["null_pct"] > 50:
-                                        row["status"] = "Present but low quality (high nulls)"
-                                    else:
-                                        row["status"] = "Present"
-                                    break
-                    if row["status"] != "Missing":
-                        break
-            if "notes" in mapping:
-                row["notes"] = mapping["notes"]
-        
-        if row["status"] == "Missing" and field in CLIENT_EXPECTATIONS:
-            row["notes"] = f"Suggested source: {CLIENT_EXPECTATIONS[field]['suggested_source']}"
-        
-        if field in ["cust_street", "cust_city", "cust_state", "zip_code"]:
-            if row["status"] == "Present":
-                row["transform_needed"] = "Normalize address format, handle multi-line addresses"
-        if field == "email":
-            row["transform_needed"] = "Normalize to lowercase"
-        if field == "customer_name":
-            row["transform_needed"] = "Derive from FirstName + LastName or related Contact"
-        if field == "salesperson_name":
-            row["transform_needed"] = "Join with User object using OwnerId"
-        
-        row["layer_or_expectation"] = "; ".join(row["layer_or_expectation"])
-        matrix.append(row)
-    
-    return matrix
+        _empty_columns[fingerprint] = empty
+    save_schema_manifest(manifest)
+    return manifest
 
-def generate_mapping_json(matrix, csv_analyses):
-    mappings = []
-    for row in matrix:
-        mapping = {
-            "expected_field": row["expected_field"],
-            "fortza_layer_or_expectation": row["layer_or_expectation"],
-            "source_file": row["source_file"],
-            "source_column": row["source_column"],
-            "status": row["status"],
-            "null_percentage": row["null_pct"],
-            "transform_needed": row["transform_needed"],
-            "notes": row["notes"]
+def generate_empty_columns_report(filepaths, manifest):
+    lines = []
+    for filepath in filepaths:
+        entry = manifest[str(Path(filepath).resolve())]
+        lines.append(f"{Path(filepath).stem.lower()}.csv")
+        if entry["empty_columns"]:
+            lines.extend(f"  - {col}" for col in entry["empty_columns"])
+        else:
+            lines.append("  (no empty mapped columns)" if entry.get("partial") else "  (no empty columns)")
+        if entry.get("partial"):
+            lines.append("  (only mapped columns checked; run without --targeted for the rest)")
+        lines.append("")
+    return "".join(f"{line}\n" for line in lines)
+
+def clean_column_name(mapped_col):
+    return mapped_col.split(" (")[0] if " (" in mapped_col else mapped_col
+
+def mapped_source_columns(csv_file):
+    columns = set()
+    for field in coverage_required_fields():
+        mapped = FIELD_MAPPINGS.get(field, {}).get(csv_file)
+        if mapped:
+            columns.update(clean_column_name(col) for col in mapped)
+    return columns
+
+SAMPLE_SIZE = 3
+SAMPLE_WINDOW = 64
+
+def _sample_values(df, notna, sample_size=SAMPLE_SIZE):
+    # Samples almost always sit in the first few rows, so only widen the
+    # scanned head window for the columns that are still short of values.
+    n_rows = len(df)
+    samples = [[] for _ in df.columns]
+    pending = np.arange(len(df.columns))
+    window = SAMPLE_WINDOW
+    while pending.size:
+        found = notna[:window, pending].sum(axis=0)
+        done = (found >= sample_size) | (window >= n_rows)
+        for j in pending[done]:
+            head = df.iloc[:window, j]
+            samples[j] = head[notna[:window, j]].head(sample_size).tolist()
+        pending = pending[~done]
+        window *= 8
+    return samples
+
+def profile_columns(df, cardinality_columns=()):
+    n_rows = len(df)
+    isna = df.isna().to_numpy()
+    missing = isna.sum(axis=0)
+    dtypes = df.dtypes
+    object_idx = np.flatnonzero((dtypes == object).to_numpy())
+    if object_idx.size:
+        missing[object_idx] += (df.iloc[:, object_idx].to_numpy() == '').sum(axis=0)
+    # Categorical columns are checked for '' through their codes.
+    for j in np.flatnonzero([isinstance(dtype, pd.CategoricalDtype) for dtype in dtypes]):
+        empty = df.iloc[:, j].cat.categories.get_indexer([''])[0]
+        if empty >= 0:
+            missing[j] += int((df.iloc[:, j].cat.codes.to_numpy() == empty).sum())
+    null_pcts = np.round(missing / n_rows * 100, 1) if n_rows > 0 else None
+    samples = _sample_values(df, ~isna)
+    columns = []
+    for j, col in enumerate(df.columns):
+        col_info = {
+            "name": col,
+            "dtype": logical_dtype(df.iloc[:, j]),
+            "null_count": int(missing[j]),
+            "null_pct": null_pcts[j] if n_rows > 0 else 0,
+            "sample_values": samples[j]
         }
-        mappings.append(mapping)
-    return mappings
+        if col in cardinality_columns:
+            col_info["distinct_count"] = int(df.iloc[:, j].nunique())
+        columns.append(col_info)
+    return columns
 
-def generate_report(matrix, csv_analyses, mappings):
-    present_count = len([r for r in matrix if "Present" in r["status"]])
-    missing_count = len([r for r in matrix if r["status"] == "Missing"])
-    low_quality_count = len([r for r in matrix if "low quality" in r["status"]])
-    
-    bucket1_blocking = []
-    bucket2_fields = []
-    bucket3_fields = []
-    
-    for row in matrix:
-        if row["status"] == "Missing":
-            field = row["expected_field"]
-            for layer_name, layer_info in FORTZA_LAYERS.items():
-                if field in layer_info["required_fields"] and layer_info["bucket"] == 1:
-                    bucket1_blocking.append({"field": field, "layer": layer_name})
-                    break
-            if field in CLIENT_EXPECTATIONS:
-                bucket = CLIENT_EXPECTATIONS[field]["bucket"]
-                if bucket == 2:
-                    bucket2_fields.append(field)
-                elif bucket == 3:
-                    bucket3_fields.append(field)
-    
-    report = f"""# Fortza Data Readiness Assessment Report
+def cardinality_columns_for(filepath, cardinality):
+    return mapped_source_columns(os.path.basename(filepath)) if cardinality else set()
 
-**Generated:** 2025-12-24  
-**Data Source:** Perfect Vision Salesforce Export (Dummy Data)
+@traced("analyze_csv", rows=lambda result, *_, **__: result[0]["total_rows"], detail=lambda filepath, *_, **__: os.path.basename(filepath))
+def analyze_csv(filepath, cardinality=False):
+    # Columns the schema manifest knows to be all-null are not parsed, so the
+    # returned frame lacks them; the analysis still profiles every column.
+    header, usecols, skipped = prune_empty_columns(filepath)
+    df = load_csv(filepath) if usecols is None else load_csv(filepath, usecols=usecols)
+    cardinality_columns = cardinality_columns_for(filepath, cardinality)
+    analysis = {
+        "filename": os.path.basename(filepath),
+        "total_rows": len(df),
+        "total_columns": len(df.columns) + len(skipped),
+        "columns": add_empty_columns(profile_columns(df, cardinality_columns), header, skipped, len(df),
+                                     cardinality_columns),
+        "dialect": detect_dialect(filepath)
+    }
+    return analysis, df
 
----
+DEFAULT_CHUNKSIZE = 100_000
 
-## Executive Summary
+def new_stream_profile(filename):
+    return {"filename": filename, "total_rows": 0, "columns": None}
 
-"""
-    
-    can_deliver_bucket1 = len(bucket1_blocking) == 0
-    
-    if can_deliver_bucket1:
-        report += """**✅ Bucket 1 is DELIVERABLE** with current data structure.
+def _merge_column_stats(stats, col_info, chunk_rows):
+    all_null = col_info["dtype"] == "float64" and col_info["null_count"] == chunk_rows
+    stats["null_count"] += col_info["null_count"]
+    stats["has_nulls"] = stats["has_nulls"] or col_info["null_count"] > 0
+    if not all_null:
+        stats["dtypes"].add(col_info["dtype"])
+    missing_samples = SAMPLE_SIZE - len(stats["sample_values"])
+    for value in col_info["sample_values"][:missing_samples]:
+        stats["sample_values"].append((value, col_info["dtype"]))
 
-All required fields for Fortza's core fraud detection layers are present in the provided CSVs. However, some transformations and data quality improvements are needed.
+DISTINCT_CAP = 1_000_000
 
-"""
-    else:
-        report += f"""**⚠️ Bucket 1 is PARTIALLY BLOCKED**
+def _distinct_hashes(series):
+    # Values are hashed by their text so that 31349 from a numeric chunk and
+    # "31349" from a chunk typed object count once, as in a single full read.
+    values = series.dropna().to_numpy()
+    if values.dtype.kind == "f" and np.all(np.mod(values, 1) == 0):
+        values = values.astype(np.int64)
+    if values.dtype.kind != "O":
+        values = values.astype(str).astype(object)
+    return np.unique(pd.util.hash_array(values))
 
-The following critical fields are missing for Bucket 1 delivery:
+def _union_distinct(first, second):
+    # Past DISTINCT_CAP values the count is a lower bound; it only breaks
+    # ties between candidate sources, so exactness there is not needed.
+    if first is None or second is None:
+        return first if second is None else second
+    return np.union1d(first, second)[:DISTINCT_CAP]
 
-| Missing Field | Blocking Layer |
-|--------------|----------------|
-"""
-        for item in bucket1_blocking[:10]:
-            report += f"| `{item['field']}` | {item['layer']} |\n"
-        report += "\n"
-    
-    report += f"""### Field Coverage Summary
+def update_stream_profile(profile, chunk, cardinality_columns=()):
+    if profile["columns"] is None:
+        profile["columns"] = [
+            {"name": col, "dtypes": set(), "has_nulls": False, "null_count": 0, "sample_values": [],
+             "distinct_hashes": np.empty(0, dtype=np.uint64) if col in cardinality_columns else None}
+            for col in chunk.columns
+        ]
+    for j, (stats, col_info) in enumerate(zip(profile["columns"], profile_columns(chunk))):
+        if col_info["dtype"] == "object" and _is_flag_chunk(chunk.iloc[:, j]):
+            # A flag chunk with gaps is still a flag chunk.
+            col_info["dtype"] = "bool"
+        _merge_column_stats(stats, col_info, len(chunk))
+        if stats["distinct_hashes"] is not None:
+            stats["distinct_hashes"] = _union_distinct(stats["distinct_hashes"], _distinct_hashes(chunk.iloc[:, j]))
+    profile["total_rows"] += len(chunk)
+    return profile
 
-| Metric | Count |
-|--------|-------|
-| **Present** | {present_count} |
-| **Missing** | {missing_count} |
-| **Low Quality (>50% nulls)** | {low_quality_count} |
-| **Total Required Fields** | {len(matrix)} |
+def merge_stream_profiles(first, second):
+    # `second` must cover the rows that follow `first` in the file so that
+    # the first-N samples stay in file order.
+    if first["columns"] is None:
+        return second
+    if second["columns"] is None:
+        return first
+    for stats, other in zip(first["columns"], second["columns"]):
+        stats["null_count"] += other["null_count"]
+        stats["has_nulls"] = stats["has_nulls"] or other["has_nulls"]
+        stats["dtypes"] |= other["dtypes"]
+        stats["sample_values"].extend(other["sample_values"][:SAMPLE_SIZE - len(stats["sample_values"])])
+        stats["distinct_hashes"] = _union_distinct(stats["distinct_hashes"], other["distinct_hashes"])
+    first["total_rows"] += second["total_rows"]
+    return first
 
----
+def _resolve_stream_dtype(dtypes, has_nulls):
+    # Mirrors how a single low_memory=False read would type the whole column.
+    if not dtypes:
+        return "float64"
+    if "object" in dtypes or ("bool" in dtypes and dtypes != {"bool"}):
+        return "object"
+    if dtypes == {"bool"}:
+        return "object" if has_nulls else "bool"
+    if dtypes == {"int64"} and not has_nulls:
+        return "int64"
+    if dtypes <= {"int64", "float64"}:
+        return "float64"
+    return "object"
 
-## CSV Data Overview
+def text_samples(filepath, columns, read_kwargs, sample_size=SAMPLE_SIZE, chunksize=DEFAULT_CHUNKSIZE):
+    # The first non-null values of `columns` as the file spells them, which
+    # is what a single full read gives a column that mixes flags or numbers
+    # with text. Reading stops once every column has its samples.
+    samples = {col: [] for col in columns}
+    with pd.read_csv(filepath, usecols=columns, dtype=str, chunksize=chunksize, **read_kwargs) as reader:
+        for chunk in reader:
+            for col in columns:
+                samples[col] += chunk[col].dropna().head(sample_size - len(samples[col])).tolist()
+            if all(len(values) >= sample_size for values in samples.values()):
+                break
+    return samples
 
-"""
-    
-    for filename, analysis in csv_analyses.items():
-        report += f"""### {filename}
-- **Rows:** {analysis['total_rows']}
-- **Columns:** {analysis['total_columns']}
+def finalize_stream_profile(profile, text_samples=None):
+    # `text_samples(columns)` re-reads the file's own text for textual
+    # columns whose samples came from chunks parsed as flags or numbers,
+    # where the parsed value no longer shows how the file wrote it.
+    total_rows = profile["total_rows"]
+    resolved = [_resolve_stream_dtype(stats["dtypes"], stats["has_nulls"]) for stats in profile["columns"] or []]
+    retext = [
+        stats["name"] for stats, dtype in zip(profile["columns"] or [], resolved)
+        if dtype == "object" and stats["dtypes"] - {"bool"}
+        and any(not isinstance(value, str) for value, _ in stats["sample_values"])
+    ]
+    texts = text_samples(retext) if retext and text_samples is not None else {}
+    columns = []
+    for stats, dtype in zip(profile["columns"] or [], resolved):
+        col_info = {
+            "name": stats["name"],
+            "dtype": dtype,
+            "null_count": int(stats["null_count"]),
+            "null_pct": np.round(stats["null_count"] / total_rows * 100, 1) if total_rows > 0 else 0,
+            "sample_values": texts[stats["name"]] if stats["name"] in texts else [
+                float(value) if dtype == "float64" else value for value, _ in stats["sample_values"]
+            ]
+        }
+        if stats["distinct_hashes"] is not None:
+            col_info["distinct_count"] = len(stats["distinct_hashes"])
+        columns.append(col_info)
+    return {
+        "filename": profile["filename"],
+        "total_rows": total_rows,
+        "total_columns": len(columns),
+        "columns": columns
+    }
 
-"""
-    
-    report += """---
+def _profile_chunks(filepath, chunksize, cardinality_columns=(), **read_kwargs):
+    profile = new_stream_profile(os.path.basename(filepath))
+    with pd.read_csv(filepath, chunksize=chunksize, low_memory=False, **read_kwargs) as reader:
+        for chunk in reader:
+            update_stream_profile(profile, decode_bool_categories(chunk), cardinality_columns)
+    if profile["columns"] is None:
+        update_stream_profile(profile, pd.read_csv(filepath, nrows=0, **read_kwargs), cardinality_columns)
+    return profile
 
-## Critical Missing Fields for Bucket 1
+@traced("analyze_csv", rows=lambda analysis, *_, **__: analysis["total_rows"], detail=lambda filepath, *_, **__: os.path.basename(filepath))
+def analyze_csv_streaming(filepath, chunksize=DEFAULT_CHUNKSIZE, usecols=None, cardinality=False):
+    cardinality_columns = cardinality_columns_for(filepath, cardinality)
+    header, usecols, skipped = prune_empty_columns(filepath, usecols)
+    profile = read_with_dialect(filepath, lambda dialect_kwargs: read_compact(
+        filepath, lambda kwargs: _profile_chunks(filepath, chunksize, cardinality_columns, usecols=usecols, **kwargs),
+        dialect_kwargs, usecols))
+    analysis = finalize_stream_profile(profile, lambda columns: text_samples(
+        filepath, columns, dialect_read_kwargs(detect_dialect(filepath)), chunksize=chunksize))
+    analysis["columns"] = add_empty_columns(analysis["columns"], header, skipped, analysis["total_rows"],
+                                            cardinality_columns)
+    analysis["total_columns"] = len(analysis["columns"])
+    analysis["dialect"] = detect_dialect(filepath)
+    return analysis
 
-"""
-    
-    if bucket1_blocking:
-        report += "| Field | Affected Layer | Suggested Source |\n|-------|---------------|------------------|\n"
-        seen = set()
-        for item in bucket1_blocking:
-            if item['field'] not in seen:
-                seen.add(item['field'])
-                suggested = CLIENT_EXPECTATIONS.get(item['field'], {}).get('suggested_source', 'N/A')
-                report += f"| `{item['field']}` | {item['layer']} | {suggested} |\n"
+def _targeted_columns(filepath):
+    header = read_csv_header(filepath)
+    wanted = mapped_source_columns(os.path.basename(filepath))
+    parsed = [col for col in header if col in wanted]
+    return header, wanted, parsed or header[:1]
+
+def _finish_targeted(analysis, header, wanted):
+    analysis["total_columns"] = len(header)
+    analysis["columns"] = [c for c in analysis["columns"] if c["name"] in wanted]
+    analysis["unparsed_columns"] = [col for col in header if col not in wanted]
+    return analysis
+
+@traced("analyze_csv", rows=lambda analysis, *_, **__: analysis["total_rows"], detail=lambda filepath, *_, **__: os.path.basename(filepath))
+def analyze_csv_targeted(filepath, chunksize=None, cardinality=False):
+    # Only the columns FIELD_MAPPINGS can resolve are parsed; everything else
+    # is known from the header alone.
+    header, wanted, usecols = _targeted_columns(filepath)
+    if chunksize:
+        analysis = analyze_csv_streaming(filepath, chunksize=chunksize, usecols=usecols, cardinality=cardinality)
     else:
-        report += "No critical missing fields for Bucket 1.\n"
-    
-    report += """
+        _, usecols, skipped = prune_empty_columns(filepath, usecols)
+        df = load_csv(filepath, usecols=usecols)
+        cardinality_columns = cardinality_columns_for(filepath, cardinality)
+        analysis = {
+            "filename": os.path.basename(filepath),
+            "total_rows": len(df),
+            "total_columns": len(header),
+            "columns": add_empty_columns(profile_columns(df, cardinality_columns), header, skipped, len(df),
+                                         cardinality_columns),
+            "dialect": detect_dialect(filepath)
+        }
+    return _finish_targeted(analysis, header, wanted)
 
----
+PARALLEL_CHUNK_BYTES = 256 * 2**20
+SCAN_BLOCK_BYTES = 8 * 2**20
 
-## Recommendations: Fields to Request from Client
+def record_boundaries(filepath, chunk_bytes=PARALLEL_CHUNK_BYTES, quotechar='"'):
+    # Byte offsets just past a newline that is outside any quoted field,
+    # roughly chunk_bytes apart. The first one is the end of the header.
+    # Doubled quotes inside a field leave the parity unchanged, so counting
+    # quote bytes is enough to tell multi-line addresses from row breaks.
+    quote = quotechar.encode("ascii")
+    boundaries = []
+    next_target = 0
+    offset = 0
+    quotes = 0
+    with open(filepath, "rb") as f:
+        while True:
+            block = f.read(SCAN_BLOCK_BYTES)
+            if not block:
+                break
+            pos = min(max(next_target - offset, 0), len(block))
+            quotes += block.count(quote, 0, pos)
+            while True:
+                newline = block.find(b"\n", pos)
+                if newline < 0:
+                    quotes += block.count(quote, pos)
+                    break
+                quotes += block.count(quote, pos, newline)
+                pos = newline + 1
+                if quotes % 2:
+                    continue
+                boundaries.append(offset + pos)
+                next_target = offset + pos + chunk_bytes
+                skip_to = min(next_target - offset, len(block))
+                quotes += block.count(quote, pos, skip_to)
+                pos = skip_to
+            offset += len(block)
+    return boundaries
 
-### Bucket 1 - Required for Core Fraud Detection
+def plan_csv_ranges(filepath, chunk_bytes=PARALLEL_CHUNK_BYTES, quotechar='"'):
+    size = os.path.getsize(filepath)
+    boundaries = record_boundaries(filepath, chunk_bytes, quotechar)
+    if not boundaries:
+        return size, []
+    starts = boundaries
+    ends = boundaries[1:] + [size]
+    return boundaries[0], [(start, end) for start, end in zip(starts, ends) if start < end]
 
-"""
-    
-    ip_missing = any(r["expected_field"] == "ip" and r["status"] == "Missing" for r in matrix)
-    if ip_missing:
-        report += """- **IP Address (`ip`)**: Request from Order or custom session tracking object. Critical for IP Address Layer (VPN/proxy detection).
-"""
-    
-    report += """
-> **Note:** Most Bucket 1 fields are present but require transformations (see below).
+def _profile_byte_range(filepath, header_end, start, end, wanted, cardinality_columns, chunksize, read_kwargs):
+    with open(filepath, "rb") as f:
+        header_bytes = f.read(header_end)
+        f.seek(start)
+        body = f.read(end - start)
+    names = pd.read_csv(io.BytesIO(header_bytes), nrows=0, **read_kwargs).columns.tolist()
+    usecols = None
+    if wanted is not None:
+        usecols = [col for col in names if col in wanted] or names[:1]
+    profile = new_stream_profile(os.path.basename(filepath))
+    if start >= end:
+        header_frame = pd.read_csv(io.BytesIO(header_bytes), nrows=0, usecols=usecols, **read_kwargs)
+        return update_stream_profile(profile, header_frame, cardinality_columns)
+    with pd.read_csv(io.BytesIO(body), header=None, names=names, usecols=usecols, chunksize=chunksize,
+                     low_memory=False, **read_kwargs) as reader:
+        for chunk in reader:
+            update_stream_profile(profile, chunk, cardinality_columns)
+    return profile
 
-### Bucket 2 - Low-Hanging Fruit (Quick Wins)
+def _submit_ranges(pool, filepath, plan, wanted, cardinality_columns, chunksize, read_kwargs):
+    header_end, ranges = plan
+    if not ranges:
+        ranges = [(header_end, header_end)]
+    return [
+        pool.submit(_profile_byte_range, str(filepath), header_end, start, end, wanted, cardinality_columns,
+                    chunksize, read_kwargs)
+        for start, end in ranges
+    ]
 
-"""
-    
-    for field in bucket2_fields:
-        desc = CLIENT_EXPECTATIONS.get(field, {}).get('description', '')
-        source = CLIENT_EXPECTATIONS.get(field, {}).get('suggested_source', 'TBD')
-        report += f"- **`{field}`**: {desc}. Suggested source: {source}\n"
-    
-    if not bucket2_fields:
-        report += "All Bucket 2 fields are present or can be derived.\n"
-    
-    report += """
-### Bucket 3 - Long-Term / External Data Needs
+def _gather_profile(futures):
+    profile = None
+    for future in futures:
+        partial = future.result()
+        profile = partial if profile is None else merge_stream_profiles(profile, partial)
+    return profile
 
-"""
-    
-    for field in bucket3_fields:
-        desc = CLIENT_EXPECTATIONS.get(field, {}).get('description', '')
-        source = CLIENT_EXPECTATIONS.get(field, {}).get('suggested_source', 'TBD')
-        report += f"- **`{field}`**: {desc}. Source: {source}\n"
-    
-    if not bucket3_fields:
-        report += "All Bucket 3 fields need custom implementation.\n"
-    
-    report += """
+@traced("analyze_csv", rows=lambda analyses, *_, **__: sum(a["total_rows"] for a in analyses.values()),
+        detail=lambda filepaths, *_, **__: ",".join(os.path.basename(fp) for fp in filepaths))
+def analyze_csv_files_parallel(filepaths, workers=None, targeted=False, chunksize=DEFAULT_CHUNKSIZE,
+                               chunk_bytes=PARALLEL_CHUNK_BYTES, cardinality=False):
+    # Workers send back stream profiles (per-column counts, dtype sets and a
+    # few samples), never DataFrames. Results are merged in range order and
+    # returned in the order of `filepaths`.
+    dialects = {filepath: detect_dialect(filepath) for filepath in filepaths}
+    plans = {
+        filepath: plan_csv_ranges(filepath, chunk_bytes, dialects[filepath]["quotechar"])
+        for filepath in filepaths
+    }
+    headers = {filepath: _targeted_columns(filepath) if targeted else None for filepath in filepaths}
+    csv_analyses = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        def submit(filepath, dialect):
+            wanted = headers[filepath][1] if targeted else None
+            return _submit_ranges(pool, filepath, plans[filepath], wanted, cardinality_columns_for(filepath, cardinality),
+                                  chunksize, dialect_read_kwargs(dialect))
 
----
+        pending = {filepath: submit(filepath, dialects[filepath]) for filepath in filepaths}
+        for filepath in filepaths:
+            try:
+                profile = _gather_profile(pending[filepath])
+            except UnicodeDecodeError:
+                dialects[filepath] = remember_dialect(filepath, dict(dialects[filepath], encoding="latin-1"))
+                profile = _gather_profile(submit(filepath, dialects[filepath]))
+            analysis = finalize_stream_profile(profile, lambda columns: text_samples(
+                filepath, columns, dialect_read_kwargs(dialects[filepath]), chunksize=chunksize))
+            analysis["dialect"] = dialects[filepath]
+            if targeted:
+                header, wanted, _ = headers[filepath]
+                analysis = _finish_targeted(analysis, header, wanted)
+            csv_analyses[os.path.basename(filepath)] = analysis
+    return csv_analyses
 
-## Transformations Required
+def coverage_required_fields():
+    required_fields = set()
+    for layer_info in FORTZA_LAYERS.values():
+        required_fields.update(layer_info["required_fields"])
+    
+    for field_key in CLIENT_EXPECTATIONS.keys():
+        required_fields.add(field_key)
+    return required_fields
 
-| Field | Transformation |
-|-------|---------------|
-| `customer_name` | Derive from FirstName + LastName or join with Contact |
-| `email` | Normalize to lowercase |
-| `cust_street/city/state/zip` | Parse multi-line addresses; normalize abbreviations (Ave → Avenue) |
-| `salesperson_name` | Join with User object using OwnerId |
-| `dealer_name` | Join with Account object using POE_Dealer__c reference |
-| `order_date` | Standardize date format from multiple source fields |
-| `install_to_activation_days` | Derive: `ActivatedDate - POE_InstallationDate__c` |
+def compile_field_rules():
+    # Everything about a field that depends only on FORTZA_LAYERS,
+    # CLIENT_EXPECTATIONS and FIELD_MAPPINGS: its layer labels, its ordered
+    # (file, column) candidates and its notes.
+    layer_labels = {}
+    for layer_name, layer_info in FORTZA_LAYERS.items():
+        for field in dict.fromkeys(layer_info["required_fields"]):
+            layer_labels.setdefault(field, []).append(f"{layer_name} (Layer)")
+    rules = {}
+    for field in coverage_required_fields() | set(FIELD_MAPPINGS):
+        labels = list(layer_labels.get(field, []))
+        if field in CLIENT_EXPECTATIONS:
+            labels.append(f"Client Expectation: {CLIENT_EXPECTATIONS[field]['description']}")
+        mapping = FIELD_MAPPINGS.get(field, {})
+        candidates = [
+            (csv_file, clean_column_name(mapped_col))
+            for csv_file, columns in mapping.items() if columns and csv_file != "notes"
+            for mapped_col in columns
+        ]
+        rules[field] = {"labels": "; ".join(labels), "candidates": candidates, "notes": mapping.get("notes")}
+    return rules
 
----
+def build_resolution_index(csv_analyses, rules=None):
+    columns = {}
+    for csv_file, analysis in csv_analyses.items():
+        by_name = columns[csv_file] = {}
+        for col_info in analysis["columns"]:
+            by_name.setdefault(col_info["name"], col_info)
+    return {"rules": rules or compile_field_rules(), "columns": columns}
 
-## Data Quality Observations
+def rank_field_candidates(index):
+    # Every candidate of every field that exists in the exports goes into one
+    # frame and is ordered in a single sort: lowest null_pct first, then
+    # highest cardinality, then FIELD_MAPPINGS order.
+    records = []
+    for field, rule in index["rules"].items():
+        for order, (csv_file, column) in enumerate(rule["candidates"]):
+            col_info = index["columns"].get(csv_file, {}).get(column)
+            if col_info is not None:
+                records.append((field, order, csv_file, column, col_info["null_pct"], col_info.get("distinct_count")))
+    frame = pd.DataFrame(records, columns=["field", "order", "source_file", "source_column", "null_pct", "distinct_count"])
+    frame["cardinality_key"] = frame["distinct_count"].fillna(-1)
+    frame = frame.sort_values(["field", "null_pct", "cardinality_key", "order"],
+                              ascending=[True, True, False, True], kind="mergesort")
+    ranked = {}
+    for field, source_file, column, null_pct, distinct_count in zip(
+            frame["field"], frame["source_file"], frame["source_column"], frame["null_pct"], frame["distinct_count"]):
+        ranked.setdefault(field, []).append({
+            "source_file": source_file,
+            "source_column": column,
+            "null_pct": null_pct,
+            "distinct_count": None if pd.isna(distinct_count) else int(distinct_count)
+        })
+    return ranked
 
-### High-Null Fields (>50%)
-"""
-    
-    high_null_fields = [r for r in matrix if r["null_pct"] and r["null_pct"] > 50]
-    if high_null_fields:
-        report += "| Field | Null % | Source |\n|-------|--------|--------|\n"
-        for r in high_null_fields[:10]:
-            report += f"| `{r['expected_field']}` | {r['null_pct']}% | {r['source_file']} |\n"
+def build_coverage_row(field, csv_analyses, index=None, ranked=None):
+    if index is None:
+        index = build_resolution_index(csv_analyses)
+    rule = index["rules"][field]
+    row = {
+        "expected_field": field,
+        "layer_or_expectation": rule["labels"],
+        "status": "Missing",
+        "source_file": None,
+        "source_column": None,
+        "null_pct": None,
+        "transform_needed": None,
+        "notes": ""
+    }
+
+    best = None
+    if ranked is not None:
+        alternatives = ranked.get(field, [])
+        best = alternatives[0] if alternatives else None
     else:
-        report += "No critical high-null fields detected in the sample data.\n"
-    
-    report += """
+        for csv_file, column in rule["candidates"]:
+            col_info = index["columns"].get(csv_file, {}).get(column)
+            if col_info is not None:
+                best = {"source_file": csv_file, "source_column": column, "null_pct": col_info["null_pct"]}
+                break
+    if best is not None:
+        row["source_file"] = best["source_file"]
+        row["source_column"] = best["source_column"]
+        row["null_pct"] = best["null_pct"]
+        if best["null_pct"] > 50:
+            row["status"] = "Present but low quality (high nulls)"
+        else:
+            row["status"] = "Present"
+    if rule["notes"] is not None:
+        row["notes"] = rule["notes"]
 
----
+    if row["status"] == "Missing" and field in CLIENT_EXPECTATIONS:
+        row["notes"] = f"Suggested source: {CLIENT_EXPECTATIONS[field]['suggested_source']}"
 
-## Agent/Dealer/Program Field Mappings
+    if field in ["cust_street", "cust_city", "cust_state", "zip_code"]:
+        if row["status"] == "Present":
+            row["transform_needed"] = "Normalize address format, handle multi-line addresses"
+    if field == "email":
+        row["transform_needed"] = "Normalize to lowercase"
+    if field == "customer_name":
+        row["transform_needed"] = "Derive from FirstName + LastName or related Contact"
+    if field == "salesperson_name":
+        row["transform_needed"] = "Join with User object using OwnerId"
 
-### Agent (Salesperson) Fields
-- `OwnerId` → Requires User object join for name
-- `SalesRep__c` (Order) → Direct agent reference
-- `Lead_Owner__c`, `Owner__c` (Lead) → Agent assignment
+    if ranked is not None:
+        row["alternatives"] = ranked.get(field, [])
+    return row
 
-### Dealer Fields
-- `POE_Dealer__c` (Order, Opportunity) → Dealer account ID
-- `Account.POE_Dealer_Code__c` → Dealer code
-- `Account.Name` (filtered by Type) → Dealer name
+@traced("build_field_coverage_matrix", rows=lambda matrix, *_, **__: len(matrix))
+def build_field_coverage_matrix(csv_analyses, rank=False, rules=None):
+    index = build_resolution_index(csv_analyses, rules)
+    ranked = rank_field_candidates(index) if rank else None
+    return [build_coverage_row(field, csv_analyses, index, ranked) for field in sorted(coverage_required_fields())]
 
-### Program/Channel Fields
-- `POE_Program__c` (Order) → Program name (Frontier, EarthLink, Charter/Spectrum)
-- `Division__c` (Lead, Account) → Sales division (DOM, etc.)
-- `Call_Center_Type__c` (Order) → Channel type
-- `POE_RepTitle__c` (Order) → Rep title/role
+def fields_affected_by(changed):
+    # `changed` maps a csv file to the set of columns that changed in it, or
+    # to None when the whole file appeared, disappeared or was re-profiled.
+    affected = set()
+    for field, rule in compile_field_rules().items():
+        for csv_file, column in rule["candidates"]:
+            if csv_file in changed and (changed[csv_file] is None or column in changed[csv_file]):
+                affected.add(field)
+                break
+    return affected
 
-> **⚠️ Ambiguity:** Confirm with client whether Account records represent dealers or customers. In this data, Account appears to be customer-centric with dealer references in POE fields.
+@traced("build_field_coverage_matrix", rows=lambda matrix, *_, **__: len(matrix), detail=lambda *_, **__: "incremental")
+def update_field_coverage_matrix(previous_matrix, csv_analyses, changed, rank=False):
+    previous_rows = {row["expected_field"]: row for row in previous_matrix}
+    affected = fields_affected_by(changed)
+    index = build_resolution_index(csv_analyses)
+    ranked = rank_field_candidates(index) if rank else None
+    matrix = []
+    for field in sorted(coverage_required_fields()):
+        if field in affected or field not in previous_rows:
+            matrix.append(build_coverage_row(field, csv_analyses, index, ranked))
+        else:
+            matrix.append(previous_rows[field])
+    return matrix
 
----
+def column_hashes(df):
+    # Order-sensitive 64-bit digest per column; the row count and dtype are
+    # part of the key so appended rows or a re-typed column always differ.
+    weights = np.arange(1, len(df) + 1, dtype=np.uint64)
+    hashes = {}
+    for j, col in enumerate(df.columns):
+        hashed = pd.util.hash_array(df.iloc[:, j].to_numpy())
+        hashes[col] = f"{logical_dtype(df.iloc[:, j])}:{len(df)}:{int((hashed * weights).sum()):016x}"
+    return hashes
 
-## Risks & Assumptions
+def load_incremental_state(path=INCREMENTAL_STATE_PATH):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"files": {}}
 
-1. **Dummy Data Limitations**: This is sample data; production data may have different field population rates.
-2. **IP Address Gap**: IP address field is sparsely populated in Lead (`Fortza__IP_Address__c`). Client should confirm if IPs are captured during order submission.
-3. **User Object Missing**: Salesperson names require User object export (not provided).
-4. **Historical Depth Unknown**: Cannot assess seasonality or pattern detection with only ~5-6 records per file.
-5. **Label Data Missing**: No `is_fraud` or `is_suspicious` labels present for model training (Bucket 3 requirement).
+def save_incremental_state(state, path=INCREMENTAL_STATE_PATH):
+    atomic_write_json(path, state, indent=None, default=str)
 
----
+def analyze_incremental(filepaths, state, cardinality=False):
+    # Unchanged files (same fingerprint, or same content after a touch) reuse
+    # their stored analysis without being read. Changed files are loaded
+    # once and only the columns whose content hash moved are re-profiled.
+    previous = state.get("files", {}) if state.get("cardinality", False) == cardinality else {}
+    state["cardinality"] = cardinality
+    files_state = {}
+    csv_analyses = {}
+    changed = {}
+    for filepath in filepaths:
+        csv_file = os.path.basename(filepath)
+        entry = previous.get(csv_file)
+        fingerprint = file_fingerprint(filepath)
+        digest = None
+        if entry and entry["fingerprint"] != fingerprint:
+            digest = content_hash(filepath)
+            if entry["content_hash"] == digest:
+                entry = dict(entry, fingerprint=fingerprint)
+        if entry and entry["fingerprint"] == fingerprint:
+            files_state[csv_file] = entry
+            csv_analyses[csv_file] = entry["analysis"]
+            continue
 
-## Conclusion
+        df = load_csv(filepath)
+        hashes = column_hashes(df)
+        if entry:
+            old_hashes = entry["column_hashes"]
+            stale = [col for col in df.columns if old_hashes.get(col) != hashes[col]]
+            old_columns = {c["name"]: c for c in entry["analysis"]["columns"]}
+            fresh = {c["name"]: c for c in profile_columns(df[stale], cardinality_columns_for(filepath, cardinality))}
+            columns = [fresh.get(col) or old_columns[col] for col in df.columns]
+            changed[csv_file] = set(stale) | (set(old_hashes) - set(hashes))
+        else:
+            columns = profile_columns(df, cardinality_columns_for(filepath, cardinality))
+            changed[csv_file] = None
+        analysis = {
+            "filename": csv_file,
+            "total_rows": len(df),
+            "total_columns": len(df.columns),
+            "columns": columns,
+            "dialect": detect_dialect(filepath)
+        }
+        del df
+        files_state[csv_file] = {
+            "fingerprint": fingerprint,
+            "content_hash": digest or content_hash(filepath),
+            "column_hashes": hashes,
+            "analysis": analysis
+        }
+        csv_analyses[csv_file] = analysis
+    for csv_file in set(previous) - set(files_state):
+        changed[csv_file] = None
+    state["files"] = files_state
+    return csv_analyses, {csv_file: cols for csv_file, cols in changed.items() if cols is None or cols}
 
-**Bucket 1 Readiness: 85%** - Core fields present, transformations needed.
+def generate_mapping_json(matrix, csv_analyses):
+    # Yields one mapping per matrix row so writers can stream them.
+    for row in matrix:
+        mapping = {
+            "expected_field": row["expected_field"],
+            "fortza_layer_or_expectation": row["layer_or_expectation"],
+            "source_file": row["source_file"],
+            "source_column": row["source_column"],
+            "status": row["status"],
+            "null_percentage": row["null_pct"],
+            "transform_needed": row["transform_needed"],
+            "notes": row["notes"]
+        }
+        if "alternatives" in row:
+            mapping["alternatives"] = row["alternatives"]
+        yield mapping
 
-**Next Steps:**
-1. Request IP address capture at order submission
-2. Export User object for salesperson name resolution
-3. Confirm agent/dealer/program field mappings with client
-4. Request historical data (1+ year, 10k+ records) with fraud labels for Bucket 2/3
-"""
-    
-    return report
+def mapping_status_counts(matrix):
+    # (present, missing) fields, as the mappings built from matrix report them.
+    present = len([row for row in matrix if row["status"] and "Present" in row["status"]])
+    missing = len([row for row in matrix if row["status"] == "Missing"])
+    return present, missing
+
+@traced("generate_report", rows=lambda report, matrix, *_, **__: len(matrix))
+def generate_report(matrix, csv_analyses, mappings, generated=DEFAULT_REPORT_DATE, data_source=DEFAULT_DATA_SOURCE):
+    return "".join(report_sections(matrix, csv_analyses, FORTZA_LAYERS, CLIENT_EXPECTATIONS, generated, data_source))
+
+# Streamed variants used by main: the report goes to the file section by
+# section and mapping.json one mapping at a time.
+@traced("generate_report", rows=lambda result, path, matrix, *_, **__: len(matrix))
+def write_report(path, matrix, csv_analyses, generated=DEFAULT_REPORT_DATE, data_source=DEFAULT_DATA_SOURCE):
+    atomic_write(path, lambda f: render_report(f, matrix, csv_analyses, FORTZA_LAYERS, CLIENT_EXPECTATIONS,
+                                               generated, data_source))
+    return path
+
+@traced("generate_mapping_json", rows=lambda count, *_, **__: count)
+def write_mapping_json(path, mappings):
+    return atomic_write(path, lambda f: write_json_array(f, mappings))
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Assess Fortza data readiness of the Salesforce CSV exports.")
+    parser.add_argument("--chunksize", type=int, default=None,
+                        help="Stream each CSV in chunks of this many rows instead of loading it whole")
+    parser.add_argument("--targeted", action="store_true",
+                        help="Only parse the columns FIELD_MAPPINGS refers to; other columns are read from the header")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Profile files (and byte ranges of large files) in a pool of this many processes")
+    parser.add_argument("--columnar-cache", action="store_true",
+                        help="Serve full loads from a persistent Arrow cache of previously parsed exports")
+    parser.add_argument("--cache-max-mb", type=int, default=DEFAULT_MAX_BYTES // 2**20,
+                        help="Size cap of the columnar cache before least recently used entries are evicted")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Reuse the previous run's statistics and only recompute files and columns that changed")
+    parser.add_argument("--rank-sources", action="store_true",
+                        help="Pick each field's source by fill rate and cardinality across all objects and "
+                             "record the ranked alternatives in mapping.json")
+    parser.add_argument("--report-date", default=DEFAULT_REPORT_DATE, help="Date shown as Generated in the report")
+    parser.add_argument("--data-source", default=DEFAULT_DATA_SOURCE, help="Dataset name shown in the report")
+    parser.add_argument("--profile", choices=PROFILE_MODES, default=None,
+                        help="Profile the run with cProfile or a stack sampler; the profile is written next to "
+                             "readiness_trace.json")
+    return parser.parse_args(argv)
 
-def main():
+def main(argv=None):
+    # Every run leaves readiness_trace.json next to mapping.json: wall and
+    # CPU time, rows and peak RSS for each pipeline stage.
+    args = parse_args(argv)
+    trace = start_trace(args.profile)
+    try:
+        run_analysis(args)
+    finally:
+        stop_trace()
+        trace_path = trace.finish(WORKSPACE, {"options": vars(args), "encoding_savings": encoding_savings})
+    stages = ", ".join(f"{stage} {s['wall_sec']:.2f}s" for stage, s in trace.summary().items())
+    print(f"   - {trace_path.name}: {stages or 'no stages ran'}")
+
+def run_analysis(args):
+    if args.columnar_cache:
+        enable_columnar_cache(max_bytes=args.cache_max_mb * 2**20)
     csv_files = ["Account.csv", "Contact.csv", "Lead.csv", "Opportunity.csv", "Order.csv"]
     csv_analyses = {}
     
     print("Analyzing CSV files...")
-    for csv_file in csv_files:
-        filepath = WORKSPACE / csv_file
-        if filepath.exists():
-            analysis, df = analyze_csv(filepath)
+    filepaths = [WORKSPACE / csv_file for csv_file in csv_files if (WORKSPACE / csv_file).exists()]
+    if args.incremental:
+        state = load_incremental_state()
+        csv_analyses, changed = analyze_incremental(filepaths, state, cardinality=args.rank_sources)
+    elif args.workers:
+        csv_analyses = analyze_csv_files_parallel(filepaths, workers=args.workers, targeted=args.targeted,
+                                                  chunksize=args.chunksize or DEFAULT_CHUNKSIZE,
+                                                  cardinality=args.rank_sources)
+    for filepath in filepaths:
+        csv_file = filepath.name
+        if csv_file not in csv_analyses:
+            if args.targeted:
+                analysis = analyze_csv_targeted(filepath, chunksize=args.chunksize, cardinality=args.rank_sources)
+            elif args.chunksize:
+                analysis = analyze_csv_streaming(filepath, chunksize=args.chunksize, cardinality=args.rank_sources)
+            else:
+                analysis, df = analyze_csv(filepath, cardinality=args.rank_sources)
+                del df
             csv_analyses[csv_file] = analysis
-            print(f"  - {csv_file}: {analysis['total_rows']} rows, {analysis['total_columns']} columns")
+        analysis = csv_analyses[csv_file]
+        print(f"  - {csv_file}: {analysis['total_rows']} rows, {analysis['total_columns']} columns")
+        if csv_file in encoding_savings:
+            saved = encoding_savings[csv_file]
+            print(f"      {saved['encoded_columns']} dictionary-encoded columns: {saved['object_bytes'] / 2**10:,.0f} KB "
+                  f"as objects, {saved['encoded_bytes'] / 2**10:,.0f} KB encoded ({saved['saved_bytes'] / 2**10:,.0f} KB saved)")
+
+    manifest = update_schema_manifest(filepaths, csv_analyses)
+    atomic_write(WORKSPACE / "empty_columns_report.txt",
+                 lambda f: f.write(generate_empty_columns_report(filepaths, manifest)))
     
-    print("\nBuilding field coverage matrix...")
-    matrix = build_field_coverage_matrix(csv_analyses)
+    outputs = [WORKSPACE / "mapping.json", WORKSPACE / "REPORT_data_readiness.md"]
+    # The report also shows these, so changing them re-renders unchanged inputs.
+    report_options = {"report_date": args.report_date, "data_source": args.data_source}
+    if args.incremental and "matrix" in state:
+        if not changed and state.get("report_options") == report_options and all(path.exists() for path in outputs):
+            save_incremental_state(state)
+            print("\n✅ No changes since the previous run; mapping.json and REPORT_data_readiness.md are up to date.")
+            return
+        print(f"\nUpdating field coverage matrix ({len(fields_affected_by(changed))} affected fields)...")
+        matrix = update_field_coverage_matrix(state["matrix"], csv_analyses, changed, rank=args.rank_sources)
+    else:
+        print("\nBuilding field coverage matrix...")
+        matrix = build_field_coverage_matrix(csv_analyses, rank=args.rank_sources)
+    if args.incremental:
+        state["matrix"] = matrix
+        state["report_options"] = report_options
+        save_incremental_state(state)
     
     print("Generating mapping.json...")
-    mappings = generate_mapping_json(matrix, csv_analyses)
-    with open(WORKSPACE / "mapping.json", "w", encoding="utf-8") as f:
-        json.dump(mappings, f, indent=2, default=str)
+    count = write_mapping_json(WORKSPACE / "mapping.json", generate_mapping_json(matrix, csv_analyses))
     
     print("Generating REPORT_data_readiness.md...")
-    report = generate_report(matrix, csv_analyses, mappings)
-    with open(WORKSPACE / "REPORT_data_readiness.md", "w", encoding="utf-8") as f:
-        f.write(report)
+    write_report(WORKSPACE / "REPORT_data_readiness.md", matrix, csv_analyses, args.report_date, args.data_source)
     
     print("\n✅ Analysis complete!")
-    print(f"   - mapping.json: {len(mappings)} field mappings")
+    print(f"   - mapping.json: {count} field mappings")
     print(f"   - REPORT_data_readiness.md: Generated")
+    empty = sum(len(manifest[str(filepath.resolve())]["empty_columns"]) for filepath in filepaths)
+    print(f"   - empty_columns_report.txt: {empty} all-null columns (skipped at parse time on later runs)")
     
-    present = len([m for m in mappings if m["status"] and "Present" in m["status"]])
-    missing = len([m for m in mappings if m["status"] == "Missing"])
+    present, missing = mapping_status_counts(matrix)
     print(f"\n📊 Summary: {present} fields present, {missing} fields missing")
+    if columnar_cache is not None:
+        stats = columnar_cache.stats
+        print(f"   Columnar cache: {stats['hits']} hits, {stats['misses']} misses, "
+              f"{stats['stores']} stored, {stats['evictions']} evicted")
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,23 @@
+import json
+import os
+from pathlib import Path
+
+
+def atomic_write(path, write, mode="w", **open_kwargs):
+    # write(f) fills a per-process temporary file next to `path`, which then
+    # replaces it in one step: readers, and other workers writing the same
+    # cache file, never see a half-written one.
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if "b" not in mode:
+        open_kwargs.setdefault("encoding", "utf-8")
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}")
+    with open(tmp_path, mode, **open_kwargs) as f:
+        result = write(f)
+    os.replace(tmp_path, path)
+    return result
+
+
+def atomic_write_json(path, data, indent=2, default=None):
+    atomic_write(path, lambda f: json.dump(data, f, indent=indent, default=default))
+    return path
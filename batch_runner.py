@@ -0,0 +1,229 @@
+import argparse
+import codecs
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+from pathlib import Path
+
+from analyze_client_data import (CACHE_DIR, CLIENT_EXPECTATIONS, FORTZA_LAYERS, analyze_csv, analyze_csv_streaming,
+                                 analyze_csv_targeted, build_field_coverage_matrix, compile_field_rules, detect_dialect,
+                                 empty_columns_from, generate_empty_columns_report, generate_mapping_json,
+                                 mapping_status_counts, read_csv_header, remember_dialect, remember_header)
+from atomic_io import atomic_write, atomic_write_json
+from report_renderer import DEFAULT_REPORT_DATE, render_client
+
+OBJECTS = ["Account.csv", "Contact.csv", "Lead.csv", "Opportunity.csv", "Order.csv"]
+SCHEMA_CACHE_PATH = CACHE_DIR / "batch_schemas.json"
+HEADER_BYTES = 1 * 2**20
+
+# Per-worker state, filled once by _init_worker and reused for every client
+# the worker runs: the compiled FIELD_MAPPINGS rules and, by header
+# signature, the separator, quote character and column names. Those follow
+# from the export schema; the encoding and the dictionary-encoded columns
+# depend on each client's data, so they are still worked out per file.
+_worker = {}
+
+
+def discover_drops(drops_dir):
+    # Every subdirectory holding at least one of the exports is a client
+    # drop; the largest are scheduled first so a big client is not the tail.
+    drops = []
+    for path in sorted(Path(drops_dir).iterdir()):
+        files = [path / csv_file for csv_file in OBJECTS if (path / csv_file).exists()] if path.is_dir() else []
+        if files:
+            drops.append({"client": path.name, "path": path, "bytes": sum(f.stat().st_size for f in files)})
+    return sorted(drops, key=lambda drop: drop["bytes"], reverse=True)
+
+
+def _header_line(filepath):
+    with open(filepath, "rb") as f:
+        return f.readline(HEADER_BYTES)
+
+
+def header_signature(filepath, header=None):
+    # Clients on the same Salesforce schema export the same header line.
+    header = _header_line(filepath) if header is None else header
+    return f"{Path(filepath).name}:{hashlib.blake2b(header, digest_size=16).hexdigest()}"
+
+
+def load_schema_cache(path=SCHEMA_CACHE_PATH):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_schema_cache(schemas, path=SCHEMA_CACHE_PATH):
+    # Merged into what other workers saved meanwhile; a lost race only costs
+    # one worker a sampling pass later on.
+    merged = load_schema_cache(path)
+    merged.update(schemas)
+    atomic_write_json(path, merged)
+
+
+def _init_worker(schema_cache_path):
+    _worker["rules"] = compile_field_rules()
+    _worker["schema_cache_path"] = schema_cache_path
+    _worker["schemas"] = load_schema_cache(schema_cache_path)
+
+
+def _warm_schema(filepath):
+    # A known header line skips the dialect sniff and the header parse. The
+    # encoding is the client's own: UTF-8 is assumed (with a BOM if the line
+    # has one) and read_with_dialect re-reads as latin-1 on the first byte
+    # that is not UTF-8. Warmed dialects stay in this worker's memory; the
+    # shared dialect cache is not rewritten once per file.
+    header = _header_line(filepath)
+    schema = _worker["schemas"].get(header_signature(filepath, header))
+    if schema is None or "columns" not in schema:
+        return False
+    encoding = "utf-8-sig" if header.startswith(codecs.BOM_UTF8) else "utf-8"
+    remember_dialect(filepath, {"encoding": encoding, "sep": schema["sep"], "quotechar": schema["quotechar"]},
+                     persist=False)
+    remember_header(filepath, schema["columns"])
+    return True
+
+
+def _learn_schema(filepath):
+    # Column names are only shared for ASCII header lines, which read the
+    # same in any of the encodings sniffed.
+    header = _header_line(filepath)
+    if not header.removeprefix(codecs.BOM_UTF8).isascii():
+        return None
+    dialect = detect_dialect(filepath)
+    schema = {"sep": dialect["sep"], "quotechar": dialect["quotechar"], "columns": read_csv_header(filepath)}
+    _worker["schemas"][header_signature(filepath, header)] = schema
+    return schema
+
+
+def run_client(drop, output_dir, options):
+    # One client end to end in this worker: profile its exports, build the
+    # coverage matrix from the warm rules and write its outputs.
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+    filepaths = [drop["path"] / csv_file for csv_file in OBJECTS if (drop["path"] / csv_file).exists()]
+    warm = {filepath.name: _warm_schema(filepath) for filepath in filepaths}
+
+    csv_analyses = {}
+    for filepath in filepaths:
+        if options["targeted"]:
+            analysis = analyze_csv_targeted(filepath, chunksize=options["chunksize"], cardinality=options["rank_sources"])
+        elif options["chunksize"]:
+            analysis = analyze_csv_streaming(filepath, chunksize=options["chunksize"], cardinality=options["rank_sources"])
+        else:
+            analysis, df = analyze_csv(filepath, cardinality=options["rank_sources"])
+            del df
+        csv_analyses[filepath.name] = analysis
+    learned = [_learn_schema(filepath) for filepath in filepaths if not warm[filepath.name]]
+    if any(learned):
+        save_schema_cache(_worker["schemas"], _worker["schema_cache_path"])
+
+    matrix = build_field_coverage_matrix(csv_analyses, rank=options["rank_sources"], rules=_worker["rules"])
+    client_dir = Path(output_dir) / drop["client"]
+    render_client({
+        "output_dir": client_dir,
+        "matrix": matrix,
+        "csv_analyses": csv_analyses,
+        "mappings": generate_mapping_json(matrix, csv_analyses),
+        "generated": options["report_date"],
+        "data_source": options["data_source"].format(client=drop["client"]),
+    }, FORTZA_LAYERS, CLIENT_EXPECTATIONS)
+    if not options["targeted"]:
+        manifest = {str(filepath.resolve()): {"empty_columns": empty_columns_from(csv_analyses[filepath.name])}
+                    for filepath in filepaths}
+        atomic_write(client_dir / "empty_columns_report.txt",
+                     lambda f: f.write(generate_empty_columns_report(filepaths, manifest)))
+
+    present, missing = mapping_status_counts(matrix)
+    return {
+        "client": drop["client"],
+        "output_dir": str(client_dir),
+        "files": len(filepaths),
+        "rows": sum(analysis["total_rows"] for analysis in csv_analyses.values()),
+        "bytes": drop["bytes"],
+        "seconds": round(time.perf_counter() - start, 4),
+        "cpu_seconds": round(time.process_time() - cpu_start, 4),
+        "worker_pid": os.getpid(),
+        "warm_schemas": sum(warm.values()),
+        "present": present,
+        "missing": missing,
+    }
+
+
+def run_batch(drops_dir, output_dir, workers=None, options=None, schema_cache_path=SCHEMA_CACHE_PATH):
+    options = dict({"targeted": False, "chunksize": None, "rank_sources": False, "report_date": DEFAULT_REPORT_DATE,
+                    "data_source": "{client} Salesforce Export"}, **(options or {}))
+    drops = discover_drops(drops_dir)
+    start = time.perf_counter()
+    clients, failures = [], []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(schema_cache_path,)) as pool:
+        futures = {pool.submit(run_client, drop, output_dir, options): drop for drop in drops}
+        for future in as_completed(futures):
+            drop = futures[future]
+            try:
+                result = future.result()
+            except Exception as exc:
+                failures.append({"client": drop["client"], "error": f"{type(exc).__name__}: {exc}"})
+                print(f"  - {drop['client']}: FAILED ({type(exc).__name__}: {exc})")
+                continue
+            clients.append(result)
+            print(f"  - {result['client']}: {result['rows']} rows in {result['seconds']:.2f}s "
+                  f"({result['present']} present, {result['missing']} missing)")
+    elapsed = time.perf_counter() - start
+
+    rows = sum(client["rows"] for client in clients)
+    data_bytes = sum(client["bytes"] for client in clients)
+    summary = {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "drops_dir": str(Path(drops_dir).resolve()),
+        "workers": workers or os.cpu_count(),
+        "options": options,
+        "clients": len(clients),
+        "failed": len(failures),
+        "rows": rows,
+        "data_mb": round(data_bytes / 2**20, 2),
+        "wall_seconds": round(elapsed, 3),
+        "clients_per_minute": round(len(clients) / elapsed * 60, 2) if elapsed else None,
+        "rows_per_second": round(rows / elapsed) if elapsed else None,
+        "mb_per_second": round(data_bytes / 2**20 / elapsed, 2) if elapsed else None,
+        "cpu_seconds": round(sum(client["cpu_seconds"] for client in clients), 3),
+        "warm_schema_hits": sum(client["warm_schemas"] for client in clients),
+        "per_client": sorted(clients, key=lambda client: client["client"]),
+        "failures": failures,
+    }
+    atomic_write_json(Path(output_dir) / "batch_summary.json", summary)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the readiness assessment over a directory of client drops.")
+    parser.add_argument("drops_dir", type=Path, help="Directory with one subdirectory of exports per client")
+    parser.add_argument("--output-dir", type=Path, default=None,
+                        help="Where each client's outputs go, one subdirectory per client (default: <drops_dir>/_readiness)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunksize", type=int, default=None)
+    parser.add_argument("--targeted", action="store_true")
+    parser.add_argument("--rank-sources", action="store_true")
+    parser.add_argument("--report-date", default=DEFAULT_REPORT_DATE)
+    parser.add_argument("--data-source", default="{client} Salesforce Export",
+                        help="Dataset name in each report; {client} is replaced by the drop's directory name")
+    parser.add_argument("--schema-cache", type=Path, default=SCHEMA_CACHE_PATH)
+    args = parser.parse_args(argv)
+
+    output_dir = args.output_dir or args.drops_dir / "_readiness"
+    options = {"targeted": args.targeted, "chunksize": args.chunksize, "rank_sources": args.rank_sources,
+               "report_date": args.report_date, "data_source": args.data_source}
+    print(f"Assessing client drops in {args.drops_dir}...")
+    summary = run_batch(args.drops_dir, output_dir, args.workers, options, args.schema_cache)
+    print(f"\n✅ {summary['clients']} clients ({summary['failed']} failed) in {summary['wall_seconds']:.2f}s: "
+          f"{summary['rows_per_second']:,} rows/s, {summary['mb_per_second']} MB/s, "
+          f"{summary['warm_schema_hits']} files reused a cached schema")
+    print(f"   - {output_dir / 'batch_summary.json'}: Generated")
+
+
+if __name__ == "__main__":
+    main()
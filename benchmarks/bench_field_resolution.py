@@ -0,0 +1,139 @@
+import argparse
+import copy
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+import analyze_client_data as acd
+
+
+def legacy_build_field_coverage_matrix(csv_analyses):
+    # The list-and-scan resolution that build_field_coverage_matrix used
+    # before the resolution index, kept verbatim for comparison.
+    required_fields = set()
+    for layer_info in acd.FORTZA_LAYERS.values():
+        required_fields.update(layer_info["required_fields"])
+    for field_key in acd.CLIENT_EXPECTATIONS.keys():
+        required_fields.add(field_key)
+
+    matrix = []
+    for field in sorted(required_fields):
+        row = {
+            "expected_field": field,
+            "layer_or_expectation": [],
+            "status": "Missing",
+            "source_file": None,
+            "source_column": None,
+            "null_pct": None,
+            "transform_needed": None,
+            "notes": ""
+        }
+        for layer_name, layer_info in acd.FORTZA_LAYERS.items():
+            if field in layer_info["required_fields"]:
+                row["layer_or_expectation"].append(f"{layer_name} (Layer)")
+        if field in acd.CLIENT_EXPECTATIONS:
+            row["layer_or_expectation"].append(f"Client Expectation: {acd.CLIENT_EXPECTATIONS[field]['description']}")
+        if field in acd.FIELD_MAPPINGS:
+            mapping = acd.FIELD_MAPPINGS[field]
+            for csv_file, columns in mapping.items():
+                if columns and csv_file != "notes":
+                    if csv_file in csv_analyses:
+                        csv_cols = [c["name"] for c in csv_analyses[csv_file]["columns"]]
+                        for mapped_col in columns:
+                            clean_col = mapped_col.split(" (")[0] if " (" in mapped_col else mapped_col
+                            if clean_col in csv_cols:
+                                col_info = next((c for c in csv_analyses[csv_file]["columns"] if c["name"] == clean_col), None)
+                                if col_info:
+                                    row["source_file"] = csv_file
+                                    row["source_column"] = clean_col
+                                    row["null_pct"] = col_info["null_pct"]
+                                    if col_info["null_pct"] > 50:
+                                        row["status"] = "Present but low quality (high nulls)"
+                                    else:
+                                        row["status"] = "Present"
+                                    break
+                    if row["status"] != "Missing":
+                        break
+            if "notes" in mapping:
+                row["notes"] = mapping["notes"]
+        if row["status"] == "Missing" and field in acd.CLIENT_EXPECTATIONS:
+            row["notes"] = f"Suggested source: {acd.CLIENT_EXPECTATIONS[field]['suggested_source']}"
+        if field in ["cust_street", "cust_city", "cust_state", "zip_code"]:
+            if row["status"] == "Present":
+                row["transform_needed"] = "Normalize address format, handle multi-line addresses"
+        if field == "email":
+            row["transform_needed"] = "Normalize to lowercase"
+        if field == "customer_name":
+            row["transform_needed"] = "Derive from FirstName + LastName or related Contact"
+        if field == "salesperson_name":
+            row["transform_needed"] = "Join with User object using OwnerId"
+        row["layer_or_expectation"] = "; ".join(row["layer_or_expectation"])
+        matrix.append(row)
+    return matrix
+
+
+def widened_analyses(n_columns):
+    # The real analyses padded with filler columns placed ahead of the mapped
+    # ones, which is the worst case for a linear scan.
+    csv_analyses = {}
+    for csv_file in ["Account.csv", "Contact.csv", "Lead.csv", "Opportunity.csv", "Order.csv"]:
+        analysis, _ = acd.analyze_csv(ROOT / csv_file)
+        filler = [
+            {"name": f"Filler_{i}__c", "dtype": "float64", "null_count": 0, "null_pct": 0.0, "sample_values": []}
+            for i in range(max(n_columns - len(analysis["columns"]), 0))
+        ]
+        analysis["columns"] = filler + analysis["columns"]
+        analysis["total_columns"] = len(analysis["columns"])
+        csv_analyses[csv_file] = analysis
+    return csv_analyses
+
+
+def add_synthetic_layers(n_layers):
+    fields = sorted(acd.coverage_required_fields())
+    for i in range(n_layers):
+        acd.FORTZA_LAYERS[f"Synthetic Layer {i}"] = {
+            "required_fields": [fields[(i + k) % len(fields)] for k in range(6)],
+            "purpose": "Benchmark filler",
+            "bucket": 1 + i % 3
+        }
+
+
+def timed(func, csv_analyses, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(csv_analyses)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare indexed field resolution against the linear scan.")
+    parser.add_argument("--columns", type=int, default=5000, help="Columns per export")
+    parser.add_argument("--layers", type=int, default=300, help="Synthetic layers added to FORTZA_LAYERS")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    original_layers = copy.deepcopy(acd.FORTZA_LAYERS)
+    add_synthetic_layers(args.layers)
+    try:
+        csv_analyses = widened_analyses(args.columns)
+        legacy_time, legacy = timed(legacy_build_field_coverage_matrix, csv_analyses, args.repeat)
+        index_time, indexed = timed(acd.build_field_coverage_matrix, csv_analyses, args.repeat)
+    finally:
+        acd.FORTZA_LAYERS.clear()
+        acd.FORTZA_LAYERS.update(original_layers)
+    if indexed != legacy:
+        raise SystemExit("indexed matrix differs from the linear-scan matrix")
+
+    print(f"{args.columns} columns per file, {len(original_layers) + args.layers} layers, {len(indexed)} matrix rows")
+    print(f"  linear scan:  {legacy_time * 1000:9.2f} ms")
+    print(f"  indexed:      {index_time * 1000:9.2f} ms")
+    print(f"  speedup:      {legacy_time / index_time:9.1f}x  (identical output)")
+
+
+if __name__ == "__main__":
+    main()
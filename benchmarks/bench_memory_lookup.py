@@ -0,0 +1,78 @@
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+import permanent_memory_index as pmi
+
+
+def synthetic_records(n, seed):
+    # Historical customers drawn from small name/street/city vocabularies so
+    # the component tables see realistic repetition.
+    rng = np.random.default_rng(seed)
+    ids = rng.integers(0, n * 4, n)
+    return pd.DataFrame({
+        "customer_name": pd.Series(ids, dtype=str).radd("Customer "),
+        "email": pd.Series(ids, dtype=str).radd("user").add("@example.com"),
+        "cust_street": pd.Series(rng.integers(1, 9999, n), dtype=str) + " Main St",
+        "cust_city": pd.Series(rng.integers(0, 500, n), dtype=str).radd("City "),
+        "cust_state": "TX",
+        "zip_code": pd.Series(rng.integers(10000, 99999, n), dtype=str),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch vs per-record Permanent Memory lookups.")
+    parser.add_argument("--history", type=int, default=2_000_000, help="Historical records in the index")
+    parser.add_argument("--orders", type=int, default=500_000, help="Order rows scored in one batch")
+    parser.add_argument("--single", type=int, default=2_000, help="Orders looked up one at a time for latency")
+    args = parser.parse_args()
+
+    history = synthetic_records(args.history, seed=0)
+    orders = synthetic_records(args.orders, seed=1)
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        for table, (keys, counts) in pmi.source_tables(history).items():
+            pmi._save_table(Path(tmp) / table, keys, counts)
+        build_time = time.perf_counter() - start
+        index = pmi.load_index(tmp)
+
+        start = time.perf_counter()
+        scored = pmi.score_frame(index, orders)
+        batch_time = time.perf_counter() - start
+
+        # The probes alone, without normalization, are what the on-disk
+        # layout itself costs.
+        keys = pmi.lookup_keys(orders)
+        start = time.perf_counter()
+        for table, values in keys.items():
+            pmi.lookup(index[table], values)
+        probe_time = time.perf_counter() - start
+
+        latencies = []
+        for i in range(args.single):
+            row = orders.iloc[i:i + 1]
+            start = time.perf_counter()
+            single = pmi.score_frame(index, row)
+            latencies.append(time.perf_counter() - start)
+            if not single.iloc[0].equals(scored.iloc[i]):
+                raise SystemExit(f"single lookup for row {i} differs from the batch result")
+        del index
+
+    latencies = np.array(latencies) * 1000
+    print(f"{args.history} historical records indexed in {build_time:.2f}s")
+    print(f"  batch:       {args.orders} orders in {batch_time:.3f}s ({args.orders / batch_time:,.0f} orders/sec)")
+    print(f"  probes only: {len(keys)} tables x {args.orders} keys in {probe_time:.3f}s")
+    print(f"  per-record:  p50 {np.percentile(latencies, 50):.3f} ms, p99 {np.percentile(latencies, 99):.3f} ms "
+          f"({1000 / latencies.mean():,.0f} orders/sec)")
+    print(f"  user details matches: {scored['user_details_match'].value_counts().to_dict()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from analyze_client_data import profile_columns
+
+
+def legacy_profile_columns(df):
+    columns = []
+    for col in df.columns:
+        columns.append({
+            "name": col,
+            "dtype": str(df[col].dtype),
+            "null_count": int(df[col].isna().sum() + (df[col] == '').sum()),
+            "null_pct": round((df[col].isna().sum() + (df[col] == '').sum()) / len(df) * 100, 1) if len(df) > 0 else 0,
+            "sample_values": df[col].dropna().head(3).tolist()
+        })
+    return columns
+
+
+def synthetic_frame(n_rows, n_cols, seed=0):
+    # Roughly the dtype mix of the Account export: mostly sparse floats,
+    # a block of boolean flags and a smaller set of string columns.
+    rng = np.random.default_rng(seed)
+    words = np.array(["WIRE", "HSEW", "DOM", "", "Frontier", "Spectrum"], dtype=object)
+    data = {}
+    for i in range(n_cols):
+        kind = i % 10
+        if kind < 7:
+            values = rng.random(n_rows)
+            values[rng.random(n_rows) < (i % 7) / 6] = np.nan
+            data[f"Float_{i}__c"] = values
+        elif kind < 9:
+            data[f"Flag_{i}__c"] = rng.random(n_rows) < 0.5
+        else:
+            values = words[rng.integers(0, len(words), n_rows)]
+            values[rng.random(n_rows) < 0.3] = None
+            data[f"Text_{i}__c"] = values
+    return pd.DataFrame(data)
+
+
+def timed(func, df, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(df)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the vectorized column profiler against the per-column loop.")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--cols", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = synthetic_frame(args.rows, args.cols)
+    print(f"Synthetic frame: {args.rows:,} rows x {args.cols} columns")
+
+    legacy_time, legacy = timed(legacy_profile_columns, df, args.repeat)
+    vector_time, vectorized = timed(profile_columns, df, args.repeat)
+    if vectorized != legacy:
+        raise SystemExit("profile_columns output differs from the per-column implementation")
+
+    print(f"  per-column loop: {legacy_time:8.3f}s")
+    print(f"  vectorized:      {vector_time:8.3f}s")
+    print(f"  speedup:         {legacy_time / vector_time:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+import analyze_client_data as acd
+from analyze_client_data import load_csv, mapped_source_columns, read_csv_header
+
+
+def tiled_export(source, n_rows, target):
+    # Repeat the sample export's rows so the benchmark file keeps the real
+    # column set and value shapes of the client data.
+    sample = load_csv(source)
+    repeats = -(-n_rows // len(sample))
+    pd.concat([sample] * repeats, ignore_index=True).head(n_rows).to_csv(target, index=False)
+
+
+def timed_load(filepath, **read_kwargs):
+    start = time.perf_counter()
+    df = load_csv(filepath, **read_kwargs)
+    elapsed = time.perf_counter() - start
+    return elapsed, df.memory_usage(deep=True).sum(), df.shape
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare full and column-projected loads of a wide export.")
+    parser.add_argument("--source", default="Account.csv")
+    parser.add_argument("--rows", type=int, default=200_000)
+    args = parser.parse_args()
+
+    source = ROOT / args.source
+    with tempfile.TemporaryDirectory() as tmp:
+        acd.DIALECT_CACHE_PATH = Path(tmp) / "dialects.json"
+        target = Path(tmp) / args.source
+        tiled_export(source, args.rows, target)
+        header = read_csv_header(target)
+        wanted = mapped_source_columns(args.source)
+        usecols = [col for col in header if col in wanted]
+
+        full_time, full_mem, full_shape = timed_load(target)
+        proj_time, proj_mem, proj_shape = timed_load(target, usecols=usecols)
+
+    print(f"{args.source}: {args.rows:,} rows, {len(header)} columns, {len(usecols)} mapped")
+    print(f"  full load:      {full_time:8.3f}s  {full_mem / 2**20:10.1f} MiB  shape={full_shape}")
+    print(f"  projected load: {proj_time:8.3f}s  {proj_mem / 2**20:10.1f} MiB  shape={proj_shape}")
+    print(f"  speedup:        {full_time / proj_time:8.1f}x  memory ratio {full_mem / proj_mem:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
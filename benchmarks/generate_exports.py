@@ -0,0 +1,248 @@
+import argparse
+import re
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+import analyze_client_data as acd
+from atomic_io import atomic_write
+from analyze_client_data import read_csv_header
+
+OBJECTS = ["Account", "Contact", "Lead", "Opportunity", "Order"]
+ID_PREFIXES = {"Account": "001", "Contact": "003", "Lead": "00Q", "Opportunity": "006", "Order": "801", "User": "005"}
+# Which object a reference column points at, by substring of its name.
+REFERENCE_TARGETS = [("Account", "Account"), ("Dealer", "Account"), ("Contact", "Contact"), ("Opportunity", "Opportunity"),
+                     ("Lead", "Lead"), ("Owner", "User"), ("CreatedBy", "User"), ("ModifiedBy", "User"), ("User", "User")]
+CHUNK_ROWS = 100_000
+
+FIRST_NAMES = np.array(["James", "Maria", "José", "Zoë", "Wei", "Aisha", "Liam", "Sofía", "Noah", "Chloé", "Omar",
+                        "Emma", "Mateo", "Amélie", "Ethan", "Priya", "Lucas", "Renée", "Kenji", "Olivia"], dtype=object)
+LAST_NAMES = np.array(["Smith", "García", "Müller", "Nguyen", "Johnson", "Brown", "Núñez", "Patel", "Williams", "Kim",
+                       "Jones", "Lefèvre", "Davis", "Martínez", "Wilson", "Björk", "Taylor", "Ortiz", "Clark", "Hall"],
+                      dtype=object)
+STREETS = np.array(["Main St", "Oak Ave", "Elm Street", "Maple Dr", "Cedar Ln", "Pine Rd", "Lake Blvd", "Hill Ct",
+                    "Park Pkwy", "Bexar Street", "Dora St", "Sunset Hwy"], dtype=object)
+CITIES = np.array(["Dallas", "Houston", "Austin", "Mercedes", "San Antonio", "El Paso", "Plano", "Irving",
+                   "New York", "Buffalo", "Phoenix", "Denver"], dtype=object)
+STATES = np.array(["TX", "NY", "CA", "FL", "AZ", "CO", "IL", "GA"], dtype=object)
+STATE_NAMES = np.array(["Texas", "New York", "California", "Florida", "Arizona", "Colorado", "Illinois", "Georgia"],
+                       dtype=object)
+DOMAINS = np.array(["example.com", "gmail.com", "yahoo.com", "perfect-vision.com", "outlook.com"], dtype=object)
+DATETIME_RE = re.compile(r"^\d{4}-\d{2}-\d{2}T")
+DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+ID_RE = re.compile(r"^[0-9a-zA-Z]{18}$")
+
+
+def use_scratch_dialect_cache(cache_dir):
+    # Dialects sniffed while generating or benchmarking go to cache_dir, not
+    # the workspace's .readiness_cache.
+    acd.DIALECT_CACHE_PATH = Path(cache_dir) / "dialects.json"
+
+
+def read_data_dictionary(path):
+    # Descriptions contain unquoted commas, so only the first comma splits.
+    with open(path, encoding="utf-8") as f:
+        lines = f.read().splitlines()[1:]
+    return {line.split(",", 1)[0]: (line.split(",", 1) + [""])[1] for line in lines if line.strip()}
+
+
+def observed_values(workspace, obj, columns):
+    path = Path(workspace) / f"{obj}.csv"
+    if not path.exists():
+        return {}
+    header = set(read_csv_header(path))
+    frame = pd.read_csv(path, usecols=[c for c in columns if c in header], dtype=str)
+    return {column: frame[column].dropna().unique() for column in frame.columns}
+
+
+def column_kind(name, description, samples):
+    # Real sample values decide the kind when the shipped export has any;
+    # otherwise the column name and data-dictionary description do.
+    text = f"{name} {description}".lower()
+    if len(samples):
+        if all(v in ("true", "false") for v in samples):
+            return "boolean"
+        if all(DATETIME_RE.match(v) for v in samples):
+            return "datetime"
+        if all(DATE_RE.match(v) for v in samples):
+            return "date"
+        if all(ID_RE.match(v) for v in samples) and (name == "Id" or name.endswith("Id") or name.endswith("__c")):
+            return "id"
+    if name == "Id" or name.endswith("Id") or "identifier" in text and "reference" in text:
+        return "id"
+    # Tokens are matched without the namespace (vlocity_cmt__, Fortza__)
+    # and __c/__pc suffix, so "vlocity" does not read as a city.
+    field = re.sub(r"__p?c$", "", name).split("__")[-1].lower()
+    for token, kind in (("email", "email"), ("street", "street"), ("city", "city"), ("statecode", "state_code"),
+                        ("state", "state"), ("postalcode", "zip"), ("zip", "zip"), ("pin_code", "zip"),
+                        ("phone", "phone"), ("firstname", "first_name"), ("lastname", "last_name")):
+        if token in field:
+            return kind
+    if name in ("Name", "Company", "Owner__c", "Lead_Owner__c", "Account_Owner__c"):
+        return "name"
+    if "boolean" in text or name.lower().startswith("is"):
+        return "boolean"
+    if "datetime" in text or name in ("CreatedDate", "LastModifiedDate", "SystemModstamp"):
+        return "datetime"
+    if "date" in text:
+        return "date"
+    if len(samples) and all(re.match(r"^-?\d+(\.\d+)?$", v) for v in samples) or \
+            any(word in text for word in ("numeric", "number of", "count", "amount", "total")):
+        return "number"
+    return "category"
+
+
+def reference_target(obj, name):
+    if name == "Id":
+        return obj
+    for token, target in REFERENCE_TARGETS:
+        if token.lower() in name.lower():
+            return target
+    return "User"
+
+
+def salesforce_ids(prefix, numbers):
+    # 18 characters like real Ids: 3-char key prefix, 12 digits, 3-char suffix.
+    return np.char.add(np.char.add(prefix, np.char.zfill(numbers.astype(str), 12)), "AAA").astype(object)
+
+
+def column_values(kind, name, obj, rows, start, rng, counts, samples):
+    if kind == "id":
+        target = reference_target(obj, name)
+        if target == obj and name == "Id":
+            return salesforce_ids(ID_PREFIXES[obj], np.arange(start, start + rows))
+        return salesforce_ids(ID_PREFIXES[target], rng.integers(0, max(counts.get(target, 1000), 1), rows))
+    if kind == "boolean":
+        return np.where(rng.random(rows) < 0.2, "true", "false").astype(object)
+    if kind in ("datetime", "date"):
+        days = np.datetime64("2022-01-01") + rng.integers(0, 1460, rows).astype("timedelta64[D]")
+        if kind == "date":
+            return days.astype(str).astype(object)
+        seconds = rng.integers(0, 86400, rows).astype("timedelta64[s]")
+        return np.char.add((days + seconds).astype(str), ".000Z").astype(object)
+    if kind == "email":
+        users = np.char.add("user", rng.integers(0, max(rows + start, 1), rows).astype(str))
+        return np.char.add(np.char.add(users, "@"), DOMAINS[rng.integers(0, len(DOMAINS), rows)].astype(str)).astype(object)
+    if kind == "street":
+        numbers = rng.integers(1, 9999, rows).astype(str)
+        return np.char.add(np.char.add(numbers, " "), STREETS[rng.integers(0, len(STREETS), rows)].astype(str)).astype(object)
+    if kind == "city":
+        return CITIES[rng.integers(0, len(CITIES), rows)]
+    if kind == "state_code":
+        return STATES[rng.integers(0, len(STATES), rows)]
+    if kind == "state":
+        return STATE_NAMES[rng.integers(0, len(STATE_NAMES), rows)]
+    if kind == "zip":
+        return rng.integers(10000, 99999, rows).astype(str).astype(object)
+    if kind == "phone":
+        return np.char.add("(555) 01", rng.integers(10, 99, rows).astype(str)).astype(object)
+    if kind == "first_name":
+        return FIRST_NAMES[rng.integers(0, len(FIRST_NAMES), rows)]
+    if kind == "last_name":
+        return LAST_NAMES[rng.integers(0, len(LAST_NAMES), rows)]
+    if kind == "name":
+        first = FIRST_NAMES[rng.integers(0, len(FIRST_NAMES), rows)].astype(str)
+        return np.char.add(np.char.add(first, " "), LAST_NAMES[rng.integers(0, len(LAST_NAMES), rows)].astype(str)).astype(object)
+    if kind == "number":
+        return np.round(rng.exponential(50.0, rows), 2).astype(str).astype(object)
+    pool = np.asarray(samples, dtype=object) if len(samples) else np.array([f"{name[:4].upper()}{i}" for i in range(12)], dtype=object)
+    return pool[rng.integers(0, len(pool), rows)]
+
+
+def plan_export(obj, workspace=ROOT, empty_columns=True):
+    dictionary = read_data_dictionary(Path(workspace) / "outputs" / f"{obj}DataDictionary.csv")
+    columns = list(dictionary)
+    export = Path(workspace) / f"{obj}.csv"
+    if empty_columns and export.exists():
+        # The shipped export's header order, with its columns missing from
+        # the data dictionary kept as always-empty columns like the real
+        # exports have.
+        header = read_csv_header(export)
+        columns = header + [c for c in columns if c not in header]
+    if "Id" not in columns:
+        columns.insert(0, "Id")
+    samples = observed_values(workspace, obj, columns)
+    kinds = {c: column_kind(c, dictionary[c], samples.get(c, [])) if c in dictionary or c == "Id" else None
+             for c in columns}
+    return {"object": obj, "columns": columns, "kinds": kinds, "samples": samples}
+
+
+def write_export(plan, path, rows, counts, null_rate=0.3, encoding="utf-8", seed=0):
+    # Rows are produced and written CHUNK_ROWS at a time, so memory stays
+    # flat at any row count. Each populated column draws its own null rate
+    # around null_rate; Id columns are never null.
+    rng = np.random.default_rng(seed)
+    column_null_rates = {c: min(rng.uniform(0, 2 * null_rate), 0.95) for c in plan["columns"]}
+
+    def write(f):
+        for start in range(0, max(rows, 1), CHUNK_ROWS):
+            n = min(CHUNK_ROWS, rows - start)
+            if n <= 0:
+                pd.DataFrame(columns=plan["columns"]).to_csv(f, index=False)
+                break
+            data = {}
+            for column in plan["columns"]:
+                kind = plan["kinds"][column]
+                if kind is None:
+                    data[column] = np.full(n, None, dtype=object)
+                    continue
+                values = column_values(kind, column, plan["object"], n, start, rng, counts,
+                                       plan["samples"].get(column, []))
+                if column != "Id":
+                    values[rng.random(n) < column_null_rates[column]] = None
+                data[column] = values
+            pd.DataFrame(data, columns=plan["columns"]).to_csv(f, index=False, header=start == 0)
+
+    atomic_write(path, write, encoding=encoding, errors="replace", newline="")
+    return path
+
+
+def generate_exports(output_dir, rows, null_rate=0.3, encoding="utf-8", objects=OBJECTS, empty_columns=True,
+                     seed=0):
+    # rows is either one count for every object or a {object: count} dict.
+    counts = rows if isinstance(rows, dict) else dict.fromkeys(objects, rows)
+    counts.setdefault("User", max(min(counts.values()) // 100, 10))
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for i, obj in enumerate(objects):
+        plan = plan_export(obj, empty_columns=empty_columns)
+        paths.append(write_export(plan, output_dir / f"{obj}.csv", counts[obj], counts, null_rate, encoding,
+                                   seed + i))
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Synthesize Salesforce exports with the real column sets.")
+    parser.add_argument("output_dir", type=Path)
+    parser.add_argument("--rows", type=int, default=10_000, help="Rows per object")
+    parser.add_argument("--object-rows", action="append", default=[], metavar="OBJECT=N",
+                        help="Override the row count of one object, e.g. Order=1000000")
+    parser.add_argument("--null-rate", type=float, default=0.3, help="Mean share of empty cells in populated columns")
+    parser.add_argument("--encoding", default="utf-8", help="utf-8, utf-8-sig or latin-1")
+    parser.add_argument("--objects", default=",".join(OBJECTS))
+    parser.add_argument("--no-empty-columns", action="store_true",
+                        help="Only emit data-dictionary columns, not the always-empty ones")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    objects = args.objects.split(",")
+    rows = dict.fromkeys(objects, args.rows)
+    for override in args.object_rows:
+        obj, count = override.split("=")
+        rows[obj] = int(count)
+    with tempfile.TemporaryDirectory(prefix="readiness-bench-cache-") as cache_dir:
+        use_scratch_dialect_cache(cache_dir)
+        paths = generate_exports(args.output_dir, rows, args.null_rate, args.encoding, objects,
+                                 not args.no_empty_columns, args.seed)
+    for path in paths:
+        print(f"  - {path}: {path.stat().st_size / 2**20:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import argparse
+import json
+import multiprocessing
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+import analyze_client_data as acd
+from generate_exports import OBJECTS, generate_exports, use_scratch_dialect_cache
+from atomic_io import atomic_write_json
+from instrumentation import _read_hwm_mb
+from report_renderer import render_client
+
+DEFAULT_SIZES = [10_000, 1_000_000, 10_000_000]
+STAGES = ["load_csv", "analyze_csv", "build_field_coverage_matrix", "generate_report"]
+# A stage counts as regressed when it is this much slower, or uses this much
+# more peak memory, than the baseline it is compared with.
+REGRESSION_RATIO = 1.2
+
+
+def _run_stage(stage, data_dir, cache_dir, inputs, queue):
+    # Runs in a fresh process so peak RSS belongs to this stage alone; the
+    # analyses a later stage needs come in as (small) dicts from the parent.
+    use_scratch_dialect_cache(cache_dir)
+    filepaths = [Path(data_dir) / f"{obj}.csv" for obj in OBJECTS if (Path(data_dir) / f"{obj}.csv").exists()]
+    output = {}
+    start = time.perf_counter()
+    if stage == "load_csv":
+        output["rows"] = sum(len(acd.load_csv(fp)) for fp in filepaths)
+    elif stage == "analyze_csv":
+        analyses = {}
+        for fp in filepaths:
+            analyses[fp.name], _ = acd.analyze_csv(fp)
+        output["analyses"] = analyses
+    elif stage == "build_field_coverage_matrix":
+        output["matrix"] = acd.build_field_coverage_matrix(inputs["analyses"])
+    elif stage == "generate_report":
+        with tempfile.TemporaryDirectory() as tmp:
+            render_client({"output_dir": tmp, "matrix": inputs["matrix"], "csv_analyses": inputs["analyses"],
+                           "mappings": acd.generate_mapping_json(inputs["matrix"], inputs["analyses"])},
+                          acd.FORTZA_LAYERS, acd.CLIENT_EXPECTATIONS)
+    output["seconds"] = round(time.perf_counter() - start, 4)
+    output["peak_rss_mb"] = round(_read_hwm_mb(), 1)
+    queue.put(output)
+
+
+def run_stage(stage, data_dir, cache_dir, inputs=None):
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=_run_stage, args=(stage, str(data_dir), str(cache_dir), inputs or {}, queue))
+    process.start()
+    output = queue.get()
+    process.join()
+    return output
+
+
+def run_size(rows, data_dir, cache_dir, null_rate, encoding):
+    start = time.perf_counter()
+    generate_exports(data_dir, rows, null_rate=null_rate, encoding=encoding)
+    generate_seconds = round(time.perf_counter() - start, 2)
+    data_bytes = sum(path.stat().st_size for path in Path(data_dir).glob("*.csv"))
+
+    results = {}
+    inputs = {}
+    for stage in STAGES:
+        output = run_stage(stage, data_dir, cache_dir, inputs)
+        inputs.update({key: output.pop(key) for key in ("analyses", "matrix") if key in output})
+        output.pop("rows", None)
+        results[stage] = output
+        print(f"    {stage:<28} {output['seconds']:>10.3f}s {output['peak_rss_mb']:>10.1f} MB peak RSS")
+    return {"rows_per_object": rows, "data_mb": round(data_bytes / 2**20, 1), "generate_seconds": generate_seconds,
+            "stages": results}
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(current, baseline):
+    # Stage-by-stage ratios against a previous results file.
+    regressions = []
+    for size, run in current["sizes"].items():
+        previous = baseline.get("sizes", {}).get(size)
+        if not previous:
+            continue
+        print(f"\n  {size} rows vs {baseline.get('revision', '?')}:")
+        for stage, result in run["stages"].items():
+            before = previous["stages"].get(stage)
+            if not before:
+                continue
+            time_ratio = result["seconds"] / before["seconds"] if before["seconds"] else float("inf")
+            rss_ratio = result["peak_rss_mb"] / before["peak_rss_mb"] if before["peak_rss_mb"] else float("inf")
+            flag = "  REGRESSION" if max(time_ratio, rss_ratio) > REGRESSION_RATIO else ""
+            print(f"    {stage:<28} time x{time_ratio:.2f}  rss x{rss_ratio:.2f}{flag}")
+            if flag:
+                regressions.append((size, stage))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the readiness pipeline stages on synthetic exports.")
+    parser.add_argument("--sizes", type=lambda s: [int(n) for n in s.split(",")], default=DEFAULT_SIZES,
+                        help="Comma-separated rows per object")
+    parser.add_argument("--null-rate", type=float, default=0.3)
+    parser.add_argument("--encoding", default="utf-8")
+    parser.add_argument("--data-dir", type=Path, default=None,
+                        help="Where exports are generated (a temporary directory by default)")
+    parser.add_argument("--results-dir", type=Path, default=ROOT / "benchmarks" / "results")
+    parser.add_argument("--compare", type=Path, default=None, help="Previous results JSON to compare against")
+    args = parser.parse_args(argv)
+
+    revision = git_revision()
+    results = {
+        "revision": revision,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "config": {"null_rate": args.null_rate, "encoding": args.encoding},
+        "sizes": {},
+    }
+    with tempfile.TemporaryDirectory(prefix="readiness-bench-cache-") as cache_dir:
+        use_scratch_dialect_cache(cache_dir)
+        for rows in args.sizes:
+            data_dir = args.data_dir / str(rows) if args.data_dir else Path(tempfile.mkdtemp(prefix="readiness-bench-"))
+            print(f"\n{rows} rows per object ({data_dir})")
+            try:
+                results["sizes"][str(rows)] = run_size(rows, data_dir, cache_dir, args.null_rate, args.encoding)
+            finally:
+                if args.data_dir is None:
+                    shutil.rmtree(data_dir, ignore_errors=True)
+
+    output = atomic_write_json(args.results_dir / f"bench-{datetime.now():%Y%m%d-%H%M%S}-{revision}.json", results)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f))
+        if regressions:
+            raise SystemExit(f"{len(regressions)} stage(s) regressed by more than {REGRESSION_RATIO}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from analyze_client_data import DEFAULT_CHUNKSIZE, WORKSPACE, detect_dialect, dialect_read_kwargs, load_csv, read_csv_header
+from atomic_io import atomic_write
+from entity_resolution import PERSON_ACCOUNT_FLAG, person_account_names
+from transforms import derive_full_name
+
+# Related records an Order points at. "via" is the Order column holding the
+# reference and "key" the column of the related file it must match; several
+# lookups may share one file and are then served by a single load.
+LOOKUPS = {
+    "account": {"file": "Account.csv", "key": "Id", "via": "AccountId"},
+    "dealer": {"file": "Account.csv", "key": "Id", "via": "POE_Dealer__c"},
+    "bill_to_contact": {"file": "Contact.csv", "key": "Id", "via": "BillToContactId"},
+    "account_contact": {"file": "Contact.csv", "key": "AccountId", "via": "AccountId"},
+    "converted_lead": {"file": "Lead.csv", "key": "ConvertedAccountId", "via": "AccountId"},
+    "owner": {"file": "User.csv", "key": "Id", "via": "OwnerId"},
+}
+
+# Sources of each canonical field in priority order; the first non-empty
+# value wins. "A+B" joins two name parts the way the report describes
+# customer_name derivation. Sources whose column is absent are skipped.
+# ("account", "Name") only counts on person accounts, as in identity
+# matching; the dealer lookup keeps the company name.
+CANONICAL_FIELDS = {
+    "order_date": [("order", "EffectiveDate"), ("order", "CreatedDate")],
+    "customer_name": [("account", "Name"), ("account", "FirstName+LastName"), ("bill_to_contact", "Name"),
+                      ("bill_to_contact", "FirstName+LastName"), ("account_contact", "FirstName+LastName"),
+                      ("converted_lead", "FirstName+LastName")],
+    "email": [("order", "Email__c"), ("order", "vlocity_cmt__Email__c"), ("account", "PersonEmail"),
+              ("account", "Fortza__Email__c"), ("bill_to_contact", "Email"), ("account_contact", "Email"),
+              ("converted_lead", "Email")],
+    "cust_street": [("order", "BillingStreet"), ("order", "ShippingStreet"), ("account", "BillingStreet"),
+                    ("account", "ShippingStreet")],
+    "cust_city": [("order", "BillingCity"), ("order", "ShippingCity"), ("account", "BillingCity"),
+                  ("account", "ShippingCity")],
+    "cust_state": [("order", "BillingStateCode"), ("order", "BillingState"), ("order", "ShippingState"),
+                   ("account", "BillingStateCode"), ("account", "BillingState"), ("account", "ShippingState")],
+    "zip_code": [("order", "BillingPostalCode"), ("order", "ShippingPostalCode"), ("account", "BillingPostalCode"),
+                 ("account", "ShippingPostalCode")],
+    "gender": [("account", "Fortza__Gender__c"), ("account", "Fortza__Gender__pc"),
+               ("account", "vlocity_cmt__Gender__pc"), ("bill_to_contact", "Fortza__Gender__c"),
+               ("account_contact", "Fortza__Gender__c")],
+    "salesperson_name": [("owner", "Name"), ("owner", "FirstName+LastName"), ("order", "SalesRep__c")],
+    "salesperson_id": [("order", "OwnerId")],
+    "dealer_name": [("dealer", "Name")],
+    "dealer_id": [("order", "POE_Dealer__c")],
+    "wireless_package": [("account", "Fortza__Wireless_Package__c"), ("account", "Fortza__Wireless_Package__pc"),
+                         ("account_contact", "Fortza__Wireless_Package__c")],
+    "Tntype": [("account", "Fortza__Tn_Type__c"), ("account", "Fortza__Tn_Type__pc"),
+               ("account_contact", "Fortza__Tn_Type__c")],
+    "Autopay": [("account", "Fortza__Auto_Pay__c"), ("account", "Fortza__Auto_Pay__pc"),
+                ("account_contact", "Fortza__Auto_Pay__c")],
+    "devicename": [("converted_lead", "Fortza__Device_Name__c")],
+    "devicetype": [("account", "Fortza__Device_Type__c"), ("account", "Fortza__Device_Type__pc"),
+                   ("account_contact", "Fortza__Device_Type__c")],
+    "store_number": [("account", "Fortza__Store_Number__c"), ("account", "Fortza__Store_Number__pc"),
+                     ("account", "POE_Store_Number__c"), ("account_contact", "Fortza__Store_Number__c")],
+    "ip": [("converted_lead", "Fortza__IP_Address__c")],
+    "install_date": [("order", "POE_InstallationDate__c")],
+    "activation_date": [("order", "ActivatedDate")],
+}
+
+
+def salesforce_key(values):
+    # 18-character Ids are the 15-character case-sensitive Id plus a checksum
+    # suffix, so both forms are matched on their first 15 characters.
+    return pd.Series(values, dtype=object).astype("string").str[:15]
+
+
+def _source_columns(column):
+    return column.split("+") if "+" in column else [column]
+
+
+def plan_canonical_join(workspace=WORKSPACE, fields=None):
+    fields = fields or list(CANONICAL_FIELDS)
+    headers = {}
+
+    def header(csv_file):
+        if csv_file not in headers:
+            path = Path(workspace) / csv_file
+            headers[csv_file] = set(read_csv_header(path)) if path.exists() else None
+        return headers[csv_file]
+
+    order_header = header("Order.csv")
+    if order_header is None:
+        raise FileNotFoundError(Path(workspace) / "Order.csv")
+    sources = {}
+    lookups = {}
+    for field in fields:
+        usable = []
+        for source, column in CANONICAL_FIELDS[field]:
+            if source == "order":
+                available = order_header
+            else:
+                lookup = LOOKUPS[source]
+                available = header(lookup["file"])
+                if available is None or lookup["key"] not in available or lookup["via"] not in order_header:
+                    continue
+            if all(part in available for part in _source_columns(column)):
+                usable.append((source, column))
+                if source != "order":
+                    lookups.setdefault(source, set()).update(_source_columns(column))
+                if (source, column) == ("account", "Name") and PERSON_ACCOUNT_FLAG in available:
+                    lookups[source].add(PERSON_ACCOUNT_FLAG)
+        sources[field] = usable
+
+    order_columns = {"Id"} | {column for field in fields for source, column in sources[field] if source == "order"}
+    order_columns |= {LOOKUPS[source]["via"] for source in lookups}
+    files = {}
+    for source, columns in lookups.items():
+        lookup = LOOKUPS[source]
+        files.setdefault(lookup["file"], set()).update(columns | {lookup["key"]})
+    return {
+        "workspace": Path(workspace),
+        "fields": fields,
+        "sources": sources,
+        "lookups": {source: sorted(columns) for source, columns in lookups.items()},
+        "order_columns": sorted(order_columns & order_header),
+        "files": {csv_file: sorted(columns) for csv_file, columns in files.items()},
+    }
+
+
+def _column_values(frame, column):
+    if "+" not in column:
+        return frame[column].to_numpy(dtype=object)
+    first, last = _source_columns(column)
+    return derive_full_name(frame[first], frame[last]).to_numpy(dtype=object, na_value=None)
+
+
+def build_lookup_tables(plan):
+    # One projected load per related file, read as text so Ids and zip codes
+    # keep their exact form, then one hash index per lookup key. Duplicate
+    # keys keep their first record, e.g. the first Contact of an Account.
+    # Every source column, derived names included, is materialized here once
+    # so order chunks only gather from it.
+    frames = {csv_file: load_csv(plan["workspace"] / csv_file, usecols=columns, dtype=str)
+              for csv_file, columns in plan["files"].items()}
+    tables = {}
+    for source in plan["lookups"]:
+        lookup = LOOKUPS[source]
+        frame = frames[lookup["file"]]
+        keys = salesforce_key(frame[lookup["key"]].to_numpy())
+        keep = keys.notna() & ~keys.duplicated()
+        frame = frame.loc[keep.to_numpy(), plan["lookups"][source]].reset_index(drop=True)
+        if source == "account" and "Name" in frame.columns:
+            frame = frame.assign(Name=person_account_names(frame))
+        columns = {column for field in plan["fields"] for src, column in plan["sources"][field] if src == source}
+        tables[source] = {
+            "index": pd.Index(keys[keep].to_numpy()),
+            "values": {column: _column_values(frame, column) for column in columns},
+        }
+    return tables
+
+
+def canonical_batch(plan, tables, orders):
+    positions = {}
+    for source, table in tables.items():
+        via = salesforce_key(orders[LOOKUPS[source]["via"]].to_numpy())
+        positions[source] = table["index"].get_indexer(via.fillna("").to_numpy())
+
+    batch = {"order_id": orders["Id"].to_numpy(dtype=object)}
+    for field in plan["fields"]:
+        values = np.full(len(orders), None, dtype=object)
+        unresolved = np.ones(len(orders), dtype=bool)
+        for source, column in plan["sources"][field]:
+            if source == "order":
+                candidate = _column_values(orders, column)
+            else:
+                found = positions[source] >= 0
+                candidate = np.full(len(orders), None, dtype=object)
+                candidate[found] = tables[source]["values"][column][positions[source][found]]
+            usable = unresolved & pd.notna(candidate) & (candidate != "")
+            values[usable] = candidate[usable]
+            unresolved &= ~usable
+            if not unresolved.any():
+                break
+        batch[field] = values
+    return pd.DataFrame(batch)
+
+
+def iter_canonical_records(workspace=WORKSPACE, chunksize=DEFAULT_CHUNKSIZE, fields=None):
+    # Orders are streamed in chunks; every lookup is a vectorized
+    # get_indexer probe into a prebuilt index, so memory stays at the lookup
+    # projections plus one chunk and nothing is ever cross-joined.
+    plan = plan_canonical_join(workspace, fields)
+    tables = build_lookup_tables(plan)
+    order_path = plan["workspace"] / "Order.csv"
+    read_kwargs = dialect_read_kwargs(detect_dialect(order_path))
+    with pd.read_csv(order_path, usecols=plan["order_columns"], dtype=str, chunksize=chunksize,
+                     low_memory=False, **read_kwargs) as reader:
+        for orders in reader:
+            yield canonical_batch(plan, tables, orders)
+
+
+def write_canonical_records(output_path, workspace=WORKSPACE, chunksize=DEFAULT_CHUNKSIZE):
+    def write(f):
+        total_rows = 0
+        for i, batch in enumerate(iter_canonical_records(workspace, chunksize)):
+            batch.to_csv(f, index=False, header=i == 0)
+            total_rows += len(batch)
+        return total_rows
+
+    return atomic_write(output_path, write, newline="")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Materialize the per-order Fortza canonical record.")
+    parser.add_argument("--workspace", type=Path, default=WORKSPACE)
+    parser.add_argument("--output", type=Path, default=None)
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    args = parser.parse_args(argv)
+
+    output = args.output or args.workspace / "canonical_orders.csv"
+    plan = plan_canonical_join(args.workspace)
+    print("Resolved sources:")
+    for field in plan["fields"]:
+        sources = ", ".join(f"{source}.{column}" for source, column in plan["sources"][field]) or "none"
+        print(f"  - {field}: {sources}")
+    rows = write_canonical_records(output, args.workspace, args.chunksize)
+    print(f"\n✅ {rows} canonical records written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+from atomic_io import atomic_write_json
+
+HASH_BLOCK_BYTES = 8 * 2**20
+DEFAULT_MAX_BYTES = 2 * 2**30
+
+
+def content_hash(filepath):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(filepath, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_BYTES), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ColumnarCache:
+    # Parsed exports stored as uncompressed Arrow IPC files so a hit can be
+    # memory-mapped straight back into a DataFrame. Entries are keyed by
+    # content hash, size and mtime; the index keeps sizes and last access
+    # times for LRU eviction once the cache grows past max_bytes. A partial
+    # entry holds only some of the export's columns and serves only
+    # projections onto them.
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        self._hashes = {}
+
+    @property
+    def available(self):
+        return pa is not None
+
+    def _index_path(self):
+        return self.cache_dir / "index.json"
+
+    def _load_index(self):
+        try:
+            with open(self._index_path(), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"entries": {}, "hashes": {}}
+
+    def _save_index(self, index):
+        atomic_write_json(self._index_path(), index)
+
+    def key(self, filepath, index=None):
+        # The content hash is only recomputed when size or mtime moved, which
+        # is always the case when a client re-sends a file.
+        stat = os.stat(filepath)
+        fingerprint = f"{Path(filepath).resolve()}:{stat.st_size}:{stat.st_mtime_ns}"
+        if fingerprint not in self._hashes:
+            known = (index or {}).get("hashes", {}).get(fingerprint)
+            self._hashes[fingerprint] = known or content_hash(filepath)
+        digest = self._hashes[fingerprint]
+        if index is not None:
+            index.setdefault("hashes", {})[fingerprint] = digest
+        return f"{digest}-{stat.st_size}-{stat.st_mtime_ns}"
+
+    def path_for(self, filepath):
+        # The Arrow file of a cached export, for readers that map it directly.
+        index = self._load_index()
+        key = self.key(filepath, index)
+        entry = index["entries"].get(key)
+        path = self.cache_dir / f"{key}.arrow"
+        return path if entry is not None and entry.get("complete", True) and path.exists() else None
+
+    def get(self, filepath, columns=None):
+        index = self._load_index()
+        key = self.key(filepath, index)
+        entry = index["entries"].get(key)
+        path = self.cache_dir / f"{key}.arrow"
+        if entry is None or not path.exists() or (columns is None and not entry.get("complete", True)):
+            self.stats["misses"] += 1
+            return None
+        table = pa.ipc.open_file(pa.memory_map(str(path), "r")).read_all()
+        if columns is not None:
+            wanted = set(columns)
+            if not wanted <= set(table.column_names):
+                self.stats["misses"] += 1
+                return None
+            table = table.select([name for name in table.column_names if name in wanted])
+        entry["last_access"] = time.time()
+        self._save_index(index)
+        self.stats["hits"] += 1
+        return table.to_pandas()
+
+    def put(self, filepath, df, complete=True):
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            return False
+        index = self._load_index()
+        key = self.key(filepath, index)
+        if not complete and index["entries"].get(key, {}).get("complete", False):
+            return False
+        source = str(Path(filepath).resolve())
+        for stale_key in [k for k, e in index["entries"].items() if e["source"] == source and k != key]:
+            self._remove(index, stale_key)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self.cache_dir / f"{key}.arrow"
+        with pa.OSFile(str(path), "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        index["entries"][key] = {"source": source, "bytes": path.stat().st_size, "last_access": time.time(),
+                                 "complete": complete}
+        self.stats["stores"] += 1
+        self._evict(index, keep=key)
+        self._save_index(index)
+        return True
+
+    def _remove(self, index, key):
+        index["entries"].pop(key, None)
+        try:
+            os.remove(self.cache_dir / f"{key}.arrow")
+        except FileNotFoundError:
+            pass
+
+    def _evict(self, index, keep=None):
+        entries = index["entries"]
+        total = sum(e["bytes"] for e in entries.values())
+        for key in sorted(entries, key=lambda k: entries[k]["last_access"]):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            total -= entries[key]["bytes"]
+            self._remove(index, key)
+            self.stats["evictions"] += 1
+        live = {key.split("-")[0] for key in entries}
+        index["hashes"] = {fp: digest for fp, digest in index.get("hashes", {}).items() if digest in live}
@@ -0,0 +1,252 @@
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+from analyze_client_data import (BOOL_LITERALS, CACHE_DIR, CLIENT_EXPECTATIONS, FORTZA_LAYERS, SAMPLE_SIZE,
+                                 SAMPLE_WINDOW, WORKSPACE, build_field_coverage_matrix, cardinality_columns_for,
+                                 detect_dialect, generate_mapping_json, mapping_status_counts)
+from columnar_cache import ColumnarCache
+from report_renderer import render_client
+
+OBJECTS = ["Account.csv", "Contact.csv", "Lead.csv", "Opportunity.csv", "Order.csv"]
+DATABASE_PATH = CACHE_DIR / "exports.duckdb"
+SPILL_DIR = CACHE_DIR / "duckdb_spill"
+# pandas' default NA strings, so NULL in SQL is NaN in analyze_csv.
+NA_STRINGS = ["", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN", "<NA>",
+              "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null"]
+INTEGER_PATTERN = r"\s*[+-]?[0-9]+\s*"
+MAX_LINE_BYTES = 64 * 2**20
+
+
+def _ident(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _literal(value):
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def connect(database=DATABASE_PATH, memory_limit=None, threads=None):
+    # File-backed so views over the exports persist between sessions; sorts
+    # and DISTINCT hash tables past memory_limit spill to SPILL_DIR.
+    if duckdb is None:
+        raise RuntimeError("the DuckDB backend needs the duckdb package (pip install duckdb)")
+    Path(database).parent.mkdir(parents=True, exist_ok=True)
+    con = duckdb.connect(str(database))
+    SPILL_DIR.mkdir(parents=True, exist_ok=True)
+    con.execute(f"SET temp_directory = {_literal(SPILL_DIR)}")
+    con.execute("SET preserve_insertion_order = true")
+    if memory_limit:
+        con.execute(f"SET memory_limit = {_literal(memory_limit)}")
+    if threads:
+        con.execute(f"SET threads = {int(threads)}")
+    return con
+
+
+def read_csv_sql(filepath):
+    # Every column is read as text and typed afterwards the way pandas would,
+    # so counts and samples match analyze_csv exactly.
+    dialect = detect_dialect(filepath)
+    encoding = "utf-8" if dialect["encoding"].startswith("utf-8") else dialect["encoding"]
+    options = {
+        "header": "true",
+        "all_varchar": "true",
+        "delim": _literal(dialect["sep"]),
+        "quote": _literal(dialect["quotechar"]),
+        "escape": _literal(dialect["quotechar"]),
+        "nullstr": "[" + ", ".join(_literal(na) for na in NA_STRINGS) + "]",
+        "null_padding": "true",
+        "max_line_size": str(MAX_LINE_BYTES),
+        "encoding": _literal(encoding),
+    }
+    return f"read_csv({_literal(Path(filepath).resolve())}, " + ", ".join(f"{k} = {v}" for k, v in options.items()) + ")"
+
+
+def register_exports(con, workspace=WORKSPACE, objects=OBJECTS, columnar=False):
+    # One relation per export, named after the object. CSV views are stored in
+    # the database file; with columnar=True, exports in the columnar cache are
+    # memory-mapped Arrow tables registered on this connection instead.
+    cache = ColumnarCache(CACHE_DIR / "columnar") if columnar and pa is not None else None
+    views = {}
+    for csv_file in objects:
+        filepath = Path(workspace) / csv_file
+        if not filepath.exists():
+            continue
+        name = Path(csv_file).stem
+        arrow_path = cache.path_for(filepath) if cache else None
+        if arrow_path is not None:
+            name = f"{name}_columnar"
+            con.register(name, pa.ipc.open_file(pa.memory_map(str(arrow_path), "r")).read_all())
+        else:
+            con.execute(f"CREATE OR REPLACE VIEW {_ident(name)} AS SELECT * FROM {read_csv_sql(filepath)}")
+        views[csv_file] = name
+    return views
+
+
+def relation_columns(con, view):
+    return [column[0] for column in con.execute(f"SELECT * FROM {_ident(view)} LIMIT 0").description]
+
+
+def profile_query(view, columns, cardinality_columns=()):
+    # One scan of the export for all columns: non-null, integer-, number- and
+    # boolean-parseable counts, plus DISTINCT counts for the ranked columns.
+    true_false = "(" + ", ".join(_literal(value) for value in BOOL_LITERALS) + ")"
+    select = ["count(*)"]
+    for column in columns:
+        value = f"CAST({_ident(column)} AS VARCHAR)"
+        select += [
+            f"count({value})",
+            f"count(*) FILTER (WHERE regexp_full_match({value}, {_literal(INTEGER_PATTERN)}))",
+            f"count(TRY_CAST({value} AS DOUBLE))",
+            f"count(*) FILTER (WHERE {value} IN {true_false})",
+        ]
+        if column in cardinality_columns:
+            select += [f"count(DISTINCT {value})", f"count(DISTINCT TRY_CAST({value} AS DOUBLE))",
+                       f"count(DISTINCT lower({value}))"]
+    return f"SELECT {', '.join(select)} FROM {_ident(view)}"
+
+
+def resolve_dtype(rows, non_null, integers, numbers, booleans):
+    # The dtype a single low_memory=False pandas read gives the column.
+    if not rows:
+        return "object"
+    if not non_null:
+        return "float64"
+    if booleans == non_null:
+        return "bool" if non_null == rows else "object"
+    if integers == non_null:
+        return "int64" if non_null == rows else "float64"
+    if numbers == non_null:
+        return "float64"
+    return "object"
+
+
+def typed_sample(value, dtype, booleans_only):
+    if dtype == "int64":
+        return int(value)
+    if dtype == "float64":
+        return float(value)
+    if dtype == "bool" or booleans_only:
+        return BOOL_LITERALS[value]
+    return value
+
+
+def head_samples(con, view, columns, sample_size=SAMPLE_SIZE):
+    # First non-null values in file order, widening the scanned head window
+    # only while some columns are still short, as _sample_values does.
+    samples = {column: [] for column in columns}
+    pending = list(columns)
+    window = SAMPLE_WINDOW
+    while pending:
+        select = ", ".join(f"CAST({_ident(column)} AS VARCHAR)" for column in pending)
+        rows = con.execute(f"SELECT {select} FROM {_ident(view)} LIMIT {window}").fetchall()
+        still_pending = []
+        for j, column in enumerate(pending):
+            values = [row[j] for row in rows if row[j] is not None][:sample_size]
+            if len(values) >= sample_size or len(rows) < window:
+                samples[column] = values
+            else:
+                still_pending.append(column)
+        pending = still_pending
+        window *= 8
+    return samples
+
+
+def analyze_export(con, view, filepath, cardinality=False):
+    # Same dict as analyze_csv's analysis for the export behind `view`.
+    columns = relation_columns(con, view)
+    cardinality_columns = cardinality_columns_for(filepath, cardinality) & set(columns)
+    counts = iter(con.execute(profile_query(view, columns, cardinality_columns)).fetchone())
+    rows = next(counts)
+    stats = {}
+    for column in columns:
+        non_null, integers, numbers, booleans = (next(counts) for _ in range(4))
+        dtype = resolve_dtype(rows, non_null, integers, numbers, booleans)
+        stats[column] = {"dtype": dtype, "null_count": rows - non_null, "booleans_only": 0 < booleans == non_null}
+        if column in cardinality_columns:
+            text, numeric, lowered = (next(counts) for _ in range(3))
+            stats[column]["distinct_count"] = numeric if dtype in ("int64", "float64") else \
+                lowered if stats[column]["booleans_only"] else text
+
+    samples = head_samples(con, view, columns)
+    profiles = []
+    for column in columns:
+        column_stats = stats[column]
+        col_info = {
+            "name": column,
+            "dtype": column_stats["dtype"],
+            "null_count": column_stats["null_count"],
+            "null_pct": np.round(np.int64(column_stats["null_count"]) / rows * 100, 1) if rows > 0 else 0,
+            "sample_values": [typed_sample(value, column_stats["dtype"], column_stats["booleans_only"])
+                              for value in samples[column]]
+        }
+        if "distinct_count" in column_stats:
+            col_info["distinct_count"] = column_stats["distinct_count"]
+        profiles.append(col_info)
+    return {
+        "filename": Path(filepath).name,
+        "total_rows": rows,
+        "total_columns": len(columns),
+        "columns": profiles,
+        "dialect": detect_dialect(filepath)
+    }
+
+
+def analyze_exports(con, workspace=WORKSPACE, objects=OBJECTS, cardinality=False, columnar=False):
+    views = register_exports(con, workspace, objects, columnar)
+    return {csv_file: analyze_export(con, view, Path(workspace) / csv_file, cardinality)
+            for csv_file, view in views.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profile the exports with DuckDB instead of loading them into pandas.")
+    parser.add_argument("--workspace", type=Path, default=WORKSPACE)
+    parser.add_argument("--database", type=Path, default=DATABASE_PATH)
+    parser.add_argument("--memory-limit", default=None, help="DuckDB memory limit, e.g. 4GB; larger work spills to disk")
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--columnar", action="store_true",
+                        help="Query exports held in the columnar cache from their Arrow files")
+    parser.add_argument("--rank-sources", action="store_true")
+    parser.add_argument("--sql", action="append", default=[],
+                        help="Ad-hoc query to run against the registered exports (repeatable)")
+    parser.add_argument("--output-dir", type=Path, default=None,
+                        help="Also write mapping.json and REPORT_data_readiness.md here")
+    args = parser.parse_args(argv)
+
+    con = connect(args.database, args.memory_limit, args.threads)
+    if args.sql:
+        register_exports(con, args.workspace, columnar=args.columnar)
+        for query in args.sql:
+            result = con.execute(query)
+            print("\t".join(column[0] for column in result.description))
+            for row in result.fetchall():
+                print("\t".join("" if value is None else str(value) for value in row))
+        return
+
+    start = time.perf_counter()
+    csv_analyses = analyze_exports(con, args.workspace, cardinality=args.rank_sources, columnar=args.columnar)
+    for csv_file, analysis in csv_analyses.items():
+        print(f"  - {csv_file}: {analysis['total_rows']} rows, {analysis['total_columns']} columns")
+    matrix = build_field_coverage_matrix(csv_analyses, rank=args.rank_sources)
+    present, _ = mapping_status_counts(matrix)
+    print(f"\nProfiled in {time.perf_counter() - start:.2f}s: {present} of {len(matrix)} fields present")
+    if args.output_dir:
+        render_client({"output_dir": args.output_dir, "matrix": matrix, "csv_analyses": csv_analyses,
+                       "mappings": generate_mapping_json(matrix, csv_analyses)}, FORTZA_LAYERS, CLIENT_EXPECTATIONS)
+        print(f"   - mapping.json, REPORT_data_readiness.md: written to {args.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
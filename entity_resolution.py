@@ -0,0 +1,236 @@
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from analyze_client_data import FIELD_MAPPINGS, WORKSPACE, clean_column_name, load_csv, read_csv_header
+from atomic_io import atomic_write, atomic_write_json
+from transforms import coalesce_columns, normalize_email, normalize_name, normalize_street
+
+IDENTITY_OBJECTS = ["Account.csv", "Contact.csv", "Lead.csv"]
+IDENTITY_FIELDS = ["customer_name", "email", "cust_street", "zip_code"]
+# The exact normalized email and full name come first, so records sharing
+# either are always compared even when their broader blocks are split.
+BLOCKING_KEYS = ["email", "name", "zip5", "email_domain", "name_key"]
+# Where each object keeps a person's name, in priority order. FIELD_MAPPINGS
+# lists Lead.Company and business Account names for customer_name, which
+# would let two people at one company and zip match on name; identity
+# matching only uses these. An Account's Name counts only on person
+# accounts.
+PERSON_NAME_COLUMNS = {
+    "Account.csv": ["FirstName+LastName", "Name"],
+    "Contact.csv": ["FirstName+LastName", "Name"],
+    "Lead.csv": ["FirstName+LastName", "Name"],
+}
+PERSON_ACCOUNT_FLAG = "IsPersonAccount"
+# Blocks bigger than this (gmail.com, a dense zip, a common surname) would
+# dominate the pair count while adding little. They are split into
+# sub-blocks by a second key, and only sub-blocks still over the cap are
+# skipped and reported so the cap can be tuned.
+MAX_BLOCK_SIZE = 500
+SUB_BLOCK_KEYS = {"email": "name_key", "name": "zip5", "zip5": "name_key", "email_domain": "name_key",
+                  "name_key": "zip5"}
+
+SOUNDEX_TABLE = str.maketrans({
+    **{c: "1" for c in "BFPV"}, **{c: "2" for c in "CGJKQSXZ"}, **{c: "3" for c in "DT"}, "L": "4",
+    **{c: "5" for c in "MN"}, "R": "6", **{c: "0" for c in "AEIOUY"}, "H": None, "W": None,
+})
+
+
+def soundex(values):
+    # American Soundex with string operations only: letters are coded,
+    # runs of a code collapse (vowels, coded 0, separate runs; H and W do
+    # not), then the zeros are dropped and the first letter restored.
+    letters = pd.Series(values).astype("string").str.upper().str.replace(r"[^A-Z]", "", regex=True)
+    letters = letters.mask(letters == "")
+    coded = letters.str.translate(SOUNDEX_TABLE).str.replace(r"(\d)\1+", r"\1", regex=True)
+    tail = coded.str[1:].str.replace("0", "", regex=False)
+    return letters.str[0] + (tail + "000").str[:3]
+
+
+def phonetic_name_key(names):
+    # First initial plus the Soundex of the last token: "Jon Smyth" and
+    # "John Smith" share J-S530.
+    tokens = pd.Series(names).astype("string").str.split()
+    return tokens.str[0].str[0].str.upper() + "-" + soundex(tokens.str[-1])
+
+
+def person_account_names(frame):
+    # Account Name on person accounts; business and dealer Accounts name a
+    # company, so theirs is missing.
+    person = frame[PERSON_ACCOUNT_FLAG].astype("string").str.strip().str.lower() == "true" \
+        if PERSON_ACCOUNT_FLAG in frame.columns else pd.Series(False, index=frame.index)
+    return frame["Name"].where(person.fillna(False).to_numpy())
+
+
+def person_names(frame, csv_file):
+    if csv_file == "Account.csv" and "Name" in frame.columns:
+        frame = frame.assign(Name=person_account_names(frame))
+    return coalesce_columns(frame, PERSON_NAME_COLUMNS.get(csv_file, []))
+
+
+def _identity_columns(field, csv_file):
+    if field == "customer_name":
+        columns = {part for column in PERSON_NAME_COLUMNS.get(csv_file, []) for part in column.split("+")}
+        return columns | {PERSON_ACCOUNT_FLAG} if csv_file == "Account.csv" else columns
+    return {part for mapped_col in FIELD_MAPPINGS[field].get(csv_file) or []
+            for part in clean_column_name(mapped_col).split("+")}
+
+
+def load_identity_records(workspace=WORKSPACE, objects=IDENTITY_OBJECTS, fields=IDENTITY_FIELDS):
+    # Only the columns behind the requested fields (plus Id) are parsed from
+    # each object: FIELD_MAPPINGS' columns, and PERSON_NAME_COLUMNS for the
+    # name.
+    frames = []
+    for csv_file in objects:
+        path = Path(workspace) / csv_file
+        if not path.exists():
+            continue
+        header = set(read_csv_header(path))
+        wanted = {"Id"}.union(*(_identity_columns(field, csv_file) for field in fields))
+        raw = load_csv(path, usecols=sorted(wanted & header), dtype=str)
+        records = pd.DataFrame({
+            "object": csv_file.removesuffix(".csv"),
+            "record_id": raw["Id"] if "Id" in raw.columns else pd.Series(raw.index.astype(str)),
+        })
+        for field in fields:
+            records[field] = person_names(raw, csv_file) if field == "customer_name" else \
+                coalesce_columns(raw, [clean_column_name(col) for col in FIELD_MAPPINGS[field].get(csv_file) or []])
+        frames.append(records)
+    if not frames:
+        return pd.DataFrame(columns=["object", "record_id"] + list(fields))
+    return pd.concat(frames, ignore_index=True)
+
+
+def normalize_identities(records):
+    normalized = pd.DataFrame({"object": records["object"], "record_id": records["record_id"]})
+    normalized["name"] = normalize_name(records["customer_name"]).str.lower()
+    normalized["email"] = normalize_email(records["email"])
+    normalized["street"] = normalize_street(records["cust_street"]).str.upper()
+    normalized["zip5"] = records["zip_code"].astype("string").str.extract(r"^\s*(\d{5})", expand=False)
+    normalized["email_domain"] = normalized["email"].str.extract(r"@([^@\s]+)$", expand=False)
+    normalized["name_key"] = phonetic_name_key(normalized["name"])
+    return normalized
+
+
+def _oversized_blocks(keys, max_block_size):
+    block_sizes = keys.value_counts()
+    return block_sizes.index[block_sizes > max_block_size]
+
+
+def candidate_pairs(normalized, blocking_keys=BLOCKING_KEYS, max_block_size=MAX_BLOCK_SIZE):
+    pairs = []
+    skipped = {}
+    for key in blocking_keys:
+        keys = normalized[key].astype("string")
+        oversized = _oversized_blocks(keys, max_block_size)
+        if oversized.size and key in SUB_BLOCK_KEYS:
+            split = keys.isin(oversized)
+            keys = keys.where(~split, keys + "|" + normalized[SUB_BLOCK_KEYS[key]].astype("string"))
+            oversized = _oversized_blocks(keys, max_block_size)
+        skipped[key] = int(oversized.size)
+        block_sizes = keys.value_counts()
+        usable = keys.notna() & ~keys.isin(oversized) & keys.isin(block_sizes.index[block_sizes > 1])
+        block = pd.DataFrame({"key": keys[usable].to_numpy(), "row": np.flatnonzero(usable.to_numpy())})
+        merged = block.merge(block, on="key", suffixes=("_a", "_b"))
+        merged = merged[merged["row_a"] < merged["row_b"]]
+        pairs.append(merged[["row_a", "row_b"]].to_numpy())
+    if not pairs:
+        return np.empty((0, 2), dtype=np.int64), skipped
+    return np.unique(np.concatenate(pairs), axis=0), skipped
+
+
+def score_pairs(normalized, pairs):
+    # Same email, or same name at the same street or zip, or a phonetic name
+    # match at the same street and zip, links two records.
+    a, b = pairs[:, 0], pairs[:, 1]
+
+    def same(column):
+        left = normalized[column].to_numpy(dtype=object, na_value=None)[a]
+        right = normalized[column].to_numpy(dtype=object, na_value=None)[b]
+        return pd.notna(left) & (left == right)
+
+    email, name, name_key = same("email"), same("name"), same("name_key")
+    street, zip5 = same("street"), same("zip5")
+    matched = email | (name & (street | zip5)) | (name_key & street & zip5)
+    score = 0.45 * email + 0.25 * name + 0.1 * name_key + 0.15 * street + 0.05 * zip5
+    return matched, score
+
+
+def connected_components(n, edges):
+    # Union-find as min-label propagation with pointer jumping, so every
+    # step is an array operation over all edges at once.
+    labels = np.arange(n)
+    if len(edges) == 0:
+        return labels
+    a, b = edges[:, 0], edges[:, 1]
+    while True:
+        previous = labels.copy()
+        np.minimum.at(labels, a, labels[b])
+        np.minimum.at(labels, b, labels[a])
+        labels = labels[labels]
+        if np.array_equal(labels, previous):
+            return labels
+
+
+def resolve_identities(workspace=WORKSPACE, max_block_size=MAX_BLOCK_SIZE):
+    timings = {}
+    start = time.perf_counter()
+    normalized = normalize_identities(load_identity_records(workspace))
+    timings["load_and_normalize"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pairs, skipped = candidate_pairs(normalized, max_block_size=max_block_size)
+    timings["blocking"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    matched, _ = score_pairs(normalized, pairs)
+    labels = connected_components(len(normalized), pairs[matched])
+    timings["matching_and_clustering"] = time.perf_counter() - start
+
+    normalized["cluster_id"] = labels
+    return normalized, cluster_stats(normalized, len(pairs), int(matched.sum()), skipped, timings)
+
+
+def cluster_stats(resolved, candidate_count, match_count, skipped_blocks, timings):
+    sizes = resolved.groupby("cluster_id").size()
+    objects = resolved.groupby("cluster_id")["object"].nunique()
+    return {
+        "records": int(len(resolved)),
+        "records_by_object": {k: int(v) for k, v in resolved["object"].value_counts().sort_index().items()},
+        "candidate_pairs": candidate_count,
+        "matched_pairs": match_count,
+        "skipped_oversized_blocks": skipped_blocks,
+        "clusters": int(sizes.size),
+        "multi_record_clusters": int((sizes > 1).sum()),
+        "cross_object_clusters": int((objects > 1).sum()),
+        "largest_cluster": int(sizes.max()) if sizes.size else 0,
+        "timings_sec": {k: round(v, 4) for k, v in timings.items()},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cluster Account, Contact and Lead records that are the same person.")
+    parser.add_argument("--workspace", type=Path, default=WORKSPACE)
+    parser.add_argument("--max-block-size", type=int, default=MAX_BLOCK_SIZE)
+    parser.add_argument("--clusters-output", type=Path, default=None,
+                        help="Optional CSV of record_id -> cluster_id assignments")
+    args = parser.parse_args(argv)
+
+    resolved, stats = resolve_identities(args.workspace, args.max_block_size)
+    atomic_write_json(args.workspace / "entity_clusters.json", stats)
+    if args.clusters_output:
+        atomic_write(args.clusters_output, lambda f: resolved[["object", "record_id", "cluster_id"]].to_csv(
+            f, index=False), newline="")
+
+    print(f"Identity records: {stats['records']} ({stats['records_by_object']})")
+    print(f"  - candidate pairs: {stats['candidate_pairs']}, matched: {stats['matched_pairs']}")
+    print(f"  - clusters: {stats['clusters']} ({stats['multi_record_clusters']} with several records, "
+          f"{stats['cross_object_clusters']} spanning objects)")
+    print(f"   - entity_clusters.json: Generated")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from analyze_client_data import CACHE_DIR, DEFAULT_CHUNKSIZE, FORTZA_LAYERS, WORKSPACE
+from atomic_io import atomic_write, atomic_write_json
+from canonical_record import iter_canonical_records
+from transforms import clean_text, day_ordinal
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+STORE_DIR = CACHE_DIR / "feature_store"
+CONSUMER_LAYERS = ["Anomaly Layer", "Intenso", "Energico"]
+FEATURE_FIELDS = FORTZA_LAYERS["Anomaly Layer"]["required_fields"]
+# Entities whose order velocity is tracked; the first populated column of
+# the canonical record identifies the entity.
+ENTITY_KEYS = {
+    "salesperson": ["salesperson_id", "salesperson_name"],
+    "dealer": ["dealer_id", "dealer_name"],
+    "store": ["store_number"],
+}
+VELOCITY_WINDOWS = [1, 7, 30]
+CATEGORICAL_FIELDS = ["salesperson_name", "dealer_name", "store_number", "devicetype", "devicename",
+                      "wireless_package", "Tntype", "Autopay", "gender", "cust_state", "cust_city"]
+# Day ordinals stay well below this, so code * DAY_SPAN + day sorts by
+# entity first and date second.
+DAY_SPAN = 1_000_000
+
+
+def _write_frame(frame, path_stem):
+    # Arrow IPC when pyarrow is installed, pickle otherwise; readers accept
+    # whichever of the two is present.
+    suffix = ".arrow" if pa is not None else ".pkl"
+    if pa is not None:
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+
+        def write(sink):
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+    else:
+        def write(sink):
+            frame.to_pickle(sink)
+    atomic_write(f"{path_stem}{suffix}", write, mode="wb")
+    Path(f"{path_stem}{'.pkl' if suffix == '.arrow' else '.arrow'}").unlink(missing_ok=True)
+
+
+def _read_frame(path_stem):
+    if pa is not None and Path(f"{path_stem}.arrow").exists():
+        return pa.ipc.open_file(pa.memory_map(f"{path_stem}.arrow", "r")).read_all().to_pandas()
+    if Path(f"{path_stem}.pkl").exists():
+        return pd.read_pickle(f"{path_stem}.pkl")
+    return None
+
+
+def new_store():
+    return {"state": {"as_of": None, "vocab": {field: [] for field in CATEGORICAL_FIELDS}},
+            "orders": None, "events": None, "entities": None}
+
+
+def load_store(store_dir=STORE_DIR):
+    store_dir = Path(store_dir)
+    try:
+        with open(store_dir / "state.json", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return new_store()
+    return {
+        "state": state,
+        "orders": _read_frame(store_dir / "orders"),
+        "events": _read_frame(store_dir / "events"),
+        "entities": _read_frame(store_dir / "entities"),
+    }
+
+
+def save_store(store, store_dir=STORE_DIR):
+    store_dir = Path(store_dir)
+    for name in ("orders", "events", "entities"):
+        _write_frame(store[name], store_dir / name)
+    atomic_write_json(store_dir / "state.json", store["state"])
+
+
+def encode_categoricals(orders, vocab):
+    # Codes are append-only (0 is missing) so an order keeps its codes as
+    # the vocabulary grows with later batches.
+    codes = {}
+    for field in CATEGORICAL_FIELDS:
+        values = clean_text(orders[field]) if field in orders.columns else pd.Series(pd.NA, index=orders.index, dtype="string")
+        known = vocab.setdefault(field, [])
+        unseen = pd.unique(values.dropna()[~values.dropna().isin(known)])
+        known.extend(str(v) for v in unseen)
+        codes[f"{field}_code"] = pd.Index(known).get_indexer(values.fillna("").to_numpy()) + 1
+    return pd.DataFrame(codes, index=orders.index)
+
+
+def entity_events(orders):
+    frames = []
+    for entity, columns in ENTITY_KEYS.items():
+        value = pd.Series(pd.NA, index=orders.index, dtype="string")
+        for column in columns:
+            if column in orders.columns:
+                value = value.fillna(clean_text(orders[column]))
+        keep = value.notna() & orders["order_day"].notna()
+        frames.append(pd.DataFrame({
+            "entity": entity, "value": value[keep].astype(str),
+            "day": orders.loc[keep, "order_day"].astype(np.int64), "order_id": orders.loc[keep, "order_id"],
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def velocity_features(events, windows=VELOCITY_WINDOWS):
+    # Per event, as of that order: orders by the same entity in the trailing
+    # windows (itself and earlier orders, today included) and days since the
+    # entity's previous order. One stable sort by (entity, day) and one
+    # searchsorted per window cover every entity.
+    codes = pd.factorize(events["entity"] + "\x1f" + events["value"])[0].astype(np.int64)
+    keys = codes * DAY_SPAN + events["day"].to_numpy(dtype=np.int64)
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    positions = np.arange(1, len(sorted_keys) + 1)
+    features = pd.DataFrame(index=events.index[order])
+    for window in windows:
+        lo = np.searchsorted(sorted_keys, sorted_keys - (window - 1), side="left")
+        features[f"orders_{window}d"] = positions - lo
+    same_entity = np.r_[False, codes[order][1:] == codes[order][:-1]]
+    gap = np.r_[0, np.diff(sorted_keys)].astype(float)
+    features["days_since_last"] = np.where(same_entity, gap, np.nan)
+    return features.sort_index()
+
+
+def entity_table(events, previous, new_events, as_of, windows=VELOCITY_WINDOWS):
+    # One row per entity: lifetime order count, last order day and trailing
+    # window counts as of the store's last day.
+    totals = new_events.groupby(["entity", "value"]).size().rename("total_orders")
+    if previous is not None and len(previous):
+        totals = totals.add(previous.set_index(["entity", "value"])["total_orders"], fill_value=0)
+    grouped = events.groupby(["entity", "value"])["day"]
+    table = pd.DataFrame({"total_orders": totals.astype(np.int64), "last_order_day": grouped.max()})
+    for window in windows:
+        recent = events[events["day"] > as_of - window].groupby(["entity", "value"]).size()
+        table[f"orders_{window}d"] = recent.reindex(table.index, fill_value=0).astype(np.int64)
+    return table.reset_index()
+
+
+def update_store(store, batches, windows=VELOCITY_WINDOWS):
+    # Orders already in the store are skipped. Features for new orders are
+    # computed against the retained events (the last max(windows) days plus
+    # each entity's latest order), never against the full history.
+    state = store["state"]
+    seen = set(store["orders"]["order_id"]) if store["orders"] is not None else set()
+    new = pd.concat(list(batches), ignore_index=True) if batches else pd.DataFrame()
+    if new.empty:
+        return 0
+    new = new[~new["order_id"].isin(seen)].drop_duplicates("order_id").reset_index(drop=True)
+    if new.empty:
+        return 0
+    new["order_day"] = day_ordinal(new["order_date"])
+
+    history = store["events"]
+    events = entity_events(new)
+    combined = pd.concat([history, events], ignore_index=True) if history is not None else events
+    features = velocity_features(combined, windows)
+    fresh = features.iloc[len(combined) - len(events):].set_axis(events.index)
+
+    rows = new[["order_id"] + [f for f in FEATURE_FIELDS if f in new.columns]].copy()
+    rows["order_day"] = new["order_day"]
+    rows = rows.join(encode_categoricals(new, state["vocab"]))
+    for entity in ENTITY_KEYS:
+        entity_rows = events["entity"] == entity
+        per_order = fresh[entity_rows].set_axis(events.loc[entity_rows, "order_id"]).add_prefix(f"{entity}_")
+        rows = rows.join(per_order, on="order_id")
+    store["orders"] = pd.concat([store["orders"], rows], ignore_index=True) if store["orders"] is not None else rows
+
+    as_of = int(combined["day"].max()) if len(combined) else state["as_of"]
+    if state["as_of"] is not None:
+        as_of = max(as_of, state["as_of"])
+    latest = combined.groupby(["entity", "value"])["day"].transform("max") == combined["day"]
+    store["events"] = combined[(combined["day"] > as_of - max(windows)) | latest].reset_index(drop=True)
+    store["entities"] = entity_table(store["events"], store["entities"], events, as_of, windows)
+    state["as_of"] = as_of
+    return len(new)
+
+
+def layer_view(store, layer_name):
+    # What a consumer layer reads: its required fields plus every shared
+    # feature column, from the one order table.
+    if layer_name not in CONSUMER_LAYERS:
+        raise KeyError(f"{layer_name} does not read from the feature store")
+    orders = store["orders"]
+    fields = [f for f in FORTZA_LAYERS[layer_name]["required_fields"] if f in orders.columns]
+    shared = [c for c in orders.columns if c not in FEATURE_FIELDS and c != "order_id"]
+    return orders[["order_id"] + fields + shared]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compute the shared Anomaly/Intenso/Energico order features.")
+    parser.add_argument("--workspace", type=Path, default=WORKSPACE)
+    parser.add_argument("--store-dir", type=Path, default=None)
+    parser.add_argument("--rebuild", action="store_true", help="Discard the stored features and recompute all orders")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    args = parser.parse_args(argv)
+
+    store_dir = args.store_dir or args.workspace / ".readiness_cache" / "feature_store"
+    store = new_store() if args.rebuild else load_store(store_dir)
+    fields = sorted(set(FEATURE_FIELDS) | {column for columns in ENTITY_KEYS.values() for column in columns})
+    added = update_store(store, list(iter_canonical_records(args.workspace, args.chunksize, fields)))
+    if added:
+        save_store(store, store_dir)
+
+    print(f"Feature store at {store_dir} ({'Arrow' if pa is not None else 'pickle'})")
+    print(f"  - new orders: {added}, stored orders: {0 if store['orders'] is None else len(store['orders'])}")
+    if store["entities"] is not None:
+        for entity, count in store["entities"].groupby("entity").size().items():
+            print(f"  - {entity}: {count} tracked")
+    for layer_name in CONSUMER_LAYERS:
+        if store["orders"] is not None:
+            print(f"  - {layer_name}: {layer_view(store, layer_name).shape[1]} columns")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from analyze_client_data import CACHE_DIR, DEFAULT_CHUNKSIZE, FIELD_MAPPINGS, WORKSPACE, clean_column_name, detect_dialect, dialect_read_kwargs, read_csv_header
+from atomic_io import atomic_write
+from transforms import clean_text, coalesce_columns, day_ordinal
+
+HOTSPOT_PATH = CACHE_DIR / "zip_hotspots.npz"
+DEFAULT_WINDOWS = [7, 30, 90]
+# Five-digit zips are their own array index, so a lookup is one gather.
+ZIP_SLOTS = 100_000
+NO_DAY = np.iinfo(np.int64).min // 2
+# Order columns behind each input, in FIELD_MAPPINGS priority order.
+ORDER_COLUMNS = {field: [clean_column_name(col) for col in FIELD_MAPPINGS[field]["Order.csv"]]
+                 for field in ("zip_code", "order_date")}
+
+
+def encode_orders(frame):
+    # Zip as an int in [0, ZIP_SLOTS) and order date as days since epoch;
+    # rows missing either are dropped.
+    zip5 = coalesce_columns(frame, ORDER_COLUMNS["zip_code"]).str.extract(r"^(\d{5})", expand=False)
+    days = day_ordinal(coalesce_columns(frame, ORDER_COLUMNS["order_date"]))
+    keep = (zip5.notna() & days.notna()).to_numpy()
+    zips = zip5[keep].astype(np.int64).to_numpy()
+    days = days[keep].to_numpy(dtype=np.int64)
+    return zips, days
+
+
+def iter_encoded_orders(orders_path, chunksize=DEFAULT_CHUNKSIZE):
+    header = set(read_csv_header(orders_path))
+    usecols = {col for columns in ORDER_COLUMNS.values() for col in columns}
+    read_kwargs = dialect_read_kwargs(detect_dialect(orders_path))
+    with pd.read_csv(orders_path, usecols=sorted(usecols & header), dtype=str, chunksize=chunksize,
+                     low_memory=False, **read_kwargs) as reader:
+        for chunk in reader:
+            yield encode_orders(chunk)
+
+
+def daily_counts(days, zips, counts=None):
+    # (day, zip) pairs summed and sorted by day then zip.
+    counts = np.ones(len(days), dtype=np.int64) if counts is None else counts
+    keys, inverse = np.unique(days * ZIP_SLOTS + zips, return_inverse=True)
+    summed = np.bincount(inverse, weights=counts, minlength=len(keys)).astype(np.int64)
+    return keys // ZIP_SLOTS, keys % ZIP_SLOTS, summed
+
+
+def _window_sum(table, start_day, end_day):
+    # Per-zip counts of daily rows with start_day < day <= end_day.
+    lo, hi = np.searchsorted(table["days"], [start_day, end_day], side="right")
+    return np.bincount(table["zips"][lo:hi], weights=table["counts"][lo:hi], minlength=ZIP_SLOTS).astype(np.int64)
+
+
+def empty_table(windows=DEFAULT_WINDOWS):
+    return {
+        "days": np.empty(0, dtype=np.int64), "zips": np.empty(0, dtype=np.int64), "counts": np.empty(0, dtype=np.int64),
+        "totals": np.zeros(ZIP_SLOTS, dtype=np.int64), "windows": np.array(windows, dtype=np.int64),
+        "window_counts": np.zeros((len(windows), ZIP_SLOTS), dtype=np.int64), "last_day": np.int64(NO_DAY),
+    }
+
+
+def append_days(table, zips, days):
+    # Only days after the table's last day are appended. Each window slides
+    # forward by adding the new days inside it and subtracting the old days
+    # that fell out, so history is never re-aggregated.
+    late = int((days <= table["last_day"]).sum())
+    fresh = days > table["last_day"]
+    if not fresh.any():
+        return table, {"appended_rows": 0, "late_rows": late, "new_days": 0}
+    new = dict(zip(("days", "zips", "counts"), daily_counts(days[fresh], zips[fresh])))
+    old_as_of, as_of = int(table["last_day"]), int(new["days"][-1])
+
+    window_counts = table["window_counts"].copy()
+    for i, window in enumerate(table["windows"]):
+        window_counts[i] += _window_sum(new, as_of - window, as_of)
+        if old_as_of != NO_DAY:
+            window_counts[i] -= _window_sum(table, old_as_of - window, min(as_of - window, old_as_of))
+
+    updated = {
+        "days": np.concatenate([table["days"], new["days"]]),
+        "zips": np.concatenate([table["zips"], new["zips"]]),
+        "counts": np.concatenate([table["counts"], new["counts"]]),
+        "totals": table["totals"] + np.bincount(new["zips"], weights=new["counts"], minlength=ZIP_SLOTS).astype(np.int64),
+        "windows": table["windows"],
+        "window_counts": window_counts,
+        "last_day": np.int64(as_of),
+    }
+    return updated, {"appended_rows": int(fresh.sum()), "late_rows": late, "new_days": int(np.unique(new["days"]).size)}
+
+
+def rewindow(table, windows):
+    # Changing the configured windows recomputes them from the daily rows.
+    table = dict(table, windows=np.array(windows, dtype=np.int64))
+    as_of = int(table["last_day"])
+    table["window_counts"] = np.stack([_window_sum(table, as_of - w, as_of) for w in windows]) if as_of != NO_DAY \
+        else np.zeros((len(windows), ZIP_SLOTS), dtype=np.int64)
+    return table
+
+
+def load_hotspots(path=HOTSPOT_PATH):
+    try:
+        with np.load(path) as data:
+            return {name: data[name] for name in data.files}
+    except (OSError, ValueError):
+        return None
+
+
+def save_hotspots(table, path=HOTSPOT_PATH):
+    atomic_write(path, lambda f: np.savez(f, **table), mode="wb")
+
+
+def lookup_hotspots(table, zip_codes):
+    # Counts, share of all orders in the window and orders per day, for each
+    # zip code and window.
+    zip5 = clean_text(zip_codes).str.extract(r"^(\d{5})", expand=False)
+    known = zip5.notna().to_numpy()
+    slots = np.zeros(len(zip5), dtype=np.int64)
+    slots[known] = zip5[known].astype(np.int64).to_numpy()
+    result = pd.DataFrame({"zip5": zip5.to_numpy(), "total_orders": np.where(known, table["totals"][slots], 0)})
+    window_totals = table["window_counts"].sum(axis=1)
+    for i, window in enumerate(table["windows"]):
+        counts = np.where(known, table["window_counts"][i][slots], 0)
+        result[f"orders_{window}d"] = counts
+        result[f"share_{window}d"] = counts / window_totals[i] if window_totals[i] else 0.0
+        result[f"per_day_{window}d"] = counts / window
+    return result
+
+
+def top_hotspots(table, window_index, n):
+    counts = table["window_counts"][window_index]
+    top = np.argsort(counts, kind="stable")[::-1][:n]
+    return [(f"{int(z):05d}", int(counts[z])) for z in top if counts[z] > 0]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute rolling per-zip order counts for the Geolocation Hotspot layer.")
+    parser.add_argument("--workspace", type=Path, default=WORKSPACE)
+    parser.add_argument("--orders", type=Path, default=None, help="Order export to append (defaults to Order.csv)")
+    parser.add_argument("--output", type=Path, default=None)
+    parser.add_argument("--windows", type=lambda s: [int(w) for w in s.split(",")], default=DEFAULT_WINDOWS,
+                        help="Comma-separated window lengths in days")
+    parser.add_argument("--rebuild", action="store_true", help="Discard the stored table and recount all days")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument("--top", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    output = args.output or args.workspace / ".readiness_cache" / "zip_hotspots.npz"
+    table = None if args.rebuild else load_hotspots(output)
+    if table is None:
+        table = empty_table(args.windows)
+    elif table["windows"].tolist() != args.windows:
+        table = rewindow(table, args.windows)
+
+    # Chunks are encoded to two int arrays and gathered first, because the
+    # cut-off against the stored last day must apply to the whole export.
+    encoded = list(iter_encoded_orders(args.orders or args.workspace / "Order.csv", args.chunksize))
+    zips = np.concatenate([z for z, _ in encoded] or [np.empty(0, dtype=np.int64)])
+    days = np.concatenate([d for _, d in encoded] or [np.empty(0, dtype=np.int64)])
+    table, appended = append_days(table, zips, days)
+    save_hotspots(table, output)
+
+    last_day = int(table["last_day"])
+    print(f"Hotspot table written to {output}")
+    print(f"  - appended {appended['appended_rows']} orders over {appended['new_days']} new days "
+          f"({appended['late_rows']} on or before the last stored day skipped)")
+    if last_day != NO_DAY:
+        print(f"  - as of {np.datetime64(last_day, 'D')}, {int(table['totals'].sum())} orders in "
+              f"{int((table['totals'] > 0).sum())} zip codes")
+    for i, window in enumerate(table["windows"]):
+        hot = ", ".join(f"{z} ({c})" for z, c in top_hotspots(table, i, args.top)) or "none"
+        print(f"  - top zips over {window} days: {hot}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+import cProfile
+import functools
+import io
+import os
+import pstats
+import resource
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+
+from atomic_io import atomic_write, atomic_write_json
+
+PROFILE_MODES = ("cprofile", "sample")
+SAMPLE_INTERVAL = 0.005
+PROFILE_TOP = 25
+
+# The trace the decorated pipeline functions report to; None disables
+# recording, leaving only one attribute check per call.
+active_trace = None
+
+
+def _read_hwm_mb():
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 2**10
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (2**20 if sys.platform == "darwin" else 2**10)
+
+
+def _reset_hwm():
+    # Writing 5 to clear_refs resets VmHWM (Linux 4.0+), which gives each
+    # stage its own peak; elsewhere peaks are process-wide high-water marks.
+    try:
+        with open("/proc/self/clear_refs", "w", encoding="ascii") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+class SamplingProfiler:
+    # Samples the main thread's stack every interval seconds and keeps
+    # collapsed stacks, the input format of flamegraph tools.
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+        self._target = threading.main_thread().ident
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{Path(code.co_filename).name}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+                self.samples += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def write(self, path):
+        atomic_write(path, lambda f: f.writelines(f"{stack} {count}\n" for stack, count in self.stacks.most_common()))
+
+    def top(self, n=PROFILE_TOP):
+        # Share of samples in which each function was on top of the stack.
+        leaves = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        return [{"function": name, "samples": count, "share": round(count / self.samples, 4)}
+                for name, count in leaves.most_common(n)]
+
+
+class PipelineTrace:
+    # Wall time, CPU time, rows and peak RSS per call of each traced stage.
+    # Nested stages (analyze_csv loads through load_csv) are recorded
+    # separately, and an outer stage's peak includes its inner stages'.
+
+    def __init__(self, profile=None):
+        self.profile = profile
+        self.started = datetime.now(timezone.utc)
+        self.events = []
+        self._origin = time.perf_counter()
+        self._cpu_origin = time.process_time()
+        self._stack = []
+        self._per_stage_peaks = _reset_hwm()
+        self._profiler = None
+        if profile == "cprofile":
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        elif profile == "sample":
+            self._profiler = SamplingProfiler()
+            self._profiler.start()
+
+    def begin(self, stage, detail=None):
+        if self._stack:
+            self._stack[-1]["child_peak"] = max(self._stack[-1]["child_peak"], _read_hwm_mb())
+        if self._per_stage_peaks:
+            _reset_hwm()
+        self._stack.append({"stage": stage, "detail": detail, "start": time.perf_counter(),
+                            "cpu": time.process_time(), "child_peak": 0.0})
+
+    def end(self, rows=None):
+        frame = self._stack.pop()
+        peak = max(_read_hwm_mb(), frame["child_peak"])
+        if self._stack:
+            self._stack[-1]["child_peak"] = max(self._stack[-1]["child_peak"], peak)
+        self.events.append({
+            "stage": frame["stage"],
+            "detail": frame["detail"],
+            "depth": len(self._stack),
+            "start_sec": round(frame["start"] - self._origin, 4),
+            "wall_sec": round(time.perf_counter() - frame["start"], 4),
+            "cpu_sec": round(time.process_time() - frame["cpu"], 4),
+            "rows": rows,
+            "peak_rss_mb": round(peak, 1),
+        })
+
+    def summary(self):
+        stages = {}
+        for event in self.events:
+            stage = stages.setdefault(event["stage"], {"calls": 0, "wall_sec": 0.0, "cpu_sec": 0.0, "rows": 0,
+                                                       "peak_rss_mb": 0.0})
+            stage["calls"] += 1
+            stage["wall_sec"] = round(stage["wall_sec"] + event["wall_sec"], 4)
+            stage["cpu_sec"] = round(stage["cpu_sec"] + event["cpu_sec"], 4)
+            stage["rows"] += event["rows"] or 0
+            stage["peak_rss_mb"] = max(stage["peak_rss_mb"], event["peak_rss_mb"])
+        return stages
+
+    def finish(self, output_dir, extra=None):
+        # Writes readiness_trace.json (and the profiler's own file) into
+        # output_dir and returns the trace path.
+        output_dir = Path(output_dir)
+        trace = {
+            "started": self.started.isoformat(timespec="seconds"),
+            "pid": os.getpid(),
+            "total": {
+                "wall_sec": round(time.perf_counter() - self._origin, 4),
+                "cpu_sec": round(time.process_time() - self._cpu_origin, 4),
+                "peak_rss_mb": round(max([_read_hwm_mb()] + [e["peak_rss_mb"] for e in self.events]), 1),
+            },
+            "peak_rss_scope": "stage" if self._per_stage_peaks else "process",
+            "stages": self.summary(),
+            "events": self.events,
+        }
+        trace.update(extra or {})
+        if isinstance(self._profiler, cProfile.Profile):
+            self._profiler.disable()
+            profile_path = output_dir / "readiness_profile.pstats"
+            self._profiler.dump_stats(profile_path)
+            stats = pstats.Stats(self._profiler, stream=io.StringIO()).sort_stats("cumulative")
+            trace["profile"] = {"mode": "cprofile", "output": profile_path.name, "top": [
+                {"function": f"{Path(filename).name}:{line}({name})", "calls": calls, "tottime": round(tottime, 4),
+                 "cumtime": round(cumtime, 4)}
+                for (filename, line, name), (_, calls, tottime, cumtime, _) in
+                sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:PROFILE_TOP]
+            ]}
+        elif isinstance(self._profiler, SamplingProfiler):
+            self._profiler.stop()
+            profile_path = output_dir / "readiness_profile.folded"
+            self._profiler.write(profile_path)
+            trace["profile"] = {"mode": "sample", "output": profile_path.name, "interval_sec": SAMPLE_INTERVAL,
+                                "samples": self._profiler.samples, "top": self._profiler.top()}
+
+        return atomic_write_json(output_dir / "readiness_trace.json", trace, default=str)
+
+
+def start_trace(profile=None):
+    global active_trace
+    active_trace = PipelineTrace(profile)
+    return active_trace
+
+
+def stop_trace():
+    global active_trace
+    trace, active_trace = active_trace, None
+    return trace
+
+
+def traced(stage, rows=None, detail=None):
+    # Decorator for pipeline stages. rows(result, *args) and detail(*args)
+    # pull the processed row count and a label (usually the file name) out of
+    # a call.
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            trace = active_trace
+            if trace is None:
+                return func(*args, **kwargs)
+            trace.begin(stage, detail(*args, **kwargs) if detail else None)
+            result = None
+            try:
+                result = func(*args, **kwargs)
+                return result
+            finally:
+                trace.end(rows(result, *args, **kwargs) if rows and result is not None else None)
+        return wrapper
+    return decorate
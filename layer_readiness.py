@@ -0,0 +1,103 @@
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from analyze_client_data import DEFAULT_CHUNKSIZE, FORTZA_LAYERS, WORKSPACE
+from atomic_io import atomic_write_json
+from canonical_record import CANONICAL_FIELDS, iter_canonical_records
+
+# Layer fields that name the same canonical value; the IP Address layer
+# accepts `ip` or `ipAddress` for one input.
+FIELD_ALIASES = {"ipAddress": "ip"}
+
+
+def layer_fields(layers=FORTZA_LAYERS):
+    return sorted({FIELD_ALIASES.get(field, field) for layer in layers.values() for field in layer["required_fields"]})
+
+
+def popcount(packed):
+    if hasattr(np, "bitwise_count"):
+        return int(np.bitwise_count(packed).sum())
+    return int(np.unpackbits(packed).sum())
+
+
+def new_readiness(layers=FORTZA_LAYERS):
+    fields = layer_fields(layers)
+    return {
+        "rows": 0,
+        "fields": fields,
+        "field_rows": dict.fromkeys(fields, 0),
+        "layer_rows": dict.fromkeys(layers, 0),
+        # Positions into "fields" per layer, resolved once.
+        "layer_index": {name: sorted({fields.index(FIELD_ALIASES.get(f, f)) for f in layer["required_fields"]})
+                        for name, layer in layers.items()},
+    }
+
+
+def update_readiness(readiness, batch):
+    # One populated-mask per field for the chunk, packed 8 rows per byte;
+    # a layer's scoreable rows are the AND of its fields' packed rows.
+    rows = len(batch)
+    masks = np.zeros((len(readiness["fields"]), rows), dtype=bool)
+    for i, field in enumerate(readiness["fields"]):
+        if field in batch.columns:
+            values = batch[field].to_numpy(dtype=object)
+            masks[i] = pd.notna(values) & (values != "")
+    packed = np.packbits(masks, axis=1)
+    for i, field in enumerate(readiness["fields"]):
+        readiness["field_rows"][field] += popcount(packed[i])
+    for name, index in readiness["layer_index"].items():
+        readiness["layer_rows"][name] += popcount(np.bitwise_and.reduce(packed[index], axis=0))
+    readiness["rows"] += rows
+    return readiness
+
+
+def summarize_readiness(readiness, layers=FORTZA_LAYERS):
+    rows = readiness["rows"]
+
+    def fraction(count):
+        return round(count / rows, 4) if rows else 0.0
+
+    summary = {"records": rows, "layers": {}}
+    for name, layer in layers.items():
+        fields = [FIELD_ALIASES.get(f, f) for f in layer["required_fields"]]
+        limiting = min(fields, key=lambda f: readiness["field_rows"][f])
+        summary["layers"][name] = {
+            "scoreable_records": readiness["layer_rows"][name],
+            "scoreable_fraction": fraction(readiness["layer_rows"][name]),
+            "field_fractions": {f: fraction(readiness["field_rows"][f]) for f in dict.fromkeys(fields)},
+            "limiting_field": limiting,
+            "unsourced_fields": [f for f in dict.fromkeys(fields) if f not in CANONICAL_FIELDS],
+        }
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fraction of order records each Fortza layer can actually score.")
+    parser.add_argument("--workspace", type=Path, default=WORKSPACE)
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args(argv)
+
+    readiness = new_readiness()
+    fields = [f for f in readiness["fields"] if f in CANONICAL_FIELDS]
+    start = time.perf_counter()
+    for batch in iter_canonical_records(args.workspace, args.chunksize, fields):
+        update_readiness(readiness, batch)
+    summary = summarize_readiness(readiness)
+    summary["seconds"] = round(time.perf_counter() - start, 3)
+
+    output = args.output or args.workspace / "layer_readiness.json"
+    atomic_write_json(output, summary)
+
+    print(f"Row-level readiness over {summary['records']} records ({summary['seconds']}s)")
+    for name, layer in summary["layers"].items():
+        print(f"  - {name}: {layer['scoreable_fraction']:.1%} scoreable (limited by {layer['limiting_field']})")
+    print(f"   - {output.name}: Generated")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+import argparse
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from analyze_client_data import DEFAULT_CHUNKSIZE, FIELD_MAPPINGS, WORKSPACE, file_fingerprint
+from atomic_io import atomic_write, atomic_write_json
+from canonical_record import iter_canonical_records
+from columnar_cache import content_hash
+from entity_resolution import load_identity_records
+from transforms import clean_text, merge_state_fields, normalize_email, normalize_name, normalize_street
+
+INDEX_DIR = WORKSPACE / ".permanent_memory"
+HISTORY_OBJECTS = [csv_file for csv_file in FIELD_MAPPINGS["email"] if csv_file != "notes"]
+LOOKUP_FIELDS = ["customer_name", "email", "cust_street", "cust_city", "cust_state", "zip_code"]
+ADDRESS_COMPONENTS = ["street", "city", "state", "zip5"]
+LOOKUP_TABLES = ["email", "name", "full_address"] + ADDRESS_COMPONENTS
+# --score probes the index with these records, which are also part of the
+# history. Their own keys are kept per record so a record is never counted
+# as a historical match of itself.
+SCORED_OBJECT = "Order.csv"
+
+
+def lookup_keys(frame):
+    # Normalized text per lookup table; a full address needs every component.
+    keys = {
+        "email": normalize_email(frame["email"]),
+        "name": normalize_name(frame["customer_name"]).str.lower(),
+        "street": normalize_street(frame["cust_street"]).str.upper(),
+        "city": clean_text(frame["cust_city"]).str.upper(),
+        "state": merge_state_fields(frame["cust_state"]),
+        "zip5": clean_text(frame["zip_code"]).str.extract(r"^(\d{5})", expand=False),
+    }
+    address = keys["street"]
+    for component in ADDRESS_COMPONENTS[1:]:
+        address = address.str.cat(keys[component], sep="|")
+    keys["full_address"] = address
+    return {table: keys[table].set_axis(frame.index) for table in LOOKUP_TABLES}
+
+
+def hash_keys(values):
+    present = values.notna().to_numpy()
+    hashes = pd.util.hash_array(values.to_numpy(dtype=object, na_value=""), categorize=False)
+    return hashes, present
+
+
+def _aggregate(keys, counts):
+    # Sorted unique keys with summed counts, the on-disk table layout.
+    if len(keys) == 0:
+        return np.empty(0, dtype=np.uint64), np.empty(0, dtype=np.int64)
+    order = np.argsort(keys, kind="stable")
+    keys, counts = keys[order], counts[order]
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    return keys[starts], np.add.reduceat(counts, starts)
+
+
+def source_tables(records):
+    tables = {}
+    for table, values in lookup_keys(records).items():
+        hashes, present = hash_keys(values)
+        tables[table] = _aggregate(hashes[present], np.ones(int(present.sum()), dtype=np.int64))
+    return tables
+
+
+def _save_table(path_stem, keys, counts):
+    for suffix, array in (("keys", keys), ("counts", counts)):
+        atomic_write(f"{path_stem}.{suffix}.npy", lambda f: np.save(f, array), mode="wb")
+
+
+def _save_own_keys(path_stem, records):
+    # Per record of the scored object: its Id hash (sorted) and, per table,
+    # the key hash it contributed and whether it contributed one.
+    ids, _ = hash_keys(records["record_id"].astype("string"))
+    order = np.argsort(ids, kind="stable")
+    arrays = {"ids": ids[order]}
+    for table, values in lookup_keys(records).items():
+        hashes, present = hash_keys(values)
+        arrays[table], arrays[f"{table}_present"] = hashes[order], present[order]
+    atomic_write(f"{path_stem}.own.npz", lambda f: np.savez(f, **arrays), mode="wb")
+
+
+def _load_table(path_stem):
+    return (np.load(f"{path_stem}.keys.npy", mmap_mode="r"),
+            np.load(f"{path_stem}.counts.npy", mmap_mode="r"))
+
+
+def _load_manifest(index_dir):
+    try:
+        with open(index_dir / "manifest.json", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"sources": {}}
+
+
+def build_index(workspace=WORKSPACE, index_dir=INDEX_DIR, rebuild=False):
+    # Each export keeps its own per-table arrays under sources/, so a re-sent
+    # file only re-hashes that file; the merged tables are then rebuilt from
+    # the per-source arrays, which is a sort over hashes rather than a parse.
+    workspace, index_dir = Path(workspace), Path(index_dir)
+    manifest = {"sources": {}} if rebuild else _load_manifest(index_dir)
+    (index_dir / "sources").mkdir(parents=True, exist_ok=True)
+    previous = manifest["sources"]
+    sources = {}
+    rebuilt = []
+    for csv_file in HISTORY_OBJECTS:
+        path = workspace / csv_file
+        if not path.exists():
+            continue
+        fingerprint = file_fingerprint(path)
+        entry = previous.get(csv_file)
+        if csv_file == SCORED_OBJECT and not (index_dir / "sources" / f"{Path(csv_file).stem}.own.npz").exists():
+            entry = None
+        if entry and entry["fingerprint"] == fingerprint:
+            sources[csv_file] = entry
+            continue
+        digest = content_hash(path)
+        if entry and entry["hash"] == digest:
+            sources[csv_file] = dict(entry, fingerprint=fingerprint)
+            continue
+        records = load_identity_records(workspace, [csv_file], LOOKUP_FIELDS)
+        for table, (keys, counts) in source_tables(records).items():
+            _save_table(index_dir / "sources" / f"{Path(csv_file).stem}.{table}", keys, counts)
+        if csv_file == SCORED_OBJECT:
+            _save_own_keys(index_dir / "sources" / Path(csv_file).stem, records)
+        sources[csv_file] = {"fingerprint": fingerprint, "hash": digest, "records": int(len(records))}
+        rebuilt.append(csv_file)
+
+    removed = sorted(set(previous) - set(sources))
+    if rebuilt or removed or not (index_dir / "manifest.json").exists():
+        for table in LOOKUP_TABLES:
+            parts = [_load_table(index_dir / "sources" / f"{Path(csv_file).stem}.{table}") for csv_file in sources]
+            keys = np.concatenate([np.asarray(k) for k, _ in parts] or [np.empty(0, dtype=np.uint64)])
+            counts = np.concatenate([np.asarray(c) for _, c in parts] or [np.empty(0, dtype=np.int64)])
+            _save_table(index_dir / table, *_aggregate(keys, counts))
+        for csv_file in removed:
+            for table in LOOKUP_TABLES:
+                for suffix in ("keys", "counts"):
+                    Path(index_dir / "sources" / f"{Path(csv_file).stem}.{table}.{suffix}.npy").unlink(missing_ok=True)
+            Path(index_dir / "sources" / f"{Path(csv_file).stem}.own.npz").unlink(missing_ok=True)
+    atomic_write_json(index_dir / "manifest.json", {"sources": sources, "tables": LOOKUP_TABLES})
+    return {"rebuilt": rebuilt, "removed": removed, "sources": sorted(sources)}
+
+
+def load_index(index_dir=INDEX_DIR):
+    index = {table: _load_table(Path(index_dir) / table) for table in LOOKUP_TABLES}
+    own_path = Path(index_dir) / "sources" / f"{Path(SCORED_OBJECT).stem}.own.npz"
+    if own_path.exists() and SCORED_OBJECT in _load_manifest(Path(index_dir))["sources"]:
+        with np.load(own_path) as own:
+            index["own"] = dict(own)
+    return index
+
+
+def lookup(table, values):
+    # Historical record counts for each value, 0 when unseen or missing.
+    keys, counts = table
+    hashes, present = hash_keys(values)
+    positions = np.searchsorted(keys, hashes)
+    found = present & (positions < len(keys))
+    found[found] = keys[positions[found]] == hashes[found]
+    hits = np.zeros(len(hashes), dtype=np.int64)
+    hits[found] = counts[positions[found]]
+    return hits
+
+
+def own_hits(index, table, values, record_ids):
+    # 1 where the scored record is itself in the history and contributed
+    # this very key there.
+    own = index.get("own")
+    if own is None:
+        return 0
+    ids, _ = hash_keys(pd.Series(record_ids, dtype="string"))
+    positions = np.searchsorted(own["ids"], ids)
+    found = positions < len(own["ids"])
+    found[found] = own["ids"][positions[found]] == ids[found]
+    hashes, present = hash_keys(values)
+    same = np.zeros(len(hashes), dtype=np.int64)
+    at = positions[found]
+    same[found] = present[found] & own[f"{table}_present"][at] & (own[table][at] == hashes[found])
+    return same
+
+
+def score_frame(index, frame, record_ids=None):
+    # One vectorized probe per table for the whole frame, then the two
+    # Permanent Memory outcomes: name/email match and address match level.
+    # With record_ids, the records' own history entries are left out.
+    hits = {}
+    for table, values in lookup_keys(frame).items():
+        hits[table] = lookup(index[table], values)
+        if record_ids is not None:
+            hits[table] -= own_hits(index, table, values, record_ids)
+    scored = pd.DataFrame({f"{table}_hits": hits[table] for table in LOOKUP_TABLES}, index=frame.index)
+    identity = (hits["email"] > 0).astype(int) + (hits["name"] > 0).astype(int)
+    scored["user_details_match"] = np.select([identity == 2, identity == 1], ["full", "partial"], "none")
+    components = pd.Series("", index=frame.index)
+    for component in ADDRESS_COMPONENTS:
+        components = components + np.where(hits[component] > 0, component + ",", "")
+    scored["address_match"] = np.where(hits["full_address"] > 0, "full_address", components.str.rstrip(","))
+    scored["address_match"] = scored["address_match"].replace("", "none")
+    return scored
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build and query the local Permanent Memory lookup index.")
+    parser.add_argument("--workspace", type=Path, default=WORKSPACE)
+    parser.add_argument("--index-dir", type=Path, default=None)
+    parser.add_argument("--rebuild", action="store_true", help="Ignore the manifest and re-hash every export")
+    parser.add_argument("--score", action="store_true", help="Score the canonical Order records against the index")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    args = parser.parse_args(argv)
+
+    index_dir = args.index_dir or args.workspace / ".permanent_memory"
+    start = time.perf_counter()
+    result = build_index(args.workspace, index_dir, args.rebuild)
+    print(f"Index at {index_dir} ({time.perf_counter() - start:.2f}s)")
+    print(f"  - rebuilt: {', '.join(result['rebuilt']) or 'none'}; removed: {', '.join(result['removed']) or 'none'}")
+    index = load_index(index_dir)
+    for table in LOOKUP_TABLES:
+        print(f"  - {table}: {len(index[table][0])} keys")
+
+    if args.score:
+        totals = {"orders": 0, "user_details_match": {}, "address_match": {}}
+        start = time.perf_counter()
+        for batch in iter_canonical_records(args.workspace, args.chunksize, LOOKUP_FIELDS):
+            scored = score_frame(index, batch, batch["order_id"])
+            totals["orders"] += len(scored)
+            for column in ("user_details_match", "address_match"):
+                for value, count in scored[column].value_counts().items():
+                    totals[column][value] = totals[column].get(value, 0) + int(count)
+        elapsed = time.perf_counter() - start
+        print(f"\nScored {totals['orders']} orders in {elapsed:.3f}s")
+        print(f"  - user details: {totals['user_details_match']}")
+        print(f"  - address: {totals['address_match']}")
+
+
+if __name__ == "__main__":
+    main()
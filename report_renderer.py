@@ -0,0 +1,334 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from string import Template
+
+from atomic_io import atomic_write
+
+DEFAULT_REPORT_DATE = "2025-12-24"
+DEFAULT_DATA_SOURCE = "Perfect Vision Salesforce Export (Dummy Data)"
+
+# Report sections, compiled once. Each render yields these pieces in order
+# and the writer streams them to the file, so a report never exists as one
+# growing string.
+HEADER = Template("""# Fortza Data Readiness Assessment Report
+
+**Generated:** $generated  
+**Data Source:** $data_source
+
+---
+
+## Executive Summary
+
+""")
+BUCKET1_DELIVERABLE = """**✅ Bucket 1 is DELIVERABLE** with current data structure.
+
+All required fields for Fortza's core fraud detection layers are present in the provided CSVs. However, some transformations and data quality improvements are needed.
+
+"""
+BUCKET1_BLOCKED = """**⚠️ Bucket 1 is PARTIALLY BLOCKED**
+
+The following critical fields are missing for Bucket 1 delivery:
+
+| Missing Field | Blocking Layer |
+|--------------|----------------|
+"""
+BLOCKED_ROW = Template("| `$field` | $layer |\n")
+COVERAGE_SUMMARY = Template("""### Field Coverage Summary
+
+| Metric | Count |
+|--------|-------|
+| **Present** | $present |
+| **Missing** | $missing |
+| **Low Quality (>50% nulls)** | $low_quality |
+| **Total Required Fields** | $total |
+
+---
+
+## CSV Data Overview
+
+""")
+CSV_OVERVIEW = Template("""### $filename
+- **Rows:** $rows
+- **Columns:** $columns
+
+""")
+CRITICAL_MISSING = """---
+
+## Critical Missing Fields for Bucket 1
+
+"""
+CRITICAL_HEADER = "| Field | Affected Layer | Suggested Source |\n|-------|---------------|------------------|\n"
+CRITICAL_ROW = Template("| `$field` | $layer | $suggested |\n")
+NO_CRITICAL = "No critical missing fields for Bucket 1.\n"
+RECOMMENDATIONS = """
+
+---
+
+## Recommendations: Fields to Request from Client
+
+### Bucket 1 - Required for Core Fraud Detection
+
+"""
+IP_REQUEST = """- **IP Address (`ip`)**: Request from Order or custom session tracking object. Critical for IP Address Layer (VPN/proxy detection).
+"""
+BUCKET2 = """
+> **Note:** Most Bucket 1 fields are present but require transformations (see below).
+
+### Bucket 2 - Low-Hanging Fruit (Quick Wins)
+
+"""
+BUCKET2_ROW = Template("- **`$field`**: $description. Suggested source: $source\n")
+BUCKET2_NONE = "All Bucket 2 fields are present or can be derived.\n"
+BUCKET3 = """
+### Bucket 3 - Long-Term / External Data Needs
+
+"""
+BUCKET3_ROW = Template("- **`$field`**: $description. Source: $source\n")
+BUCKET3_NONE = "All Bucket 3 fields need custom implementation.\n"
+TRANSFORMATIONS = """
+
+---
+
+## Transformations Required
+
+| Field | Transformation |
+|-------|---------------|
+| `customer_name` | Derive from FirstName + LastName or join with Contact |
+| `email` | Normalize to lowercase |
+| `cust_street/city/state/zip` | Parse multi-line addresses; normalize abbreviations (Ave → Avenue) |
+| `salesperson_name` | Join with User object using OwnerId |
+| `dealer_name` | Join with Account object using POE_Dealer__c reference |
+| `order_date` | Standardize date format from multiple source fields |
+| `install_to_activation_days` | Derive: `ActivatedDate - POE_InstallationDate__c` |
+
+---
+
+## Data Quality Observations
+
+### High-Null Fields (>50%)
+"""
+HIGH_NULL_HEADER = "| Field | Null % | Source |\n|-------|--------|--------|\n"
+HIGH_NULL_ROW = Template("| `$field` | $null_pct% | $source |\n")
+NO_HIGH_NULL = "No critical high-null fields detected in the sample data.\n"
+FIELD_MAPPING_NOTES = """
+
+---
+
+## Agent/Dealer/Program Field Mappings
+
+### Agent (Salesperson) Fields
+- `OwnerId` → Requires User object join for name
+- `SalesRep__c` (Order) → Direct agent reference
+- `Lead_Owner__c`, `Owner__c` (Lead) → Agent assignment
+
+### Dealer Fields
+- `POE_Dealer__c` (Order, Opportunity) → Dealer account ID
+- `Account.POE_Dealer_Code__c` → Dealer code
+- `Account.Name` (filtered by Type) → Dealer name
+
+### Program/Channel Fields
+- `POE_Program__c` (Order) → Program name (Frontier, EarthLink, Charter/Spectrum)
+- `Division__c` (Lead, Account) → Sales division (DOM, etc.)
+- `Call_Center_Type__c` (Order) → Channel type
+- `POE_RepTitle__c` (Order) → Rep title/role
+
+> **⚠️ Ambiguity:** Confirm with client whether Account records represent dealers or customers.
+
+---
+
+## Risks & Assumptions
+
+"""
+NUMBERED_ITEM = Template("$number. $text\n")
+RISK_SAMPLE = Template("**Sample Limitations**: Assessed on $records records across $files files; production data may "
+                       "have different field population rates.")
+RISK_IP_MISSING = "**IP Address Gap**: No IP address field found in the exports. Client should confirm if IPs are " \
+                  "captured during order submission."
+RISK_IP_SPARSE = Template("**IP Address Gap**: IP address field is sparsely populated in $source (`$column`, $null_pct% "
+                          "null). Client should confirm if IPs are captured during order submission.")
+RISK_USER = "**User Object Missing**: Salesperson names require User object export (not provided)."
+RISK_HISTORY = Template("**Historical Depth Unknown**: Cannot assess seasonality or pattern detection with only "
+                        "$records records per file.")
+RISK_LABELS = "**Label Data Missing**: No `is_fraud` or `is_suspicious` labels present for model training " \
+              "(Bucket 3 requirement)."
+CONCLUSION = Template("""
+---
+
+## Conclusion
+
+**Bucket 1 Readiness: $readiness%** of Bucket 1 fields present ($low_quality of them low quality) - $verdict
+
+**Next Steps:**
+""")
+VERDICT_READY = "core fields present, transformations needed."
+VERDICT_BLOCKED = Template("$missing of $total core fields missing.")
+STEP_IP = "Request IP address capture at order submission"
+STEP_USER = "Export User object for salesperson name resolution"
+STEP_MAPPINGS = "Confirm agent/dealer/program field mappings with client"
+STEP_HISTORY = "Request historical data (1+ year, 10k+ records) with fraud labels for Bucket 2/3"
+# Files with fewer rows than this are too shallow to judge seasonality.
+HISTORY_MIN_RECORDS = 10_000
+LABEL_COLUMNS = {"is_fraud", "is_suspicious"}
+
+
+def missing_by_bucket(matrix, layers, expectations):
+    bucket1_blocking = []
+    bucket2_fields = []
+    bucket3_fields = []
+    for row in matrix:
+        if row["status"] == "Missing":
+            field = row["expected_field"]
+            for layer_name, layer_info in layers.items():
+                if field in layer_info["required_fields"] and layer_info["bucket"] == 1:
+                    bucket1_blocking.append({"field": field, "layer": layer_name})
+                    break
+            if field in expectations:
+                bucket = expectations[field]["bucket"]
+                if bucket == 2:
+                    bucket2_fields.append(field)
+                elif bucket == 3:
+                    bucket3_fields.append(field)
+    return bucket1_blocking, bucket2_fields, bucket3_fields
+
+
+def report_sections(matrix, csv_analyses, layers, expectations, generated=DEFAULT_REPORT_DATE,
+                    data_source=DEFAULT_DATA_SOURCE):
+    bucket1_blocking, bucket2_fields, bucket3_fields = missing_by_bucket(matrix, layers, expectations)
+
+    yield HEADER.substitute(generated=generated, data_source=data_source)
+    if not bucket1_blocking:
+        yield BUCKET1_DELIVERABLE
+    else:
+        yield BUCKET1_BLOCKED
+        for item in bucket1_blocking[:10]:
+            yield BLOCKED_ROW.substitute(item)
+        yield "\n"
+
+    yield COVERAGE_SUMMARY.substitute(
+        present=len([r for r in matrix if "Present" in r["status"]]),
+        missing=len([r for r in matrix if r["status"] == "Missing"]),
+        low_quality=len([r for r in matrix if "low quality" in r["status"]]),
+        total=len(matrix))
+    for filename, analysis in csv_analyses.items():
+        yield CSV_OVERVIEW.substitute(filename=filename, rows=analysis["total_rows"], columns=analysis["total_columns"])
+
+    yield CRITICAL_MISSING
+    if bucket1_blocking:
+        yield CRITICAL_HEADER
+        seen = set()
+        for item in bucket1_blocking:
+            if item["field"] not in seen:
+                seen.add(item["field"])
+                suggested = expectations.get(item["field"], {}).get("suggested_source", "N/A")
+                yield CRITICAL_ROW.substitute(item, suggested=suggested)
+    else:
+        yield NO_CRITICAL
+
+    yield RECOMMENDATIONS
+    if any(r["expected_field"] == "ip" and r["status"] == "Missing" for r in matrix):
+        yield IP_REQUEST
+    yield BUCKET2
+    for field in bucket2_fields:
+        yield BUCKET2_ROW.substitute(field=field, description=expectations.get(field, {}).get("description", ""),
+                                     source=expectations.get(field, {}).get("suggested_source", "TBD"))
+    if not bucket2_fields:
+        yield BUCKET2_NONE
+    yield BUCKET3
+    for field in bucket3_fields:
+        yield BUCKET3_ROW.substitute(field=field, description=expectations.get(field, {}).get("description", ""),
+                                     source=expectations.get(field, {}).get("suggested_source", "TBD"))
+    if not bucket3_fields:
+        yield BUCKET3_NONE
+
+    yield TRANSFORMATIONS
+    high_null_fields = [r for r in matrix if r["null_pct"] and r["null_pct"] > 50]
+    if high_null_fields:
+        yield HIGH_NULL_HEADER
+        for r in high_null_fields[:10]:
+            yield HIGH_NULL_ROW.substitute(field=r["expected_field"], null_pct=r["null_pct"], source=r["source_file"])
+    else:
+        yield NO_HIGH_NULL
+    yield from closing_sections(matrix, csv_analyses, layers, bucket1_blocking)
+
+
+def closing_sections(matrix, csv_analyses, layers, bucket1_blocking):
+    # Risks, readiness and next steps, from this client's exports.
+    rows = {r["expected_field"]: r for r in matrix}
+    ip = rows.get("ip")
+    ip_gap = ip is None or ip["status"] == "Missing" or (ip["null_pct"] or 0) > 50
+    user_missing = "User.csv" not in csv_analyses
+    row_counts = sorted(analysis["total_rows"] for analysis in csv_analyses.values())
+    shallow = not row_counts or row_counts[-1] < HISTORY_MIN_RECORDS
+    columns = {c["name"].lower() for analysis in csv_analyses.values() for c in analysis["columns"]}
+    columns |= {name.lower() for analysis in csv_analyses.values() for name in analysis.get("unparsed_columns", [])}
+
+    risks = [RISK_SAMPLE.substitute(records=sum(row_counts), files=len(row_counts))]
+    if ip_gap:
+        risks.append(RISK_IP_MISSING if ip is None or ip["status"] == "Missing" else RISK_IP_SPARSE.substitute(
+            source=ip["source_file"], column=ip["source_column"], null_pct=ip["null_pct"]))
+    if user_missing:
+        risks.append(RISK_USER)
+    if shallow:
+        depth = f"{row_counts[0]}-{row_counts[-1]}" if row_counts and row_counts[0] != row_counts[-1] \
+            else str(row_counts[0] if row_counts else 0)
+        risks.append(RISK_HISTORY.substitute(records=depth))
+    if not columns & LABEL_COLUMNS:
+        risks.append(RISK_LABELS)
+    yield FIELD_MAPPING_NOTES
+    for number, text in enumerate(risks, 1):
+        yield NUMBERED_ITEM.substitute(number=number, text=text)
+
+    bucket1_fields = list(dict.fromkeys(
+        field for layer in layers.values() if layer["bucket"] == 1 for field in layer["required_fields"]))
+    present = [f for f in bucket1_fields if f in rows and "Present" in rows[f]["status"]]
+    missing = len({item["field"] for item in bucket1_blocking})
+    yield CONCLUSION.substitute(
+        readiness=round(len(present) / len(bucket1_fields) * 100) if bucket1_fields else 100,
+        low_quality=len([f for f in present if "low quality" in rows[f]["status"]]),
+        verdict=VERDICT_BLOCKED.substitute(missing=missing, total=len(bucket1_fields)) if missing else VERDICT_READY)
+    steps = [STEP_IP] if ip_gap else []
+    steps += [STEP_USER] if user_missing else []
+    steps.append(STEP_MAPPINGS)
+    steps += [STEP_HISTORY] if shallow or not columns & LABEL_COLUMNS else []
+    for number, text in enumerate(steps, 1):
+        yield NUMBERED_ITEM.substitute(number=number, text=text)
+
+
+def render_report(out, matrix, csv_analyses, layers, expectations, generated=DEFAULT_REPORT_DATE,
+                  data_source=DEFAULT_DATA_SOURCE):
+    for section in report_sections(matrix, csv_analyses, layers, expectations, generated, data_source):
+        out.write(section)
+
+
+def write_json_array(out, items, default=str):
+    # Streams a list of JSON objects byte-for-byte as json.dump(list, indent=2)
+    # would lay it out, encoding one item at a time. JSON strings never hold
+    # raw newlines, so indenting an item's lines nests it one level.
+    encoder = json.JSONEncoder(indent=2, default=default)
+    count = 0
+    for item in items:
+        out.write(",\n  " if count else "[\n  ")
+        out.write(encoder.encode(item).replace("\n", "\n  "))
+        count += 1
+    out.write("\n]" if count else "[]")
+    return count
+
+
+def render_client(job, layers, expectations):
+    # job: {"output_dir", "matrix", "csv_analyses", "mappings", optional
+    # "generated" and "data_source"}; writes the client's mapping.json and
+    # REPORT_data_readiness.md.
+    output_dir = Path(job["output_dir"])
+    atomic_write(output_dir / "mapping.json", lambda f: write_json_array(f, job["mappings"]))
+    atomic_write(output_dir / "REPORT_data_readiness.md", lambda f: render_report(
+        f, job["matrix"], job["csv_analyses"], layers, expectations,
+        job.get("generated", DEFAULT_REPORT_DATE), job.get("data_source", DEFAULT_DATA_SOURCE)))
+    return output_dir
+
+
+def render_reports(jobs, layers, expectations, workers=None):
+    # Many clients' outputs from one process; rendering is short and the
+    # threads mostly overlap file writes.
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(lambda job: render_client(job, layers, expectations), jobs))
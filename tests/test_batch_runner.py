@@ -0,0 +1,63 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+import analyze_client_data as acd
+import batch_runner
+
+
+def _account(n, prefix, names, codes):
+    return pd.DataFrame({
+        "Id": [f"001{prefix}{i:014d}" for i in range(n)],
+        "Name": [names[i % len(names)] for i in range(n)],
+        "Code": [codes(i) for i in range(n)],
+        "BillingCity": ["Dallas"] * n,
+    })
+
+
+@pytest.mark.parametrize("first_encoding", ["latin-1", "utf-8"])
+def test_shared_schema_matches_cold_runs(tmp_path, monkeypatch, first_encoding):
+    # Two clients on one header: the larger one runs first and warms the
+    # cache for the other, which uses another encoding and other dtypes.
+    monkeypatch.setattr(acd, "DIALECT_CACHE_PATH", tmp_path / "dialects.json")
+    second_encoding = "utf-8" if first_encoding == "latin-1" else "latin-1"
+    drops = {
+        "a": (_account(400, "A", ["José Müller", "Zoë Núñez"], lambda i: f"X{i % 7}"), first_encoding),
+        "b": (_account(50, "B", ["José", "Zoë"], lambda i: 31349 + i), second_encoding),
+    }
+    for client, (frame, encoding) in drops.items():
+        for root in ("together", f"alone_{client}"):
+            (tmp_path / root / client).mkdir(parents=True)
+            frame.to_csv(tmp_path / root / client / "Account.csv", index=False, encoding=encoding)
+
+    summary = batch_runner.run_batch(tmp_path / "together", tmp_path / "out_together", workers=1,
+                                     schema_cache_path=tmp_path / "together.json")
+    assert summary["warm_schema_hits"] == 1
+    for client in drops:
+        batch_runner.run_batch(tmp_path / f"alone_{client}", tmp_path / "out_alone", workers=1,
+                               schema_cache_path=tmp_path / f"alone_{client}.json")
+        for output in ("mapping.json", "REPORT_data_readiness.md", "empty_columns_report.txt"):
+            together = (tmp_path / "out_together" / client / output).read_bytes()
+            assert together == (tmp_path / "out_alone" / client / output).read_bytes()
+
+
+def test_warm_schema_keeps_the_clients_own_encoding(tmp_path, monkeypatch):
+    monkeypatch.setattr(acd, "DIALECT_CACHE_PATH", tmp_path / "dialects.json")
+    a, b = tmp_path / "a" / "Account.csv", tmp_path / "b" / "Account.csv"
+    a.parent.mkdir()
+    b.parent.mkdir()
+    _account(400, "A", ["José Müller", "Zoë Núñez"], lambda i: f"X{i % 7}").to_csv(a, index=False, encoding="latin-1")
+    _account(50, "B", ["José", "Zoë"], lambda i: 31349 + i).to_csv(b, index=False, encoding="utf-8")
+    batch_runner._init_worker(tmp_path / "schemas.json")
+    acd.analyze_csv(a)
+    batch_runner._learn_schema(a)
+
+    assert batch_runner._warm_schema(b)
+    analysis, df = acd.analyze_csv(b)
+    assert df["Name"].head(2).tolist() == ["José", "Zoë"]
+    assert analysis["columns"][2]["dtype"] == "int64"
+    assert not (tmp_path / "dialects.json").read_text(encoding="utf-8").count(str(b))
@@ -0,0 +1,27 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+import analyze_client_data as acd
+from canonical_record import iter_canonical_records
+
+
+def test_customer_name_only_from_person_accounts(tmp_path, monkeypatch):
+    monkeypatch.setattr(acd, "DIALECT_CACHE_PATH", tmp_path / "dialects.json")
+    pd.DataFrame({
+        "Id": ["001000000000001AAA", "001000000000002AAA", "001000000000003AAA"],
+        "Name": ["Jane Doe", "Acme Wireless LLC", "Best Dealer Inc"],
+        "IsPersonAccount": ["true", "false", "false"],
+    }).to_csv(tmp_path / "Account.csv", index=False)
+    pd.DataFrame({
+        "Id": ["801000000000001AAA", "801000000000002AAA"],
+        "AccountId": ["001000000000001AAA", "001000000000002AAA"],
+        "POE_Dealer__c": ["001000000000003AAA", "001000000000003AAA"],
+    }).to_csv(tmp_path / "Order.csv", index=False)
+
+    batch = pd.concat(iter_canonical_records(tmp_path, fields=["customer_name", "dealer_name"]))
+    assert batch["customer_name"].tolist() == ["Jane Doe", None]
+    assert batch["dealer_name"].tolist() == ["Best Dealer Inc", "Best Dealer Inc"]
@@ -0,0 +1,37 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+import entity_resolution as er
+
+
+def _identities(n, email, zip_code):
+    return er.normalize_identities(pd.DataFrame({
+        "object": "Contact",
+        "record_id": [f"003{i:015d}" for i in range(n)],
+        "customer_name": [f"Person{i} Smith" for i in range(n)],
+        "email": [email(i) for i in range(n)],
+        "cust_street": None,
+        "zip_code": [zip_code(i) for i in range(n)],
+    }))
+
+
+def test_shared_email_in_oversized_domain_block_is_compared():
+    # 1,200 gmail.com records, each email used twice at different zips.
+    normalized = _identities(1200, lambda i: f"user{i // 2}@gmail.com", lambda i: f"{10000 + i:05d}")
+    pairs, _ = er.candidate_pairs(normalized)
+    matched, _ = er.score_pairs(normalized, pairs)
+    linked = {tuple(pair) for pair in pairs[matched]}
+    assert {(i, i + 1) for i in range(0, 1200, 2)} <= linked
+
+
+def test_oversized_blocks_are_split_not_dropped():
+    # One zip and one domain shared by all; names split them into pairs.
+    normalized = _identities(1200, lambda i: f"p{i}@gmail.com", lambda i: "75201")
+    normalized["name_key"] = [f"K{i // 2}" for i in range(1200)]
+    pairs, skipped = er.candidate_pairs(normalized, blocking_keys=["zip5", "email_domain"])
+    assert skipped == {"zip5": 0, "email_domain": 0}
+    assert len(pairs) == 600
@@ -0,0 +1,45 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+import analyze_client_data as acd
+
+
+@pytest.fixture
+def export(tmp_path, monkeypatch):
+    monkeypatch.setattr(acd, "DIALECT_CACHE_PATH", tmp_path / "dialects.json")
+    rng = np.random.default_rng(0)
+    n = 3000
+    flags = np.where(rng.random(n) < 0.5, "true", "false")
+    pd.DataFrame({
+        "Id": [f"001{i:015d}" for i in range(n)],
+        "IsActive": np.where(rng.random(n) < 0.3, None, flags),
+        "IsDeleted": flags,
+        "Status": ["true"] * (n // 2) + ["closed"] * (n - n // 2),
+        "Code": [str(31349 + i) if i < n // 2 else f"X{i}" for i in range(n)],
+        "Amount": np.where(rng.random(n) < 0.2, None, rng.integers(0, 500, n).astype(str)),
+        "Name": ["José", "Zoë", None] * (n // 3),
+    }).to_csv(tmp_path / "Account.csv", index=False)
+    return tmp_path / "Account.csv"
+
+
+def _columns(analysis):
+    return [(c["name"], c["dtype"], c["null_count"], c["sample_values"]) for c in analysis["columns"]]
+
+
+@pytest.mark.parametrize("chunk_bytes, chunksize", [(4_000, 500), (50_000, 997), (acd.PARALLEL_CHUNK_BYTES, 7_000)])
+def test_parallel_profile_matches_analyze_csv(export, chunk_bytes, chunksize):
+    expected, _ = acd.analyze_csv(export)
+    parallel = acd.analyze_csv_files_parallel([export], workers=2, chunk_bytes=chunk_bytes, chunksize=chunksize)
+    assert _columns(parallel["Account.csv"]) == _columns(expected)
+
+
+@pytest.mark.parametrize("chunksize", [500, 997, 7_000])
+def test_streaming_profile_matches_analyze_csv(export, chunksize):
+    expected, _ = acd.analyze_csv(export)
+    assert _columns(acd.analyze_csv_streaming(export, chunksize=chunksize)) == _columns(expected)
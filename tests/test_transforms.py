@@ -0,0 +1,17 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+import transforms
+
+
+def test_dates_keep_the_local_calendar_day():
+    values = pd.Series(["2025-12-15T23:30-0500", "2025-12-15T23:30:00.000+0000", "2025-12-15 00:15:00+05:30",
+                        "2025-12-15", None])
+    assert transforms.standardize_date(values).tolist() == ["2025-12-15"] * 4 + [pd.NA]
+    assert transforms.day_ordinal(values).tolist() == [20437] * 4 + [pd.NA]
+    install = pd.Series(["2025-12-10T22:00:00-0800"])
+    assert transforms.days_between(install, pd.Series(["2025-12-12T09:00:00-0800"])).tolist() == [1]
@@ -0,0 +1,18 @@
+import sys
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+import validation_dispatcher as vd
+
+
+def test_retry_after_accepts_seconds_and_http_dates():
+    assert vd.retry_after_seconds("3") == 3.0
+    assert vd.retry_after_seconds(format_datetime(datetime.now(timezone.utc) - timedelta(minutes=1), usegmt=True)) == 0
+    later = vd.retry_after_seconds(format_datetime(datetime.now(timezone.utc) + timedelta(seconds=30), usegmt=True))
+    assert 25 < later <= 30
+    assert vd.retry_after_seconds("Wed, 21 Oct 2015 07:28:00 GMT") == 0
+    assert vd.retry_after_seconds("soon") is None
+    assert vd.retry_after_seconds(None) is None
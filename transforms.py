@@ -0,0 +1,206 @@
+import argparse
+import re
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from atomic_io import atomic_write
+
+# USPS street suffixes and unit designators, matched with an optional
+# trailing period ("Ave." and "AVE" both become "Avenue").
+STREET_SUFFIXES = {
+    "ALY": "Alley", "AVE": "Avenue", "AV": "Avenue", "BLVD": "Boulevard", "BND": "Bend", "CIR": "Circle",
+    "CT": "Court", "CTR": "Center", "CV": "Cove", "DR": "Drive", "EXPY": "Expressway", "FWY": "Freeway",
+    "HTS": "Heights", "HWY": "Highway", "LN": "Lane", "LOOP": "Loop", "PKWY": "Parkway", "PL": "Place",
+    "PLZ": "Plaza", "PT": "Point", "RD": "Road", "RTE": "Route", "SQ": "Square", "ST": "Street",
+    "TER": "Terrace", "TRL": "Trail", "WAY": "Way", "XING": "Crossing",
+}
+UNIT_DESIGNATORS = {"APT": "Apartment", "BLDG": "Building", "FL": "Floor", "STE": "Suite", "UNIT": "Unit",
+                    "RM": "Room"}
+
+
+def _alternation(words):
+    return "|".join(sorted(words, key=len, reverse=True))
+
+
+# The street line of a flattened address: everything up to the suffix as
+# its last word, optionally followed by a unit on the same line or as the
+# next line. Whatever follows (city, state, zip) is kept as is, so "St." in
+# "12 St. Paul Ave" and the state in "..., Hartford, CT" are never expanded.
+STREET_LINE_RE = re.compile(
+    r"^(?P<street>[^,]*\s)(?P<suffix>" + _alternation(STREET_SUFFIXES) + r")\.?"
+    r"(?:(?P<unit_sep>\s+|,\s)(?P<unit>" + _alternation(UNIT_DESIGNATORS) + r")\.?(?P<unit_id>\s+#?\s*[\w-]+))?"
+    r"(?P<rest>,.*)?$", re.IGNORECASE)
+MULTILINE_RE = re.compile(r"\s*[\r\n]+\s*")
+WHITESPACE_RE = re.compile(r"\s{2,}")
+# A UTC offset after a time of day. Dates are kept in the zone they were
+# recorded in, so the offset is dropped rather than converted: an order
+# at 23:30 -05:00 belongs to that day, not the next one in UTC.
+UTC_OFFSET_RE = re.compile(r"(\d{2}:\d{2}(?::\d{2}(?:\.\d+)?)?)\s*(?:Z|[+-]\d{2}:?\d{2})$")
+
+STATE_CODES = {
+    "ALABAMA": "AL", "ALASKA": "AK", "ARIZONA": "AZ", "ARKANSAS": "AR", "CALIFORNIA": "CA", "COLORADO": "CO",
+    "CONNECTICUT": "CT", "DELAWARE": "DE", "DISTRICT OF COLUMBIA": "DC", "FLORIDA": "FL", "GEORGIA": "GA",
+    "HAWAII": "HI", "IDAHO": "ID", "ILLINOIS": "IL", "INDIANA": "IN", "IOWA": "IA", "KANSAS": "KS",
+    "KENTUCKY": "KY", "LOUISIANA": "LA", "MAINE": "ME", "MARYLAND": "MD", "MASSACHUSETTS": "MA",
+    "MICHIGAN": "MI", "MINNESOTA": "MN", "MISSISSIPPI": "MS", "MISSOURI": "MO", "MONTANA": "MT",
+    "NEBRASKA": "NE", "NEVADA": "NV", "NEW HAMPSHIRE": "NH", "NEW JERSEY": "NJ", "NEW MEXICO": "NM",
+    "NEW YORK": "NY", "NORTH CAROLINA": "NC", "NORTH DAKOTA": "ND", "OHIO": "OH", "OKLAHOMA": "OK",
+    "OREGON": "OR", "PENNSYLVANIA": "PA", "PUERTO RICO": "PR", "RHODE ISLAND": "RI", "SOUTH CAROLINA": "SC",
+    "SOUTH DAKOTA": "SD", "TENNESSEE": "TN", "TEXAS": "TX", "UTAH": "UT", "VERMONT": "VT", "VIRGINIA": "VA",
+    "WASHINGTON": "WA", "WEST VIRGINIA": "WV", "WISCONSIN": "WI", "WYOMING": "WY",
+}
+
+
+def clean_text(values):
+    text = pd.Series(values).astype("string").str.strip()
+    return text.mask(text == "")
+
+
+def coalesce_columns(frame, columns):
+    # First non-empty value across `columns` in order; "A+B" joins two name
+    # parts. Columns missing from the frame are skipped.
+    values = pd.Series(pd.NA, index=frame.index, dtype="string")
+    for column in columns:
+        if "+" in column:
+            first, last = column.split("+")
+            if first in frame.columns and last in frame.columns:
+                values = values.fillna(derive_full_name(frame[first], frame[last]).set_axis(frame.index))
+        elif column in frame.columns:
+            values = values.fillna(clean_text(frame[column]).set_axis(frame.index))
+    return values
+
+
+def normalize_email(values):
+    return clean_text(values).str.lower()
+
+
+def derive_full_name(first, last):
+    first, last = clean_text(first), clean_text(last)
+    joined = first.str.cat(last, sep=" ", na_rep="").str.strip()
+    return joined.mask(joined == "")
+
+
+def normalize_name(values):
+    return clean_text(values).str.replace(WHITESPACE_RE, " ", regex=True)
+
+
+def normalize_street(values):
+    # Multi-line addresses are flattened to one comma-separated line. Each
+    # distinct address is then split by one compiled pattern and its suffix
+    # and unit words swapped through the lookup tables.
+    street = clean_text(values).str.replace(MULTILINE_RE, ", ", regex=True)
+    codes, uniques = pd.factorize(street)
+    uniques = pd.Series(uniques, dtype="string")
+    parts = uniques.str.extract(STREET_LINE_RE)
+    unit = parts["unit_sep"] + parts["unit"].str.upper().map(UNIT_DESIGNATORS) + parts["unit_id"]
+    expanded = parts["street"] + parts["suffix"].str.upper().map(STREET_SUFFIXES) + unit.fillna("") \
+        + parts["rest"].fillna("")
+    uniques = expanded.fillna(uniques).str.replace(WHITESPACE_RE, " ", regex=True)
+    return uniques.reindex(codes).set_axis(street.index)
+
+
+def merge_state_fields(*columns):
+    # The first populated column wins, and full state names become the ISO
+    # code so BillingState, BillingStateCode and ShippingState agree.
+    merged = clean_text(columns[0])
+    for column in columns[1:]:
+        merged = merged.fillna(clean_text(column).set_axis(merged.index))
+    upper = merged.str.upper()
+    return upper.map(STATE_CODES).fillna(upper).astype("string")
+
+
+def parse_local_datetime(values):
+    local = clean_text(values).str.replace(UTC_OFFSET_RE, r"\1", regex=True)
+    return pd.to_datetime(local, errors="coerce", format="ISO8601")
+
+
+def standardize_date(values):
+    return parse_local_datetime(values).dt.strftime("%Y-%m-%d").astype("string")
+
+
+def days_between(start, end):
+    start = parse_local_datetime(start)
+    end = parse_local_datetime(end).set_axis(start.index)
+    return (end - start).dt.days.astype("Int64")
+
+
+def day_ordinal(values):
+    # Days since 1970-01-01, the integer date key used by the precomputed
+    # stages.
+    return (parse_local_datetime(values) - pd.Timestamp(0)).dt.days.astype("Int64")
+
+
+# Each transform reads some columns of a canonical batch and writes one.
+# Transforms whose inputs are missing from a batch are skipped.
+TRANSFORMS = {
+    "email_lowercase": {"inputs": ["email"], "output": "email", "func": normalize_email},
+    "customer_name": {"inputs": ["customer_name"], "output": "customer_name", "func": normalize_name},
+    "street_abbreviations": {"inputs": ["cust_street"], "output": "cust_street", "func": normalize_street},
+    "state_merge": {"inputs": ["cust_state"], "output": "cust_state", "func": merge_state_fields},
+    "order_date": {"inputs": ["order_date"], "output": "order_date", "func": standardize_date},
+    "install_to_activation_days": {"inputs": ["install_date", "activation_date"],
+                                   "output": "install_to_activation_days", "func": days_between},
+}
+
+
+def new_transform_metrics():
+    return {name: {"rows": 0, "seconds": 0.0} for name in TRANSFORMS}
+
+
+def apply_transforms(batch, metrics=None, transforms=None):
+    batch = batch.copy()
+    for name in transforms or TRANSFORMS:
+        spec = TRANSFORMS[name]
+        if not all(column in batch.columns for column in spec["inputs"]):
+            continue
+        start = time.perf_counter()
+        result = spec["func"](*(batch[column] for column in spec["inputs"]))
+        batch[spec["output"]] = result.set_axis(batch.index)
+        if metrics is not None:
+            metrics[name]["seconds"] += time.perf_counter() - start
+            metrics[name]["rows"] += len(batch)
+    return batch
+
+
+def run_transforms(batches, metrics, transforms=None):
+    for batch in batches:
+        yield apply_transforms(batch, metrics, transforms)
+
+
+def throughput_report(metrics):
+    return {
+        name: dict(stats, rows_per_sec=round(stats["rows"] / stats["seconds"]) if stats["seconds"] else None)
+        for name, stats in metrics.items() if stats["rows"]
+    }
+
+
+def main(argv=None):
+    # canonical_record imports this module for name derivation, so the
+    # pipeline entry points are imported here rather than at module level.
+    from analyze_client_data import DEFAULT_CHUNKSIZE, WORKSPACE
+    from canonical_record import iter_canonical_records
+
+    parser = argparse.ArgumentParser(description="Normalize canonical order records and report transform throughput.")
+    parser.add_argument("--workspace", type=Path, default=WORKSPACE)
+    parser.add_argument("--output", type=Path, default=None)
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    args = parser.parse_args(argv)
+
+    output = args.output or args.workspace / "canonical_orders_normalized.csv"
+    metrics = new_transform_metrics()
+    batches = run_transforms(iter_canonical_records(args.workspace, args.chunksize), metrics)
+    def write(f):
+        for i, batch in enumerate(batches):
+            batch.to_csv(f, index=False, header=i == 0)
+
+    atomic_write(output, write, newline="")
+
+    print(f"Normalized records written to {output}")
+    for name, stats in throughput_report(metrics).items():
+        print(f"  - {name}: {stats['rows']} rows in {stats['seconds']:.3f}s ({stats['rows_per_sec']} rows/sec)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+import argparse
+import asyncio
+import email.utils
+import ipaddress
+import json
+import random
+import time
+import urllib.error
+import urllib.request
+from collections import OrderedDict
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from analyze_client_data import DEFAULT_CHUNKSIZE, WORKSPACE
+from atomic_io import atomic_write
+from canonical_record import iter_canonical_records
+from permanent_memory_index import lookup_keys
+from transforms import clean_text
+from validation_stub_server import start_stub_server
+
+# Per-provider client settings. "key" picks the normalized value results are
+# cached under; batch_size > 1 is used where the provider accepts several
+# records per call (Smarty takes up to 100 addresses per POST).
+PROVIDERS = {
+    "google_address": {"layer": "Google Address Validation", "key": "address", "batch_size": 1,
+                       "concurrency": 8, "rate_per_sec": 25.0},
+    "smarty_address": {"layer": "Smarty Address Validation", "key": "address", "batch_size": 100,
+                       "concurrency": 4, "rate_per_sec": 10.0},
+    "ip_address": {"layer": "IP Address Layer", "key": "ip", "batch_size": 1, "concurrency": 8, "rate_per_sec": 20.0},
+    "ai_prompt": {"layer": "AI Prompt Layer", "key": "identity", "batch_size": 1, "concurrency": 4,
+                  "rate_per_sec": 5.0},
+}
+REQUEST_FIELDS = ["customer_name", "email", "cust_street", "cust_city", "cust_state", "zip_code", "gender", "ip"]
+MAX_CONCURRENCY = 32
+MAX_RETRIES = 4
+BACKOFF_BASE = 0.2
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+REQUEST_TIMEOUT = 30.0
+DEFAULT_TTL = 24 * 3600
+
+
+class TTLCache:
+    # Results keyed by "<provider>:<normalized key>". Entries expire after
+    # ttl seconds and the least recently used are dropped past max_entries.
+
+    def __init__(self, ttl=DEFAULT_TTL, max_entries=1_000_000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0}
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+        expires, value = entry
+        if expires <= time.monotonic():
+            del self.entries[key]
+            self.stats["expired"] += 1
+            self.stats["misses"] += 1
+            return None
+        self.entries.move_to_end(key)
+        self.stats["hits"] += 1
+        return value
+
+    def put(self, key, value):
+        self.entries[key] = (time.monotonic() + self.ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+
+class RateLimiter:
+    # Token bucket allowing rate_per_sec calls with bursts up to one second.
+    # The bucket always holds at least one whole call, so rates below one
+    # per second space calls 1/rate seconds apart instead of never refilling.
+
+    def __init__(self, rate_per_sec):
+        if rate_per_sec <= 0:
+            raise ValueError(f"rate_per_sec must be positive, got {rate_per_sec}")
+        self.rate = rate_per_sec
+        self.capacity = max(rate_per_sec, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def _public_ip(value):
+    try:
+        return str(ipaddress.ip_address(value)) if ipaddress.ip_address(value).is_global else None
+    except ValueError:
+        return None
+
+
+def request_keys(frame, kind):
+    # Normalized cache key per row, None where the provider has nothing to
+    # validate. Only public IPs are sent, as the IP Address layer requires.
+    if kind == "address":
+        return lookup_keys(frame)["full_address"]
+    if kind == "ip":
+        ips = clean_text(frame["ip"]).str.lower()
+        unique = ips.dropna().unique()
+        return ips.map(dict(zip(unique, (_public_ip(ip) for ip in unique)))).astype("string")
+    keys = lookup_keys(frame)
+    identity = keys["name"].fillna("").str.cat([keys["email"].fillna(""), keys["street"].fillna(""),
+                                                clean_text(frame["gender"]).str.lower().fillna(""),
+                                                keys["zip5"].fillna(""), keys["city"].fillna("")], sep="|")
+    return identity.mask(keys["name"].isna() & keys["email"].isna())
+
+
+def _post_json(url, body, timeout=REQUEST_TIMEOUT):
+    request = urllib.request.Request(url, data=json.dumps(body).encode("utf-8"), method="POST",
+                                     headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.load(response)
+
+
+def retry_after_seconds(value):
+    # Retry-After is either delta-seconds or an HTTP-date. None when it is
+    # absent or unparseable, so the caller falls back to its own backoff.
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when is None:
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+async def _send_batch(provider, batch, context):
+    # Retries 429/5xx and connection errors with jittered exponential backoff,
+    # honouring Retry-After; other errors become per-record error results.
+    stats = context["stats"][provider]
+    body = {"records": [{"key": key, "payload": payload} for key, payload in batch]}
+    url = f"{context['base_url']}/{provider}"
+    loop = asyncio.get_running_loop()
+    for attempt in range(MAX_RETRIES + 1):
+        # The global slot is only taken once this provider's own limits
+        # allow the call, so a throttled provider cannot starve the others.
+        async with context["provider_semaphores"][provider]:
+            await context["limiters"][provider].acquire()
+            stats["requests"] += 1
+            try:
+                async with context["semaphore"]:
+                    response = await loop.run_in_executor(context["executor"], _post_json, url, body)
+                return [(key, result) for (key, _), result in zip(batch, response["results"])]
+            except urllib.error.HTTPError as error:
+                retry_after = error.headers.get("Retry-After") if error.headers else None
+                if error.code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                    failure = f"HTTP {error.code}"
+                    break
+            except (urllib.error.URLError, TimeoutError, ConnectionError) as error:
+                retry_after = None
+                if attempt == MAX_RETRIES:
+                    failure = str(error)
+                    break
+        stats["retries"] += 1
+        delay = retry_after_seconds(retry_after)
+        if delay is None:
+            delay = BACKOFF_BASE * 2 ** attempt * (0.5 + random.random())
+        await asyncio.sleep(delay)
+    stats["failures"] += len(batch)
+    return [(key, {"error": failure}) for key, _ in batch]
+
+
+async def _dispatch_provider(frame, provider, context):
+    spec, stats, cache = PROVIDERS[provider], context["stats"][provider], context["cache"]
+    start = time.perf_counter()
+    keys = request_keys(frame, spec["key"])
+    present = keys.notna().to_numpy()
+    first_rows = pd.Series(np.flatnonzero(present), index=keys[present].to_numpy())
+    first_rows = first_rows[~first_rows.index.duplicated()]
+    results = {}
+    for key in first_rows.index:
+        cached = cache.get(f"{provider}:{key}")
+        if cached is not None:
+            results[key] = cached
+    missing = first_rows[~first_rows.index.isin(list(results))]
+    payloads = frame.iloc[missing.to_numpy()][[f for f in REQUEST_FIELDS if f in frame.columns]].astype(object)
+    pending = list(zip(missing.index, payloads.where(payloads.notna(), None).to_dict("records")))
+    stats.update(rows=int(len(frame)), unique_keys=int(len(first_rows)), cache_hits=len(results))
+
+    size = spec["batch_size"]
+    batches = [pending[i:i + size] for i in range(0, len(pending), size)]
+    for answered in await asyncio.gather(*(_send_batch(provider, batch, context) for batch in batches)):
+        for key, result in answered:
+            results[key] = result
+            if "error" not in result:
+                cache.put(f"{provider}:{key}", result)
+    stats["seconds"] = time.perf_counter() - start
+    return keys.map(results).set_axis(frame.index)
+
+
+async def dispatch(frame, providers, base_url, cache, max_concurrency=MAX_CONCURRENCY):
+    # All providers run at once under one global concurrency bound, each
+    # also limited by its own concurrency and rate settings.
+    context = {
+        "base_url": base_url.rstrip("/"),
+        "cache": cache,
+        "semaphore": asyncio.Semaphore(max_concurrency),
+        "provider_semaphores": {p: asyncio.Semaphore(PROVIDERS[p]["concurrency"]) for p in providers},
+        "limiters": {p: RateLimiter(PROVIDERS[p]["rate_per_sec"]) for p in providers},
+        "stats": {p: {"requests": 0, "retries": 0, "failures": 0} for p in providers},
+    }
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        context["executor"] = executor
+        columns = await asyncio.gather(*(_dispatch_provider(frame, p, context) for p in providers))
+    return pd.DataFrame(dict(zip(providers, columns)), index=frame.index), context["stats"]
+
+
+def synthetic_records(n, seed=0):
+    # Offline load for throughput runs: repeating addresses and IPs so the
+    # cache and de-duplication have something to do.
+    rng = np.random.default_rng(seed)
+    ids = rng.integers(0, max(n // 2, 1), n)
+    return pd.DataFrame({
+        "customer_name": pd.Series(ids, dtype=str).radd("Customer "),
+        "email": pd.Series(ids, dtype=str).radd("user").add("@example.com"),
+        "cust_street": pd.Series(ids % 5000, dtype=str) + " Main St",
+        "cust_city": "Dallas", "cust_state": "TX",
+        "zip_code": pd.Series(75000 + ids % 300, dtype=str),
+        "gender": rng.choice(["M", "F"], n),
+        "ip": [f"8.{(i >> 16) % 256}.{(i >> 8) % 256}.{i % 256}" for i in ids],
+    })
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the external validation layers over canonical records.")
+    parser.add_argument("--workspace", type=Path, default=WORKSPACE)
+    parser.add_argument("--base-url", default=None, help="Provider gateway; a local stub server is started if omitted")
+    parser.add_argument("--providers", default=",".join(PROVIDERS))
+    parser.add_argument("--synthetic", type=int, default=0, help="Validate N synthetic records instead of Order.csv")
+    parser.add_argument("--repeat", type=int, default=1, help="Passes over the same records (later passes hit the cache)")
+    parser.add_argument("--max-concurrency", type=int, default=MAX_CONCURRENCY)
+    parser.add_argument("--ttl", type=float, default=DEFAULT_TTL)
+    parser.add_argument("--stub-latency-ms", type=float, default=50.0)
+    parser.add_argument("--stub-fail-rate", type=float, default=0.0)
+    parser.add_argument("--output", type=Path, default=None)
+    args = parser.parse_args(argv)
+
+    providers = args.providers.split(",")
+    if args.synthetic:
+        frame = synthetic_records(args.synthetic)
+    else:
+        frame = pd.concat(iter_canonical_records(args.workspace, DEFAULT_CHUNKSIZE, REQUEST_FIELDS), ignore_index=True)
+    server = None
+    base_url = args.base_url
+    if base_url is None:
+        server = start_stub_server(latency=args.stub_latency_ms / 1000, fail_rate=args.stub_fail_rate)
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+        print(f"Using local stub server at {base_url}")
+
+    cache = TTLCache(args.ttl)
+    try:
+        for attempt in range(args.repeat):
+            start = time.perf_counter()
+            results, stats = asyncio.run(dispatch(frame, providers, base_url, cache, args.max_concurrency))
+            elapsed = time.perf_counter() - start
+            print(f"\nPass {attempt + 1}: {len(frame)} records x {len(providers)} providers in {elapsed:.2f}s "
+                  f"({len(frame) * len(providers) / elapsed:,.0f} validations/sec)")
+            for provider, s in stats.items():
+                print(f"  - {provider}: {s['unique_keys']} unique keys, {s['cache_hits']} cached, {s['requests']} "
+                      f"requests, {s['retries']} retries, {s['failures']} failed ({s['seconds']:.2f}s)")
+        print(f"\nCache: {cache.stats}")
+    finally:
+        if server is not None:
+            server.shutdown()
+    if args.output:
+        output = results.apply(lambda column: column.map(lambda r: json.dumps(r) if isinstance(r, dict) else None)) \
+            .assign(order_id=frame.get("order_id"))
+        atomic_write(args.output, lambda f: output.to_csv(f, index=False), newline="")
+
+
+if __name__ == "__main__":
+    main()
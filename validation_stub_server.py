@@ -0,0 +1,85 @@
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Offline stand-in for the external validation providers. Every provider is
+# a POST /<provider> taking {"records": [{"key": ..., "payload": {...}}]} and
+# answering {"results": [...]} in the same order, with a fixed latency and an
+# optional share of 503/429 responses to exercise the dispatcher's retries.
+STUB_PROVIDERS = ["google_address", "smarty_address", "ip_address", "ai_prompt"]
+
+
+def _bucket(key, n):
+    return int(hashlib.blake2b(key.encode("utf-8"), digest_size=4).hexdigest(), 16) % n
+
+
+def stub_result(provider, key):
+    # Deterministic per key, so repeated runs and cached results agree.
+    if provider in ("google_address", "smarty_address"):
+        return {"unconfirmed_components": _bucket(key, 3)}
+    if provider == "ip_address":
+        return {"vpn": _bucket(key, 10) == 0, "proxy": _bucket(key, 17) == 0, "hosting": _bucket(key, 7) == 0}
+    return {"risk": ["Low", "Medium", "High"][_bucket(key, 3)]}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    latency = 0.05
+    fail_rate = 0.0
+    calls = None
+
+    def do_POST(self):
+        provider = self.path.strip("/")
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        time.sleep(self.latency)
+        self.calls[provider] = self.calls.get(provider, 0) + 1
+        if provider not in STUB_PROVIDERS:
+            return self._send(404, {"error": f"unknown provider {provider}"})
+        if random.random() < self.fail_rate:
+            return self._send(random.choice([429, 503]), {"error": "stub failure"})
+        results = [stub_result(provider, record["key"]) for record in body.get("records", [])]
+        self._send(200, {"results": results})
+
+    def _send(self, status, payload):
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(port=0, latency=0.05, fail_rate=0.0):
+    # Runs in a daemon thread; port 0 picks a free port, read back from
+    # server.server_address.
+    handler = type("Handler", (StubHandler,), {"latency": latency, "fail_rate": fail_rate, "calls": {}})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve stub responses for the external validation providers.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    server = start_stub_server(args.port, args.latency_ms / 1000, args.fail_rate)
+    print(f"Stub validation server on http://127.0.0.1:{server.server_address[1]} ({', '.join(STUB_PROVIDERS)})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()